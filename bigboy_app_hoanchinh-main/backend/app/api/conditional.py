@@ -0,0 +1,64 @@
+"""
+Conditional GET for Flask views
+
+A view's ETag is derived from the request (endpoint, URL arguments, query
+string) and the version counters of the data it shows, read before the
+view runs. A matching If-None-Match is answered 304 without running the
+view at all.
+"""
+import hashlib
+from functools import wraps
+from flask import request, make_response, g
+from app.infrastructure.databases import get_request_session
+from app.services.version_service import get_versions
+
+
+def _etag(key) -> str:
+    raw = repr((request.endpoint, sorted(request.view_args.items()), sorted(request.args.items(multi=True)), key))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _cache_control(public: bool, max_age: int) -> str:
+    if public:
+        return f"public, max-age={max_age}"
+    # Per-user data: keep it out of shared caches and revalidate every use
+    return "private, no-cache"
+
+
+def conditional(key_func, public: bool = False, max_age: int = 0):
+    """
+    ETag/304 support. key_func(*args, **kwargs) returns what the response
+    depends on (usually version counters), or None to serve the view
+    uncached. Only 200 responses get an ETag.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = key_func(*args, **kwargs)
+            if key is None:
+                return f(*args, **kwargs)
+            etag = _etag(key)
+            # A response cache below keys its entries on this too, so a body
+            # cached before the versions moved is never sent under the new ETag
+            g.conditional_key = key
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = _cache_control(public, max_age)
+            if not public:
+                response.vary.add("Authorization")
+            return response
+        return decorated_function
+    return decorator
+
+
+def tenant_versions(tenant_id, *scopes):
+    """Key for a view showing these scopes of one tenant (None: no tenant, no ETag)"""
+    if not tenant_id:
+        return None
+    versions = get_versions(get_request_session(), tenant_id, scopes)
+    return (tenant_id,) + tuple(versions[scope] for scope in scopes)
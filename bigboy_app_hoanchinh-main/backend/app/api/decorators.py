@@ -3,8 +3,8 @@ Authentication decorators for Flask
 """
 from functools import wraps
 from flask import request, g, jsonify
-from app.infrastructure.databases import get_session
-from app.models.account_model import AccountModel, AccountRole
+from app.models.account_model import AccountRole
+from app.services.principal_service import get_principal
 from app.utils.jwt import verify_access_token
 from app.utils.errors import AuthError, ForbiddenError
 
@@ -33,20 +33,16 @@ def require_auth(f):
         except (TypeError, ValueError):
             raise AuthError('Invalid token payload')
         
-        session = get_session()
-        try:
-            user = session.query(AccountModel).filter(AccountModel.id == user_id).first()
-            if not user:
-                raise AuthError('User not found')
-            
-            # Verify tenant access if tenant is set
-            if hasattr(g, 'tenant_id') and user.tenant_id and user.tenant_id != g.tenant_id:
-                raise AuthError('Không có quyền truy cập tenant này')
-            
-            g.current_user = user
-            return f(*args, **kwargs)
-        finally:
-            session.close()
+        user = get_principal(user_id, payload.get('iat'))
+        if not user:
+            raise AuthError('User not found')
+        
+        # Verify tenant access if tenant is set
+        if hasattr(g, 'tenant_id') and user.tenant_id and user.tenant_id != g.tenant_id:
+            raise AuthError('Không có quyền truy cập tenant này')
+        
+        g.current_user = user
+        return f(*args, **kwargs)
     
     return decorated_function
 
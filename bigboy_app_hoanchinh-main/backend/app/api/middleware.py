@@ -3,8 +3,8 @@ Middleware setup for Flask
 """
 from flask import request, g
 import logging
-from app.infrastructure.databases import get_session
-from app.models.tenant_model import TenantModel, TenantStatus
+from app.models.tenant_model import TenantStatus
+from app.services.tenant_service import get_tenant
 from app.config import Config
 from app.utils.errors import AuthError, ForbiddenError
 
@@ -35,26 +35,16 @@ def setup_middleware(app):
         if not tenant_id_or_slug:
             return
         
-        # Find tenant
-        session = get_session()
-        try:
-            # Try by ID first, then by slug
-            try:
-                tenant_id = int(tenant_id_or_slug)
-                tenant = session.query(TenantModel).filter(TenantModel.id == tenant_id).first()
-            except ValueError:
-                tenant = session.query(TenantModel).filter(TenantModel.slug == tenant_id_or_slug).first()
-            
-            if not tenant:
-                return
-            
-            if tenant.status != TenantStatus.ACTIVE:
-                return
-            
-            # Attach to request context
-            g.tenant = tenant
-            g.tenant_id = tenant.id
-            
-        finally:
-            session.close()
+        # Find tenant (served from cache, database only on miss)
+        tenant = get_tenant(tenant_id_or_slug)
+        
+        if not tenant:
+            return
+        
+        if tenant.status != TenantStatus.ACTIVE:
+            return
+        
+        # Attach to request context
+        g.tenant = tenant
+        g.tenant_id = tenant.id
 
@@ -0,0 +1,401 @@
+"""
+Response cache for public GET endpoints
+
+Rendered 200 responses are cached under the route and its normalized query
+string, in process and, with RESPONSE_CACHE_BACKEND=redis, in Redis shared
+by every worker. Concurrent misses of one key are coalesced: one request
+renders it while the others wait for its result. Once an entry is older
+than RESPONSE_CACHE_TTL it is still served for RESPONSE_CACHE_STALE_TTL
+more seconds while a background refresh renders it again.
+
+Entries carry tags ("restaurants", "restaurant:<id>", "menu:<id>"); committed
+writes to tenants, reviews and dishes drop the entries of their tags. A
+render that straddles such an invalidation is not stored: in process a
+generation counter tells, in Redis a per-tag one. Below @conditional the
+version key behind the ETag is part of the cache key, so a cached body is
+only ever sent with the ETag of the versions it was rendered at.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import NamedTuple, Optional
+from flask import request, g, current_app, make_response
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.infrastructure.events import publish, subscribe
+from app.models.customer_model import CustomerModel
+from app.models.dish_model import DishModel
+from app.models.review_model import ReviewModel
+from app.models.tenant_model import TenantModel
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Tags
+RESTAURANTS = "restaurants"  # Listings across restaurants
+
+
+def restaurant_tag(tenant_id) -> str:
+    return f"restaurant:{tenant_id}"
+
+
+def menu_tag(tenant_id) -> str:
+    return f"menu:{tenant_id}"
+
+
+# Event bus channel carrying invalidated tags
+RESPONSE_CHANNEL = "cache.response"
+
+
+class CachedResponse(NamedTuple):
+    body: str
+    status: int
+    mimetype: str
+    stored_at: float  # time.time(), comparable across workers
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class _RedisTier:
+    """
+    Entries shared by every worker; per-tag sets find them on invalidation,
+    per-tag generations tell renders that straddled one
+    """
+
+    def __init__(self):
+        import redis
+        self._redis = redis
+        self._client = redis.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            db=Config.REDIS_DB,
+            password=Config.REDIS_PASSWORD or None,
+            socket_timeout=1
+        )
+        self.prefix = Config.RESPONSE_CACHE_PREFIX
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._redis.RedisError as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        return CachedResponse(*json.loads(raw)) if raw else None
+
+    def _generation_keys(self, tags):
+        return [self.prefix + "gen:" + tag for tag in sorted(tags)]
+
+    def generations(self, tags):
+        """Invalidation counters of `tags`, read before rendering; None if unreadable"""
+        try:
+            return self._client.mget(self._generation_keys(tags))
+        except self._redis.RedisError:
+            return None
+
+    def set(self, key: str, entry: CachedResponse, tags, generations) -> None:
+        """Store unless a tag was invalidated since `generations` was read"""
+        if generations is None:
+            return
+        ttl = Config.RESPONSE_CACHE_TTL + Config.RESPONSE_CACHE_STALE_TTL
+        generation_keys = self._generation_keys(tags)
+        try:
+            with self._client.pipeline() as pipe:
+                pipe.watch(*generation_keys)
+                if pipe.mget(generation_keys) != generations:
+                    return
+                pipe.multi()
+                pipe.set(self.prefix + key, json.dumps(entry), ex=ttl)
+                for tag in tags:
+                    pipe.sadd(self.prefix + "tag:" + tag, key)
+                    pipe.expire(self.prefix + "tag:" + tag, ttl)
+                pipe.execute()
+        except self._redis.WatchError:
+            pass  # Invalidated while storing
+        except self._redis.RedisError as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def acquire(self, key: str) -> bool:
+        """Claim rendering of `key` across workers"""
+        try:
+            return bool(self._client.set(
+                self.prefix + "lock:" + key, 1, nx=True, px=int(Config.RESPONSE_CACHE_LOCK_TIMEOUT * 1000)
+            ))
+        except self._redis.RedisError:
+            return True
+
+    def release(self, key: str) -> None:
+        try:
+            self._client.delete(self.prefix + "lock:" + key)
+        except self._redis.RedisError:
+            pass
+
+    def invalidate(self, tags) -> None:
+        try:
+            # Bump first: a render that read the old generation can no longer store
+            pipe = self._client.pipeline()
+            for generation_key in self._generation_keys(tags):
+                pipe.incr(generation_key)
+            pipe.execute()
+            for tag in tags:
+                tag_key = self.prefix + "tag:" + tag
+                keys = self._client.smembers(tag_key)
+                pipe = self._client.pipeline()
+                for key in keys:
+                    pipe.delete(self.prefix + key.decode())
+                pipe.delete(tag_key)
+                pipe.execute()
+        except self._redis.RedisError as e:
+            logger.warning(f"Response cache invalidation failed: {e}")
+
+
+# In-process tier: keyed by (cache key, frozenset of tags)
+_local = TTLCache(
+    maxsize=Config.RESPONSE_CACHE_SIZE,
+    ttl=Config.RESPONSE_CACHE_TTL + Config.RESPONSE_CACHE_STALE_TTL
+)
+_redis_tier = None
+_flights = {}  # cache key -> Event set when its render finishes
+_flights_lock = threading.Lock()
+_generation = 0  # Bumped by every invalidation: renders that straddle one are not stored
+_refresher = ThreadPoolExecutor(
+    max_workers=Config.RESPONSE_CACHE_REFRESH_WORKERS, thread_name_prefix="response-cache"
+)
+
+
+def _shared_tier() -> Optional[_RedisTier]:
+    global _redis_tier
+    if Config.RESPONSE_CACHE_BACKEND != "redis":
+        return None
+    if _redis_tier is None:
+        _redis_tier = _RedisTier()
+    return _redis_tier
+
+
+def _cache_key() -> str:
+    """
+    Route plus its query string, sorted by name with empty values dropped.
+    Names and values stay exactly as sent: views read them case-sensitively,
+    and the first of repeated values wins, so their order is kept. Ends with
+    the version key @conditional computed, if any.
+    """
+    args = sorted(
+        ((name, value) for name, value in request.args.items(multi=True) if value),
+        key=lambda arg: arg[0]
+    )
+    view_args = sorted((request.view_args or {}).items())
+    versions = g.get("conditional_key")
+    return json.dumps([request.endpoint, view_args, args, versions], separators=(",", ":"), default=repr)
+
+
+def _lookup(key: str, tags: frozenset) -> Optional[CachedResponse]:
+    entry = _local.get((key, tags))
+    if entry is None:
+        shared = _shared_tier()
+        entry = shared.get(key) if shared else None
+        if entry is not None:
+            _local.set((key, tags), entry)
+    return entry
+
+
+def _store(key: str, tags: frozenset, entry: CachedResponse, generations) -> None:
+    _local.set((key, tags), entry)
+    shared = _shared_tier()
+    if shared:
+        shared.set(key, entry, tags, generations)
+
+
+def _begin_flight(key: str):
+    """The Event to set when done if this caller renders `key`, else None"""
+    with _flights_lock:
+        if key in _flights:
+            return None
+        shared = _shared_tier()
+        if shared and not shared.acquire(key):
+            return None
+        done = _flights[key] = threading.Event()
+        return done
+
+
+def _end_flight(key: str, done) -> None:
+    with _flights_lock:
+        _flights.pop(key, None)
+    shared = _shared_tier()
+    if shared:
+        shared.release(key)
+    done.set()
+
+
+def _wait_for(key: str, tags: frozenset) -> Optional[CachedResponse]:
+    """Wait for another request (here or on another worker) to render `key`"""
+    deadline = time.monotonic() + Config.RESPONSE_CACHE_LOCK_TIMEOUT
+    with _flights_lock:
+        done = _flights.get(key)
+    if done is not None:
+        done.wait(Config.RESPONSE_CACHE_LOCK_TIMEOUT)
+        return _lookup(key, tags)
+    while time.monotonic() < deadline:
+        entry = _lookup(key, tags)
+        if entry is not None:
+            return entry
+        time.sleep(0.05)
+    return None
+
+
+def _render(view, args, kwargs, key: str, tags: frozenset):
+    generation = _generation
+    shared = _shared_tier()
+    generations = shared.generations(tags) if shared else None
+    response = make_response(view(*args, **kwargs))
+    if response.status_code == 200 and generation == _generation:
+        _store(key, tags, CachedResponse(
+            response.get_data(as_text=True), response.status_code, response.mimetype, time.time()
+        ), generations)
+    return response
+
+
+def _refresh(app, path: str, query_string: str, flight) -> None:
+    """Re-render a stale entry through the full request pipeline; `flight` is the (key, Event) it holds"""
+    rendered = False
+    try:
+        with app.test_request_context(path, query_string=query_string, method="GET"):
+            g.response_cache_refresh = flight
+            try:
+                app.full_dispatch_request()
+            finally:
+                # The view popped the flight and let it go once rendered
+                rendered = "response_cache_refresh" not in g
+    except Exception as e:
+        logger.warning(f"Response cache refresh of {path} failed: {e}")
+    finally:
+        if not rendered:
+            _end_flight(*flight)
+
+
+def _serve(entry: CachedResponse, state: str):
+    response = make_response(entry.body, entry.status)
+    response.mimetype = entry.mimetype
+    response.headers["X-Cache"] = state
+    return response
+
+
+def cached_response(tags_func):
+    """
+    Cache a public GET view. tags_func(*args, **kwargs) returns the tags
+    whose invalidation must drop the cached response, or None to serve the
+    view uncached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            if Config.RESPONSE_CACHE_BACKEND == "off" or request.method != "GET":
+                return view(*args, **kwargs)
+            tags = tags_func(*args, **kwargs)
+            if tags is None:
+                return view(*args, **kwargs)
+            key, tags = _cache_key(), frozenset(tags)
+
+            flight = g.pop("response_cache_refresh", None)
+            if flight is not None:
+                # The stale hit that queued this refresh took the flight for it
+                try:
+                    return _render(view, args, kwargs, key, tags)
+                finally:
+                    _end_flight(*flight)
+
+            entry = _lookup(key, tags)
+            if entry is not None:
+                if entry.age() < Config.RESPONSE_CACHE_TTL:
+                    return _serve(entry, "HIT")
+                if entry.age() < Config.RESPONSE_CACHE_TTL + Config.RESPONSE_CACHE_STALE_TTL:
+                    # Take the flight before queueing: later stale hits see it and queue nothing
+                    done = _begin_flight(key)
+                    if done is not None:
+                        try:
+                            _refresher.submit(_refresh, current_app._get_current_object(),
+                                              request.path, request.query_string.decode("latin-1"), (key, done))
+                        except RuntimeError:
+                            _end_flight(key, done)  # Shutting down
+                    return _serve(entry, "STALE")
+
+            done = _begin_flight(key)
+            if done is None:
+                entry = _wait_for(key, tags)
+                if entry is not None:
+                    return _serve(entry, "HIT")
+                return view(*args, **kwargs)
+            try:
+                response = _render(view, args, kwargs, key, tags)
+            finally:
+                _end_flight(key, done)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return decorated_function
+    return decorator
+
+
+def invalidate_responses(tags) -> None:
+    """Drop cached responses carrying any of `tags`, in Redis and on every worker"""
+    tags = sorted(set(tags))
+    if not tags:
+        return
+    shared = _shared_tier()
+    if shared:
+        shared.invalidate(tags)
+    publish(RESPONSE_CHANNEL, {"tags": tags})
+
+
+def _drop_local(message) -> None:
+    global _generation
+    tags = set(message["tags"])
+    _generation += 1
+    _local.pop_matching(lambda key: not tags.isdisjoint(key[1]))
+
+
+subscribe(RESPONSE_CHANNEL, _drop_local)
+
+
+def _track(tags_of):
+    def track(mapper, connection, target):
+        inspect(target).session.info.setdefault("response_cache_tags", set()).update(tags_of(target))
+    return track
+
+
+_TAGS = (
+    (TenantModel, lambda tenant: (RESTAURANTS, restaurant_tag(tenant.id), menu_tag(tenant.id))),
+    # Ratings show in listings and on the restaurant page
+    (ReviewModel, lambda review: (RESTAURANTS, restaurant_tag(review.tenant_id))),
+    (DishModel, lambda dish: (menu_tag(dish.tenant_id),)),
+)
+for _model, _tags_of in _TAGS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _track(_tags_of))
+
+
+@event.listens_for(CustomerModel, "after_update")
+def _track_renamed_customer(mapper, connection, target):
+    """Review pages show reviewer names: drop those of the restaurants a renamed customer reviewed"""
+    if not inspect(target).attrs.name.history.has_changes():
+        return
+    tenant_ids = connection.execute(
+        select(ReviewModel.tenant_id).where(ReviewModel.customer_id == target.id).distinct()
+    ).scalars()
+    inspect(target).session.info.setdefault("response_cache_tags", set()).update(
+        restaurant_tag(tenant_id) for tenant_id in tenant_ids
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed(session):
+    tags = session.info.pop("response_cache_tags", None)
+    if tags:
+        invalidate_responses(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed(session):
+    session.info.pop("response_cache_tags", None)
@@ -17,6 +17,8 @@ from app.api.routes.reservation_routes import reservation_bp
 from app.api.routes.history_routes import history_bp
 from app.api.routes.membership_routes import membership_bp
 from app.api.routes.qr_routes import qr_bp
+from app.api.routes.discount_routes import discount_bp
+from app.api.routes.upload_routes import upload_bp
 
 def register_routes(app):
     # Register static route FIRST
@@ -30,6 +32,8 @@ def register_routes(app):
     app.register_blueprint(table_bp, url_prefix="/api/v1/tables")
     app.register_blueprint(guest_bp, url_prefix="/api/v1/guest")
     app.register_blueprint(admin_bp, url_prefix="/api/v1/admin")
+    app.register_blueprint(discount_bp, url_prefix="/api/v1/discounts")
+    app.register_blueprint(upload_bp, url_prefix="/api/v1/uploads")
     
     # Mobile App routes
     app.register_blueprint(customer_bp, url_prefix="/api/v1/customer")
@@ -3,15 +3,16 @@ Admin routes
 """
 import os
 import json
-from datetime import datetime
 from flask import Blueprint, request, jsonify, g
 from sqlalchemy import func
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.tenant_model import TenantModel, TenantStatus, SubscriptionType
 from app.models.account_model import AccountModel, AccountRole
-from app.models.order_model import OrderModel, OrderStatus
-from app.models.dish_model import DishSnapshotModel
+from app.models.daily_revenue_model import DailyRevenueModel
 from app.api.decorators import require_admin
+from app.services.tenant_service import invalidate_tenant
+from app.services.revenue_service import parse_day
+from app.infrastructure.scheduler import job_metrics
 from app.config import Config
 
 admin_bp = Blueprint("admin", __name__)
@@ -34,33 +35,30 @@ def admin_get_restaurants():
     limit = request.args.get('limit', 10, type=int)
     status = request.args.get('status')
     
-    session = get_session()
-    try:
-        query = session.query(TenantModel)
-        
-        if status:
-            query = query.filter(TenantModel.status == TenantStatus(status))
-        
-        restaurants = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return jsonify({
-            "data": [{
-                "id": r.id,
-                "name": r.name,
-                "slug": r.slug,
-                "email": r.email,
-                "phone": r.phone,
-                "address": r.address,
-                "logo": r.logo,
-                "description": r.description,
-                "status": r.status.value,
-                "subscription": r.subscription.value,
-                "created_at": r.created_at.isoformat() if r.created_at else None
-            } for r in restaurants],
-            "message": "Lấy danh sách nhà hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    query = session.query(TenantModel)
+    
+    if status:
+        query = query.filter(TenantModel.status == TenantStatus(status))
+    
+    restaurants = query.offset((page - 1) * limit).limit(limit).all()
+    
+    return jsonify({
+        "data": [{
+            "id": r.id,
+            "name": r.name,
+            "slug": r.slug,
+            "email": r.email,
+            "phone": r.phone,
+            "address": r.address,
+            "logo": r.logo,
+            "description": r.description,
+            "status": r.status.value,
+            "subscription": r.subscription.value,
+            "created_at": r.created_at.isoformat() if r.created_at else None
+        } for r in restaurants],
+        "message": "Lấy danh sách nhà hàng thành công!"
+    }), 200
 
 
 @admin_bp.route("/restaurants/<int:restaurant_id>/status", methods=["PUT"])
@@ -71,7 +69,7 @@ def update_restaurant_status(restaurant_id):
     if not data or 'status' not in data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         restaurant = session.query(TenantModel).filter(
             TenantModel.id == restaurant_id
@@ -83,6 +81,7 @@ def update_restaurant_status(restaurant_id):
         try:
             restaurant.status = TenantStatus(data['status'])
             session.commit()
+            invalidate_tenant(restaurant.id, restaurant.slug)
             session.refresh(restaurant)
             
             return jsonify({
@@ -97,8 +96,6 @@ def update_restaurant_status(restaurant_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @admin_bp.route("/users", methods=["GET"])
@@ -109,92 +106,79 @@ def admin_get_users():
     limit = request.args.get('limit', 10, type=int)
     role = request.args.get('role')
     
-    session = get_session()
-    try:
-        query = session.query(AccountModel)
-        
-        if role:
-            query = query.filter(AccountModel.role == AccountRole(role))
-        
-        users = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return jsonify({
-            "data": [{
-                "id": u.id,
-                "name": u.name,
-                "email": u.email,
-                "avatar": u.avatar,
-                "role": u.role.value,
-                "tenant_id": u.tenant_id,
-                "created_at": u.created_at.isoformat() if u.created_at else None
-            } for u in users],
-            "message": "Lấy danh sách người dùng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    query = session.query(AccountModel)
+    
+    if role:
+        query = query.filter(AccountModel.role == AccountRole(role))
+    
+    users = query.offset((page - 1) * limit).limit(limit).all()
+    
+    return jsonify({
+        "data": [{
+            "id": u.id,
+            "name": u.name,
+            "email": u.email,
+            "avatar": u.avatar,
+            "role": u.role.value,
+            "tenant_id": u.tenant_id,
+            "created_at": u.created_at.isoformat() if u.created_at else None
+        } for u in users],
+        "message": "Lấy danh sách người dùng thành công!"
+    }), 200
 
 
 @admin_bp.route("/revenue", methods=["GET"])
 @require_admin
 def admin_get_revenue():
-    """Get revenue summary by restaurant (Admin only). PAID orders only."""
+    """Get revenue summary by restaurant (Admin only). PAID orders only, read from the daily rollup."""
     date_from = request.args.get('date_from')  # YYYY-MM-DD
     date_to = request.args.get('date_to')
     
-    session = get_session()
-    try:
-        query = (
-            session.query(
-                TenantModel.id,
-                TenantModel.name,
-                TenantModel.slug,
-                func.coalesce(
-                    func.sum(DishSnapshotModel.price * OrderModel.quantity),
-                    0
-                ).label("total_revenue"),
-                func.count(OrderModel.id).label("order_count"),
-            )
-            .join(OrderModel, (OrderModel.tenant_id == TenantModel.id) & (OrderModel.status == OrderStatus.PAID))
-            .join(DishSnapshotModel, OrderModel.dish_snapshot_id == DishSnapshotModel.id)
+    session = get_request_session()
+    query = (
+        session.query(
+            TenantModel.id,
+            TenantModel.name,
+            TenantModel.slug,
+            func.coalesce(func.sum(DailyRevenueModel.revenue), 0).label("total_revenue"),
+            func.coalesce(func.sum(DailyRevenueModel.order_count), 0).label("order_count"),
         )
-        
-        if date_from:
-            try:
-                dt_from = datetime.strptime(date_from, "%Y-%m-%d")
-                query = query.filter(func.date(OrderModel.created_at) >= dt_from.date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                dt_to = datetime.strptime(date_to, "%Y-%m-%d")
-                query = query.filter(func.date(OrderModel.created_at) <= dt_to.date())
-            except ValueError:
-                pass
-        
-        rows = query.group_by(TenantModel.id, TenantModel.name, TenantModel.slug).all()
-        
-        total_all = sum(r.total_revenue or 0 for r in rows)
-        
-        return jsonify({
-            "data": {
-                "by_restaurant": [
-                    {
-                        "tenant_id": r.id,
-                        "name": r.name,
-                        "slug": r.slug,
-                        "total_revenue": int(r.total_revenue or 0),
-                        "order_count": r.order_count or 0,
-                    }
-                    for r in rows
-                ],
-                "total_revenue": int(total_all),
-                "date_from": date_from,
-                "date_to": date_to,
-            },
-            "message": "Lấy doanh thu thành công!",
-        }), 200
-    finally:
-        session.close()
+        .join(DailyRevenueModel, DailyRevenueModel.tenant_id == TenantModel.id)
+    )
+    
+    # Days are local to Config.SERVER_TIMEZONE
+    day_from = parse_day(date_from)
+    if day_from:
+        query = query.filter(DailyRevenueModel.day >= day_from)
+    day_to = parse_day(date_to)
+    if day_to:
+        query = query.filter(DailyRevenueModel.day <= day_to)
+    
+    rows = query.group_by(TenantModel.id, TenantModel.name, TenantModel.slug).having(
+        func.sum(DailyRevenueModel.order_count) > 0
+    ).all()
+    
+    total_all = sum(r.total_revenue or 0 for r in rows)
+    
+    return jsonify({
+        "data": {
+            "by_restaurant": [
+                {
+                    "tenant_id": r.id,
+                    "name": r.name,
+                    "slug": r.slug,
+                    "total_revenue": int(r.total_revenue or 0),
+                    "order_count": r.order_count or 0,
+                }
+                for r in rows
+            ],
+            "total_revenue": int(total_all),
+            "date_from": date_from,
+            "date_to": date_to,
+        },
+        "message": "Lấy doanh thu thành công!",
+    }), 200
 
 
 def _read_ai_config():
@@ -247,6 +231,19 @@ def admin_update_ai_config():
     return jsonify({"data": current, "message": "Cập nhật cấu hình AI thành công!"}), 200
 
 
+@admin_bp.route("/jobs", methods=["GET"])
+@require_admin
+def admin_get_jobs():
+    """Maintenance job metrics of this process (Admin only)"""
+    return jsonify({
+        "data": {
+            "mode": Config.SCHEDULER_MODE,
+            "jobs": job_metrics()
+        },
+        "message": "Lấy thông tin tác vụ nền thành công!"
+    }), 200
+
+
 @admin_bp.route("/debug/seed-restaurants", methods=["POST", "GET"])
 def debug_seed_restaurants():
     """
@@ -261,11 +258,10 @@ def debug_seed_restaurants():
     
     try:
         init_demo_restaurants()
-        session = get_session()
+        session = get_request_session()
         count = session.query(TenantModel).filter(
             TenantModel.status == TenantStatus.ACTIVE
         ).count()
-        session.close()
         
         return jsonify({
             "message": "Đã seed restaurants thành công",
@@ -2,13 +2,15 @@
 Authentication routes
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.account_model import AccountModel, AccountRole
 from app.models.tenant_model import TenantModel, TenantStatus
 from app.utils.crypto import hash_password, verify_password
 from app.utils.jwt import create_access_token, create_refresh_token, verify_refresh_token
 from app.utils.helpers import generate_slug
+from app.services.geo_service import parse_coordinates
 from app.api.decorators import require_auth
+from app.services.tenant_service import invalidate_tenant
 from app.config import Config
 from datetime import datetime, timedelta
 
@@ -21,7 +23,7 @@ def register():
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         # Check if email already exists
         existing_tenant = session.query(TenantModel).filter(
@@ -30,6 +32,11 @@ def register():
         if existing_tenant:
             return jsonify({"message": "Email already registered"}), 400
         
+        try:
+            latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'))
+        except (TypeError, ValueError) as e:
+            return jsonify({"message": str(e)}), 400
+        
         # Generate slug
         slug = generate_slug(data.get('name', ''))
         base_slug = slug
@@ -45,6 +52,8 @@ def register():
             email=data.get('email'),
             phone=data.get('phone'),
             address=data.get('address'),
+            latitude=latitude,
+            longitude=longitude,
             description=data.get('description'),
             status=TenantStatus.ACTIVE
         )
@@ -62,6 +71,7 @@ def register():
         )
         session.add(owner)
         session.commit()
+        invalidate_tenant(tenant.id, tenant.slug)
         
         return jsonify({
             "data": {
@@ -76,8 +86,6 @@ def register():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @auth_bp.route("/login", methods=["POST"])
@@ -87,7 +95,7 @@ def login():
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         user = session.query(AccountModel).filter(
             AccountModel.email == data.get('email')
@@ -127,8 +135,6 @@ def login():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @auth_bp.route("/refresh-token", methods=["POST"])
@@ -144,7 +150,7 @@ def refresh_token():
     if not payload:
         return jsonify({"message": "Invalid refresh token"}), 401
     
-    session = get_session()
+    session = get_request_session()
     try:
         # Verify token exists in database
         from app.models.refresh_token_model import RefreshTokenModel
@@ -188,8 +194,6 @@ def refresh_token():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @auth_bp.route("/me", methods=["GET"])
@@ -3,7 +3,7 @@ Customer routes - Mobile App
 """
 from flask import Blueprint, request, jsonify, g
 import logging
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.customer_model import CustomerModel, MembershipTier
 from app.utils.crypto import hash_password, verify_password
 from app.utils.jwt import create_access_token, create_refresh_token, verify_refresh_token
@@ -72,7 +72,7 @@ def customer_register():
         logger.warning("❌ Registration failed: Invalid request (no data)")
         return jsonify({"message": "Đăng ký thất bại", "detail": "Yêu cầu không hợp lệ"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         # Validate required fields
         name = data.get('name')
@@ -154,8 +154,6 @@ def customer_register():
         import traceback
         logger.error(traceback.format_exc())
         return jsonify({"message": "Đăng ký thất bại", "detail": "Đã xảy ra lỗi hệ thống. Vui lòng thử lại sau."}), 500
-    finally:
-        session.close()
 
 
 @customer_bp.route("/login", methods=["POST"])
@@ -172,7 +170,7 @@ def customer_login():
     logger.info(f"🔵 Login attempt for email: {email}")
     logger.info(f"📝 Password provided: {'Yes' if password else 'No'}, length: {len(password) if password else 0}")
     
-    session = get_session()
+    session = get_request_session()
     try:
         customer = session.query(CustomerModel).filter(
             CustomerModel.email == email
@@ -222,8 +220,6 @@ def customer_login():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @customer_bp.route("/debug/delete-by-email", methods=["POST"])
@@ -241,7 +237,7 @@ def debug_delete_customer_by_email():
     if not email:
         return jsonify({"message": "Invalid request", "detail": "Email is required"}), 400
 
-    session = get_session()
+    session = get_request_session()
     try:
         customer = session.query(CustomerModel).filter(
             CustomerModel.email == email
@@ -260,8 +256,6 @@ def debug_delete_customer_by_email():
     except Exception as e:
         session.rollback()
         return jsonify({"message": "Xóa khách hàng thất bại", "detail": str(e)}), 500
-    finally:
-        session.close()
 
 
 @customer_bp.route("/debug/check-customer", methods=["POST"])
@@ -280,7 +274,7 @@ def debug_check_customer():
     if not email:
         return jsonify({"message": "Email is required"}), 400
 
-    session = get_session()
+    session = get_request_session()
     try:
         customer = session.query(CustomerModel).filter(
             CustomerModel.email == email
@@ -307,8 +301,6 @@ def debug_check_customer():
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"message": "Error checking customer", "detail": str(e)}), 500
-    finally:
-        session.close()
 
 
 @customer_bp.route("/reset-password", methods=["POST"])
@@ -337,7 +329,7 @@ def reset_customer_password():
             "detail": "Mật khẩu mới phải có ít nhất 6 ký tự"
         }), 400
 
-    session = get_session()
+    session = get_request_session()
     try:
         customer = session.query(CustomerModel).filter(
             CustomerModel.email == email
@@ -356,8 +348,6 @@ def reset_customer_password():
     except Exception as e:
         session.rollback()
         return jsonify({"message": "Đổi mật khẩu thất bại", "detail": str(e)}), 500
-    finally:
-        session.close()
 
 
 @customer_bp.route("/me", methods=["GET"])
@@ -367,28 +357,25 @@ def get_customer_info():
     if not customer_id:
         return jsonify({"message": error_msg}), 401
     
-    session = get_session()
-    try:
-        customer = session.query(CustomerModel).filter(
-            CustomerModel.id == customer_id
-        ).first()
-        
-        if not customer:
-            return jsonify({"message": "Customer not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "id": customer.id,
-                "name": customer.name,
-                "email": customer.email,
-                "phone": customer.phone,
-                "avatar": customer.avatar,
-                "membership_tier": customer.membership_tier.value,
-                "total_spending": customer.total_spending,
-                "points": customer.points
-            },
-            "message": "Lấy thông tin khách hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    customer = session.query(CustomerModel).filter(
+        CustomerModel.id == customer_id
+    ).first()
+    
+    if not customer:
+        return jsonify({"message": "Customer not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "id": customer.id,
+            "name": customer.name,
+            "email": customer.email,
+            "phone": customer.phone,
+            "avatar": customer.avatar,
+            "membership_tier": customer.membership_tier.value,
+            "total_spending": customer.total_spending,
+            "points": customer.points
+        },
+        "message": "Lấy thông tin khách hàng thành công!"
+    }), 200
 
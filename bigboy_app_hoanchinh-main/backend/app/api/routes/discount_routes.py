@@ -0,0 +1,207 @@
+"""
+Discount routes - Restaurant promotions
+"""
+from flask import Blueprint, request, jsonify, g
+from datetime import datetime
+from app.infrastructure.databases import get_request_session
+from app.models.discount_model import DiscountModel, DiscountType, DiscountStatus
+from app.models.dish_model import DishModel
+from app.api.decorators import require_employee, require_manager
+from app.services.discount_service import invalidate_discounts
+from app.services.revenue_service import SERVER_TZ
+
+discount_bp = Blueprint("discount", __name__)
+
+
+def _parse_datetime(value):
+    """ISO timestamp; naive values are taken as server local time"""
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=SERVER_TZ)
+
+
+def _discount_data(discount):
+    return {
+        "id": discount.id,
+        "tenant_id": discount.tenant_id,
+        "dish_id": discount.dish_id,
+        "name": discount.name,
+        "type": discount.type.value,
+        "value": discount.value,
+        "start_date": discount.start_date.isoformat() if discount.start_date else None,
+        "end_date": discount.end_date.isoformat() if discount.end_date else None,
+        "status": discount.status.value,
+        "created_at": discount.created_at.isoformat() if discount.created_at else None,
+        "updated_at": discount.updated_at.isoformat() if discount.updated_at else None
+    }
+
+
+def _validate(session, discount):
+    """Return an error message, or None when the discount is consistent"""
+    if not discount.name:
+        return "Name is required"
+    if discount.value is None or discount.value <= 0:
+        return "Value must be positive"
+    if discount.type == DiscountType.PERCENTAGE and discount.value > 100:
+        return "Percentage must not exceed 100"
+    start_date, end_date = (
+        value if value.tzinfo else value.replace(tzinfo=SERVER_TZ)
+        for value in (discount.start_date, discount.end_date)
+    )
+    if end_date <= start_date:
+        return "end_date must be after start_date"
+    if discount.dish_id is not None:
+        dish_tenant_id = session.query(DishModel.tenant_id).filter(DishModel.id == discount.dish_id).scalar()
+        if dish_tenant_id != discount.tenant_id:
+            return "Dish not found"
+    return None
+
+
+@discount_bp.route("", methods=["GET"])
+@require_employee
+def get_discounts():
+    """Get the restaurant's discounts"""
+    if not g.current_user.tenant_id:
+        return jsonify({"message": "User must belong to a tenant"}), 403
+
+    status = request.args.get('status')
+
+    session = get_request_session()
+    query = session.query(DiscountModel).filter(DiscountModel.tenant_id == g.current_user.tenant_id)
+    if status:
+        try:
+            query = query.filter(DiscountModel.status == DiscountStatus(status))
+        except ValueError:
+            return jsonify({"message": "Invalid status"}), 400
+    discounts = query.order_by(DiscountModel.start_date.desc()).all()
+
+    return jsonify({
+        "data": [_discount_data(d) for d in discounts],
+        "message": "Lấy danh sách khuyến mãi thành công!"
+    }), 200
+
+
+@discount_bp.route("", methods=["POST"])
+@require_manager
+def create_discount():
+    """Create a discount"""
+    if not g.current_user.tenant_id:
+        return jsonify({"message": "User must belong to a tenant"}), 403
+
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "Invalid request"}), 400
+
+    session = get_request_session()
+    try:
+        try:
+            discount = DiscountModel(
+                tenant_id=g.current_user.tenant_id,
+                dish_id=data.get('dish_id'),
+                name=data.get('name'),
+                type=DiscountType(data.get('type')),
+                value=int(data.get('value')),
+                start_date=_parse_datetime(data.get('start_date')),
+                end_date=_parse_datetime(data.get('end_date')),
+                status=DiscountStatus(data.get('status', DiscountStatus.ACTIVE.value))
+            )
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid discount"}), 400
+
+        error = _validate(session, discount)
+        if error:
+            return jsonify({"message": error}), 400
+
+        session.add(discount)
+        session.commit()
+        invalidate_discounts(discount.tenant_id)
+        session.refresh(discount)
+
+        return jsonify({
+            "data": _discount_data(discount),
+            "message": "Tạo khuyến mãi thành công!"
+        }), 201
+    except Exception as e:
+        session.rollback()
+        return jsonify({"message": str(e)}), 500
+
+
+@discount_bp.route("/<int:discount_id>", methods=["PUT"])
+@require_manager
+def update_discount(discount_id):
+    """Update a discount"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "Invalid request"}), 400
+
+    session = get_request_session()
+    try:
+        discount = session.query(DiscountModel).filter(DiscountModel.id == discount_id).first()
+
+        if not discount:
+            return jsonify({"message": "Discount not found"}), 404
+
+        # Check tenant access
+        if discount.tenant_id != g.current_user.tenant_id:
+            return jsonify({"message": "Access denied"}), 403
+
+        try:
+            if 'dish_id' in data:
+                discount.dish_id = data['dish_id']
+            if 'name' in data:
+                discount.name = data['name']
+            if 'type' in data:
+                discount.type = DiscountType(data['type'])
+            if 'value' in data:
+                discount.value = int(data['value'])
+            if 'start_date' in data:
+                discount.start_date = _parse_datetime(data['start_date'])
+            if 'end_date' in data:
+                discount.end_date = _parse_datetime(data['end_date'])
+            if 'status' in data:
+                discount.status = DiscountStatus(data['status'])
+        except (TypeError, ValueError):
+            session.rollback()
+            return jsonify({"message": "Invalid discount"}), 400
+
+        error = _validate(session, discount)
+        if error:
+            session.rollback()
+            return jsonify({"message": error}), 400
+
+        session.commit()
+        invalidate_discounts(discount.tenant_id)
+        session.refresh(discount)
+
+        return jsonify({
+            "data": _discount_data(discount),
+            "message": "Cập nhật khuyến mãi thành công!"
+        }), 200
+    except Exception as e:
+        session.rollback()
+        return jsonify({"message": str(e)}), 500
+
+
+@discount_bp.route("/<int:discount_id>", methods=["DELETE"])
+@require_manager
+def delete_discount(discount_id):
+    """Delete a discount"""
+    session = get_request_session()
+    try:
+        discount = session.query(DiscountModel).filter(DiscountModel.id == discount_id).first()
+
+        if not discount:
+            return jsonify({"message": "Discount not found"}), 404
+
+        # Check tenant access
+        if discount.tenant_id != g.current_user.tenant_id:
+            return jsonify({"message": "Access denied"}), 403
+
+        tenant_id = discount.tenant_id
+        session.delete(discount)
+        session.commit()
+        invalidate_discounts(tenant_id)
+
+        return jsonify({"message": "Xóa khuyến mãi thành công!"}), 200
+    except Exception as e:
+        session.rollback()
+        return jsonify({"message": str(e)}), 500
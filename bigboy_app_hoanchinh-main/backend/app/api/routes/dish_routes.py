@@ -2,14 +2,36 @@
 Dish routes
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.dish_model import DishModel, DishStatus
 from app.api.decorators import require_employee
+from app.api.conditional import conditional, tenant_versions
+from app.api.response_cache import cached_response, menu_tag
+from app.config import Config
+from app.services.search_service import search_ids, DISH
+from app.services.menu_service import menu_delta
+from app.services.version_service import MENU
+from app.services.image_service import image_variants
+from app.utils.pagination import MAX_PAGE_SIZE
 from flask import g
 
 dish_bp = Blueprint("dish", __name__)
 
+
+def _menu_key():
+    """The listed tenant's menu version (lists across tenants are not cached)"""
+    tenant_id = request.args.get('tenant_id', type=int) or request.args.get('restaurant_id', type=int)
+    return tenant_versions(tenant_id, MENU)
+
+
+def _menu_tags():
+    tenant_id = request.args.get('tenant_id', type=int) or request.args.get('restaurant_id', type=int)
+    return (menu_tag(tenant_id),) if tenant_id else None
+
+
 @dish_bp.route("", methods=["GET"])
+@conditional(_menu_key, public=True, max_age=Config.PUBLIC_CACHE_MAX_AGE)
+@cached_response(_menu_tags)
 def get_dishes():
     """Get list of dishes"""
     page = request.args.get('page', 1, type=int)
@@ -17,81 +39,136 @@ def get_dishes():
     category = request.args.get('category')
     status = request.args.get('status')
     tenant_id = request.args.get('tenant_id', type=int) or request.args.get('restaurant_id', type=int)
+    search_term = request.args.get('search')
     
-    session = get_session()
-    try:
-        query = session.query(DishModel)
-        
-        if tenant_id:
-            query = query.filter(DishModel.tenant_id == tenant_id)
-        
-        if category:
-            query = query.filter(DishModel.category == category)
-        
-        if status:
-            status_str = str(status).strip()
-            if status_str.lower() == "available":
-                query = query.filter(DishModel.status == DishStatus.AVAILABLE)
-            else:
-                try:
-                    query = query.filter(DishModel.status == DishStatus(status_str))
-                except (ValueError, TypeError):
-                    pass
-        
+    session = get_request_session()
+    query = session.query(DishModel)
+    
+    # Name, category or description, with or without diacritics
+    if search_term:
+        # The status filter below decides which statuses are listed
+        ranked = search_ids(search_term, DISH, tenant_id, active_only=False)
+        if category or status:
+            # Filtered in SQL too: only the best matches up to this page are looked up
+            candidates = ranked[:max(limit, MAX_PAGE_SIZE) * page]
+        else:
+            # Every match is listed: look up just this page
+            candidates = ranked[(page - 1) * limit:page * limit]
+        query = query.filter(DishModel.id.in_(candidates))
+    
+    if tenant_id:
+        query = query.filter(DishModel.tenant_id == tenant_id)
+    
+    if category:
+        query = query.filter(DishModel.category == category)
+    
+    if status:
+        status_str = str(status).strip()
+        if status_str.lower() == "available":
+            query = query.filter(DishModel.status == DishStatus.AVAILABLE)
+        else:
+            try:
+                query = query.filter(DishModel.status == DishStatus(status_str))
+            except (ValueError, TypeError):
+                pass
+    
+    if search_term:
+        # Best match first
+        rank = {dish_id: position for position, dish_id in enumerate(ranked)}
+        matches = sorted(query.all(), key=lambda dish: rank[dish.id])
+        if category or status:
+            total = len(matches)
+            dishes = matches[(page - 1) * limit:page * limit]
+        else:
+            total = len(ranked)
+            dishes = matches
+    else:
         total = query.count()
         dishes = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return jsonify({
-            "data": {
-                "items": [{
-                    "id": d.id,
-                    "tenant_id": d.tenant_id,
-                    "name": d.name,
-                    "price": d.price,
-                    "description": d.description,
-                    "image": d.image,
-                    "category": d.category,
-                    "status": d.status.value,
-                    "created_at": d.created_at.isoformat() if d.created_at else None,
-                    "updated_at": d.updated_at.isoformat() if d.updated_at else None
-                } for d in dishes],
-                "total": total,
-                "page": page,
-                "limit": limit
-            },
-            "message": "Lấy danh sách món ăn thành công!"
-        }), 200
-    finally:
-        session.close()
+    
+    return jsonify({
+        "data": {
+            "items": [{
+                "id": d.id,
+                "tenant_id": d.tenant_id,
+                "name": d.name,
+                "price": d.price,
+                "description": d.description,
+                "image": d.image,
+                "image_variants": image_variants(d.image),
+                "category": d.category,
+                "status": d.status.value,
+                "created_at": d.created_at.isoformat() if d.created_at else None,
+                "updated_at": d.updated_at.isoformat() if d.updated_at else None
+            } for d in dishes],
+            "total": total,
+            "page": page,
+            "limit": limit
+        },
+        "message": "Lấy danh sách món ăn thành công!"
+    }), 200
+
+
+@dish_bp.route("/sync", methods=["GET"])
+@conditional(_menu_key, public=True, max_age=Config.PUBLIC_CACHE_MAX_AGE)
+def sync_dishes():
+    """Menu changes since a version: ?tenant_id=&since=<version from the last sync>"""
+    tenant_id = request.args.get('tenant_id', type=int) or request.args.get('restaurant_id', type=int)
+    since = request.args.get('since', 0, type=int)
+    if not tenant_id or since < 0:
+        return jsonify({"message": "Invalid request"}), 400
+    
+    session = get_request_session()
+    delta = menu_delta(session, tenant_id, since)
+    return jsonify({
+        "data": {
+            "version": delta.version,
+            "reset": delta.reset,
+            "items": [{
+                "id": d.id,
+                "tenant_id": d.tenant_id,
+                "name": d.name,
+                "price": d.price,
+                "description": d.description,
+                "image": d.image,
+                "image_variants": image_variants(d.image),
+                "category": d.category,
+                "status": d.status.value,
+                "version": d.version,
+                "created_at": d.created_at.isoformat() if d.created_at else None,
+                "updated_at": d.updated_at.isoformat() if d.updated_at else None
+            } for d in delta.dishes],
+            "deleted": delta.deleted
+        },
+        "message": "Đồng bộ thực đơn thành công!"
+    }), 200
 
 
 @dish_bp.route("/<int:dish_id>", methods=["GET"])
 def get_dish(dish_id):
     """Get dish by ID"""
-    session = get_session()
-    try:
-        dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
-        
-        if not dish:
-            return jsonify({"message": "Dish not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "id": dish.id,
-                "tenant_id": dish.tenant_id,
-                "name": dish.name,
-                "price": dish.price,
-                "description": dish.description,
-                "image": dish.image,
-                "category": dish.category,
-                "status": dish.status.value,
-                "created_at": dish.created_at.isoformat() if dish.created_at else None,
-                "updated_at": dish.updated_at.isoformat() if dish.updated_at else None
-            },
-            "message": "Lấy thông tin món ăn thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
+    
+    if not dish:
+        return jsonify({"message": "Dish not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "id": dish.id,
+            "tenant_id": dish.tenant_id,
+            "name": dish.name,
+            "price": dish.price,
+            "description": dish.description,
+            "image": dish.image,
+            "image_variants": image_variants(dish.image),
+            "category": dish.category,
+            "status": dish.status.value,
+            "created_at": dish.created_at.isoformat() if dish.created_at else None,
+            "updated_at": dish.updated_at.isoformat() if dish.updated_at else None
+        },
+        "message": "Lấy thông tin món ăn thành công!"
+    }), 200
 
 
 @dish_bp.route("", methods=["POST"])
@@ -105,7 +182,7 @@ def create_dish():
     if not g.current_user.tenant_id:
         return jsonify({"message": "User must belong to a tenant"}), 403
     
-    session = get_session()
+    session = get_request_session()
     try:
         dish = DishModel(
             tenant_id=g.current_user.tenant_id,
@@ -129,16 +206,16 @@ def create_dish():
                 "price": dish.price,
                 "description": dish.description,
                 "image": dish.image,
+                "image_variants": image_variants(dish.image),
                 "category": dish.category,
-                "status": dish.status.value
+                "status": dish.status.value,
+                "version": dish.version
             },
             "message": "Tạo món ăn thành công!"
         }), 201
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @dish_bp.route("/<int:dish_id>", methods=["PUT"])
@@ -149,7 +226,7 @@ def update_dish(dish_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
         
@@ -185,23 +262,23 @@ def update_dish(dish_id):
                 "price": dish.price,
                 "description": dish.description,
                 "image": dish.image,
+                "image_variants": image_variants(dish.image),
                 "category": dish.category,
-                "status": dish.status.value
+                "status": dish.status.value,
+                "version": dish.version
             },
             "message": "Cập nhật món ăn thành công!"
         }), 200
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @dish_bp.route("/<int:dish_id>", methods=["DELETE"])
 @require_employee
 def delete_dish(dish_id):
     """Delete a dish"""
-    session = get_session()
+    session = get_request_session()
     try:
         dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
         
@@ -219,6 +296,4 @@ def delete_dish(dish_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
@@ -2,9 +2,10 @@
 Dish routes
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.dish_model import DishModel, DishStatus
 from app.api.decorators import require_employee
+from app.services.image_service import image_variants
 from flask import g
 
 dish_bp = Blueprint("dish", __name__)
@@ -18,80 +19,76 @@ def get_dishes():
     status = request.args.get('status')
     tenant_id = request.args.get('tenant_id', type=int) or request.args.get('restaurant_id', type=int)
     
-    session = get_session()
-    try:
-        query = session.query(DishModel)
-        
-        if tenant_id:
-            query = query.filter(DishModel.tenant_id == tenant_id)
-        
-        if category:
-            query = query.filter(DishModel.category == category)
-        
-        if status:
-            status_str = str(status).strip()
-            if status_str.lower() == "available":
-                query = query.filter(DishModel.status == DishStatus.AVAILABLE)
-            else:
-                try:
-                    query = query.filter(DishModel.status == DishStatus(status_str))
-                except (ValueError, TypeError):
-                    pass
-        
-        total = query.count()
-        dishes = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return jsonify({
-            "data": {
-                "items": [{
-                    "id": d.id,
-                    "tenant_id": d.tenant_id,
-                    "name": d.name,
-                    "price": d.price,
-                    "description": d.description,
-                    "image": d.image,
-                    "category": d.category,
-                    "status": d.status.value,
-                    "created_at": d.created_at.isoformat() if d.created_at else None,
-                    "updated_at": d.updated_at.isoformat() if d.updated_at else None
-                } for d in dishes],
-                "total": total,
-                "page": page,
-                "limit": limit
-            },
-            "message": "Lấy danh sách món ăn thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    query = session.query(DishModel)
+    
+    if tenant_id:
+        query = query.filter(DishModel.tenant_id == tenant_id)
+    
+    if category:
+        query = query.filter(DishModel.category == category)
+    
+    if status:
+        status_str = str(status).strip()
+        if status_str.lower() == "available":
+            query = query.filter(DishModel.status == DishStatus.AVAILABLE)
+        else:
+            try:
+                query = query.filter(DishModel.status == DishStatus(status_str))
+            except (ValueError, TypeError):
+                pass
+    
+    total = query.count()
+    dishes = query.offset((page - 1) * limit).limit(limit).all()
+    
+    return jsonify({
+        "data": {
+            "items": [{
+                "id": d.id,
+                "tenant_id": d.tenant_id,
+                "name": d.name,
+                "price": d.price,
+                "description": d.description,
+                "image": d.image,
+                "image_variants": image_variants(d.image),
+                "category": d.category,
+                "status": d.status.value,
+                "created_at": d.created_at.isoformat() if d.created_at else None,
+                "updated_at": d.updated_at.isoformat() if d.updated_at else None
+            } for d in dishes],
+            "total": total,
+            "page": page,
+            "limit": limit
+        },
+        "message": "Lấy danh sách món ăn thành công!"
+    }), 200
 
 
 @dish_bp.route("/<int:dish_id>", methods=["GET"])
 def get_dish(dish_id):
     """Get dish by ID"""
-    session = get_session()
-    try:
-        dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
-        
-        if not dish:
-            return jsonify({"message": "Dish not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "id": dish.id,
-                "tenant_id": dish.tenant_id,
-                "name": dish.name,
-                "price": dish.price,
-                "description": dish.description,
-                "image": dish.image,
-                "category": dish.category,
-                "status": dish.status.value,
-                "created_at": dish.created_at.isoformat() if dish.created_at else None,
-                "updated_at": dish.updated_at.isoformat() if dish.updated_at else None
-            },
-            "message": "Lấy thông tin món ăn thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
+    
+    if not dish:
+        return jsonify({"message": "Dish not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "id": dish.id,
+            "tenant_id": dish.tenant_id,
+            "name": dish.name,
+            "price": dish.price,
+            "description": dish.description,
+            "image": dish.image,
+            "image_variants": image_variants(dish.image),
+            "category": dish.category,
+            "status": dish.status.value,
+            "created_at": dish.created_at.isoformat() if dish.created_at else None,
+            "updated_at": dish.updated_at.isoformat() if dish.updated_at else None
+        },
+        "message": "Lấy thông tin món ăn thành công!"
+    }), 200
 
 
 @dish_bp.route("", methods=["POST"])
@@ -105,7 +102,7 @@ def create_dish():
     if not g.current_user.tenant_id:
         return jsonify({"message": "User must belong to a tenant"}), 403
     
-    session = get_session()
+    session = get_request_session()
     try:
         dish = DishModel(
             tenant_id=g.current_user.tenant_id,
@@ -129,6 +126,7 @@ def create_dish():
                 "price": dish.price,
                 "description": dish.description,
                 "image": dish.image,
+                "image_variants": image_variants(dish.image),
                 "category": dish.category,
                 "status": dish.status.value
             },
@@ -137,8 +135,6 @@ def create_dish():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @dish_bp.route("/<int:dish_id>", methods=["PUT"])
@@ -149,7 +145,7 @@ def update_dish(dish_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
         
@@ -185,6 +181,7 @@ def update_dish(dish_id):
                 "price": dish.price,
                 "description": dish.description,
                 "image": dish.image,
+                "image_variants": image_variants(dish.image),
                 "category": dish.category,
                 "status": dish.status.value
             },
@@ -193,15 +190,13 @@ def update_dish(dish_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @dish_bp.route("/<int:dish_id>", methods=["DELETE"])
 @require_employee
 def delete_dish(dish_id):
     """Delete a dish"""
-    session = get_session()
+    session = get_request_session()
     try:
         dish = session.query(DishModel).filter(DishModel.id == dish_id).first()
         
@@ -219,6 +214,4 @@ def delete_dish(dish_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
@@ -2,11 +2,13 @@
 Customer History routes - Lịch sử món ăn và nhà hàng đã ghé
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.customer_history_model import CustomerHistoryModel
 from app.models.customer_model import CustomerModel
 from app.models.tenant_model import TenantModel
 from app.models.order_model import OrderModel
+from app.services.name_service import tenant_names
+from sqlalchemy import func
 from datetime import datetime
 import logging
 
@@ -72,70 +74,66 @@ def get_customer_history():
     page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 20, type=int)
     
-    session = get_session()
-    try:
+    session = get_request_session()
         # Get customer
-        customer = session.query(CustomerModel).filter(
-            CustomerModel.id == customer_id
-        ).first()
-        
-        if not customer:
-            return jsonify({"message": "Customer not found"}), 404
-        
-        # Get history
-        history = session.query(CustomerHistoryModel).filter(
-            CustomerHistoryModel.customer_id == customer_id
-        ).order_by(CustomerHistoryModel.visit_date.desc()).offset(
-            (page - 1) * limit
-        ).limit(limit).all()
-        
-        # Get unique restaurants visited
-        restaurants_visited = session.query(
-            CustomerHistoryModel.tenant_id
-        ).filter(
-            CustomerHistoryModel.customer_id == customer_id
-        ).distinct().count()
-        
-        # Get all dish IDs from history
-        all_dish_ids = []
-        for h in history:
-            if h.dish_ids:
-                all_dish_ids.extend(h.dish_ids)
-        unique_dish_count = len(set(all_dish_ids))
-        
-        return jsonify({
-            "data": {
-                "customer": {
-                    "id": customer.id,
-                    "name": customer.name,
-                    "membership_tier": customer.membership_tier.value,
-                    "total_spending": customer.total_spending,
-                    "points": customer.points
-                },
-                "summary": {
-                    "total_spending": customer.total_spending,
-                    "restaurants_visited": restaurants_visited,
-                    "unique_dishes_tried": unique_dish_count,
-                    "total_visits": len(history)
-                },
-                "history": [{
-                    "id": h.id,
-                    "restaurant_id": h.tenant_id,
-                    "restaurant_name": session.query(TenantModel.name).filter(
-                        TenantModel.id == h.tenant_id
-                    ).scalar(),
-                    "dish_ids": h.dish_ids,
-                    "total_amount": h.total_amount,
-                    "visit_date": h.visit_date.isoformat() if h.visit_date else None,
-                    "notes": h.notes
-                } for h in history],
-                "page": page,
-                "limit": limit
+    customer = session.query(CustomerModel).filter(
+        CustomerModel.id == customer_id
+    ).first()
+    
+    if not customer:
+        return jsonify({"message": "Customer not found"}), 404
+    
+    # Get history
+    history = session.query(CustomerHistoryModel).filter(
+        CustomerHistoryModel.customer_id == customer_id
+    ).order_by(CustomerHistoryModel.visit_date.desc()).offset(
+        (page - 1) * limit
+    ).limit(limit).all()
+    names = tenant_names.resolve(session, (h.tenant_id for h in history))
+    
+    # Get unique restaurants visited
+    restaurants_visited = session.query(
+        CustomerHistoryModel.tenant_id
+    ).filter(
+        CustomerHistoryModel.customer_id == customer_id
+    ).distinct().count()
+    
+    # Get all dish IDs from history
+    all_dish_ids = []
+    for h in history:
+        if h.dish_ids:
+            all_dish_ids.extend(h.dish_ids)
+    unique_dish_count = len(set(all_dish_ids))
+    
+    return jsonify({
+        "data": {
+            "customer": {
+                "id": customer.id,
+                "name": customer.name,
+                "membership_tier": customer.membership_tier.value,
+                "total_spending": customer.total_spending,
+                "points": customer.points
             },
-            "message": "Lấy lịch sử thành công!"
-        }), 200
-    finally:
-        session.close()
+            "summary": {
+                "total_spending": customer.total_spending,
+                "restaurants_visited": restaurants_visited,
+                "unique_dishes_tried": unique_dish_count,
+                "total_visits": len(history)
+            },
+            "history": [{
+                "id": h.id,
+                "restaurant_id": h.tenant_id,
+                "restaurant_name": names.get(h.tenant_id),
+                "dish_ids": h.dish_ids,
+                "total_amount": h.total_amount,
+                "visit_date": h.visit_date.isoformat() if h.visit_date else None,
+                "notes": h.notes
+            } for h in history],
+            "page": page,
+            "limit": limit
+        },
+        "message": "Lấy lịch sử thành công!"
+    }), 200
 
 
 @history_bp.route("/history/restaurants", methods=["GET"])
@@ -145,44 +143,31 @@ def get_visited_restaurants():
     if not customer_id:
         return jsonify({"message": error_msg}), 401
     
-    session = get_session()
-    try:
-        # Get unique restaurants
-        restaurant_ids = session.query(
-            CustomerHistoryModel.tenant_id
-        ).filter(
-            CustomerHistoryModel.customer_id == customer_id
-        ).distinct().all()
-        
-        restaurants = []
-        for (restaurant_id,) in restaurant_ids:
-            restaurant = session.query(TenantModel).filter(
-                TenantModel.id == restaurant_id
-            ).first()
-            
-            if restaurant:
-                # Get visit count and total spending at this restaurant
-                visits = session.query(CustomerHistoryModel).filter(
-                    CustomerHistoryModel.customer_id == customer_id,
-                    CustomerHistoryModel.tenant_id == restaurant_id
-                ).all()
-                
-                total_at_restaurant = sum(v.total_amount for v in visits)
-                
-                restaurants.append({
-                    "id": restaurant.id,
-                    "name": restaurant.name,
-                    "address": restaurant.address,
-                    "logo": restaurant.logo,
-                    "visit_count": len(visits),
-                    "total_spending": total_at_restaurant,
-                    "last_visit": max(v.visit_date for v in visits).isoformat() if visits else None
-                })
-        
-        return jsonify({
-            "data": restaurants,
-            "message": "Lấy danh sách nhà hàng đã ghé thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    # Visit count, spending and last visit per restaurant in one grouped query
+    rows = session.query(
+        TenantModel,
+        func.count(CustomerHistoryModel.id),
+        func.coalesce(func.sum(CustomerHistoryModel.total_amount), 0),
+        func.max(CustomerHistoryModel.visit_date)
+    ).join(
+        CustomerHistoryModel, CustomerHistoryModel.tenant_id == TenantModel.id
+    ).filter(
+        CustomerHistoryModel.customer_id == customer_id
+    ).group_by(TenantModel.id).all()
+    
+    restaurants = [{
+        "id": restaurant.id,
+        "name": restaurant.name,
+        "address": restaurant.address,
+        "logo": restaurant.logo,
+        "visit_count": visit_count,
+        "total_spending": total_spending,
+        "last_visit": last_visit.isoformat() if last_visit else None
+    } for restaurant, visit_count, total_spending, last_visit in rows]
+    
+    return jsonify({
+        "data": restaurants,
+        "message": "Lấy danh sách nhà hàng đã ghé thành công!"
+    }), 200
 
@@ -2,13 +2,38 @@
 Membership routes - Hạng thành viên và điểm tích lũy
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.customer_model import CustomerModel, MembershipTier
+from app.api.conditional import conditional
 import logging
 
 logger = logging.getLogger(__name__)
 membership_bp = Blueprint("membership", __name__)
 
+# Static: the ETag changes only when this dict does
+MEMBERSHIP_TIERS = {
+    "Iron": {
+        "name": "Sắt",
+        "min_spending": 0,
+        "benefits": ["Tích điểm 1%", "Ưu đãi cơ bản"]
+    },
+    "Silver": {
+        "name": "Bạc",
+        "min_spending": 1000000,
+        "benefits": ["Tích điểm 2%", "Giảm giá 5%", "Ưu tiên đặt bàn"]
+    },
+    "Gold": {
+        "name": "Vàng",
+        "min_spending": 5000000,
+        "benefits": ["Tích điểm 3%", "Giảm giá 10%", "Quà tặng sinh nhật", "Ưu tiên cao"]
+    },
+    "Diamond": {
+        "name": "Kim cương",
+        "min_spending": 10000000,
+        "benefits": ["Tích điểm 5%", "Giảm giá 15%", "Quà tặng đặc biệt", "Ưu tiên tối đa", "Dịch vụ VIP"]
+    }
+}
+
 
 def verify_customer_token():
     """Helper to verify customer token and return customer_id"""
@@ -58,33 +83,11 @@ def verify_customer_token():
 
 
 @membership_bp.route("/tiers", methods=["GET"])
+@conditional(lambda: MEMBERSHIP_TIERS, public=True, max_age=86400)
 def get_membership_tiers():
     """Get membership tiers information"""
-    tiers_info = {
-        "Iron": {
-            "name": "Sắt",
-            "min_spending": 0,
-            "benefits": ["Tích điểm 1%", "Ưu đãi cơ bản"]
-        },
-        "Silver": {
-            "name": "Bạc",
-            "min_spending": 1000000,
-            "benefits": ["Tích điểm 2%", "Giảm giá 5%", "Ưu tiên đặt bàn"]
-        },
-        "Gold": {
-            "name": "Vàng",
-            "min_spending": 5000000,
-            "benefits": ["Tích điểm 3%", "Giảm giá 10%", "Quà tặng sinh nhật", "Ưu tiên cao"]
-        },
-        "Diamond": {
-            "name": "Kim cương",
-            "min_spending": 10000000,
-            "benefits": ["Tích điểm 5%", "Giảm giá 15%", "Quà tặng đặc biệt", "Ưu tiên tối đa", "Dịch vụ VIP"]
-        }
-    }
-    
     return jsonify({
-        "data": tiers_info,
+        "data": MEMBERSHIP_TIERS,
         "message": "Lấy thông tin hạng thành viên thành công!"
     }), 200
 
@@ -96,41 +99,38 @@ def get_my_membership():
     if not customer_id:
         return jsonify({"message": error_msg}), 401
     
-    session = get_session()
-    try:
-        customer = session.query(CustomerModel).filter(
-            CustomerModel.id == customer_id
-        ).first()
-        
-        if not customer:
-            return jsonify({"message": "Customer not found"}), 404
-        
-        # Calculate next tier requirements
-        next_tier = None
-        spending_to_next = 0
-        
-        if customer.membership_tier == MembershipTier.IRON:
-            next_tier = "Silver"
-            spending_to_next = max(0, 1000000 - customer.total_spending)
-        elif customer.membership_tier == MembershipTier.SILVER:
-            next_tier = "Gold"
-            spending_to_next = max(0, 5000000 - customer.total_spending)
-        elif customer.membership_tier == MembershipTier.GOLD:
-            next_tier = "Diamond"
-            spending_to_next = max(0, 10000000 - customer.total_spending)
-        
-        return jsonify({
-            "data": {
-                "current_tier": customer.membership_tier.value,
-                "total_spending": customer.total_spending,
-                "points": customer.points,
-                "next_tier": next_tier,
-                "spending_to_next": spending_to_next
-            },
-            "message": "Lấy thông tin hạng thành viên thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    customer = session.query(CustomerModel).filter(
+        CustomerModel.id == customer_id
+    ).first()
+    
+    if not customer:
+        return jsonify({"message": "Customer not found"}), 404
+    
+    # Calculate next tier requirements
+    next_tier = None
+    spending_to_next = 0
+    
+    if customer.membership_tier == MembershipTier.IRON:
+        next_tier = "Silver"
+        spending_to_next = max(0, 1000000 - customer.total_spending)
+    elif customer.membership_tier == MembershipTier.SILVER:
+        next_tier = "Gold"
+        spending_to_next = max(0, 5000000 - customer.total_spending)
+    elif customer.membership_tier == MembershipTier.GOLD:
+        next_tier = "Diamond"
+        spending_to_next = max(0, 10000000 - customer.total_spending)
+    
+    return jsonify({
+        "data": {
+            "current_tier": customer.membership_tier.value,
+            "total_spending": customer.total_spending,
+            "points": customer.points,
+            "next_tier": next_tier,
+            "spending_to_next": spending_to_next
+        },
+        "message": "Lấy thông tin hạng thành viên thành công!"
+    }), 200
 
 
 @membership_bp.route("/update-tier", methods=["POST"])
@@ -152,7 +152,7 @@ def update_membership_tier():
     except:
         return jsonify({"message": "Invalid token"}), 401
     
-    session = get_session()
+    session = get_request_session()
     try:
         customer = session.query(CustomerModel).filter(
             CustomerModel.id == customer_id
@@ -188,6 +188,4 @@ def update_membership_tier():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
@@ -2,204 +2,327 @@
 Mobile App routes - Restaurant listing, search, recommendations
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.api.conditional import conditional, tenant_versions
+from app.api.response_cache import cached_response, restaurant_tag, RESTAURANTS
+from app.config import Config
+from app.infrastructure.databases import get_request_session
 from app.models.tenant_model import TenantModel, TenantStatus
-from app.models.review_model import ReviewModel
-from sqlalchemy import func, desc
+from app.models.restaurant_rating_model import RestaurantRatingModel
+from app.services.search_service import search, search_ids, RESTAURANT, DISH
+from app.services.geo_service import nearby_restaurants, parse_coordinates
+from app.services.version_service import RESTAURANT as RESTAURANT_VERSION
+from app.services.image_service import image_variants
+from app.utils.pagination import MAX_PAGE_SIZE
+from sqlalchemy import func
+import urllib.parse
 
 mobile_bp = Blueprint("mobile", __name__)
 
 
 @mobile_bp.route("/restaurants", methods=["GET"])
+@cached_response(lambda: (RESTAURANTS,))
 def get_restaurants_list():
     """Get list of restaurants for mobile app"""
     page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 20, type=int)
-    search = request.args.get('search')
+    search_term = request.args.get('search')
     min_rating = request.args.get('min_rating', type=float)
     
-    session = get_session()
-    try:
-        query = session.query(TenantModel).filter(
-            TenantModel.status == TenantStatus.ACTIVE
-        )
-        
-        # Search by name or address
-        if search:
-            query = query.filter(
-                (TenantModel.name.ilike(f'%{search}%')) |
-                (TenantModel.address.ilike(f'%{search}%'))
-            )
-        
-        # Calculate average rating for each restaurant
-        restaurants = query.all()
-        restaurant_data = []
-        
-        for restaurant in restaurants:
-            # Get average rating
-            avg_rating = session.query(func.avg(ReviewModel.rating)).filter(
-                ReviewModel.tenant_id == restaurant.id
-            ).scalar() or 0.0
-            
-            # Filter by min_rating if provided
-            if min_rating and avg_rating < min_rating:
-                continue
-            
-            # Get review count
-            review_count = session.query(func.count(ReviewModel.id)).filter(
-                ReviewModel.tenant_id == restaurant.id
-            ).scalar() or 0
-            
-            restaurant_data.append({
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "slug": restaurant.slug,
-                "address": restaurant.address,
-                "phone": restaurant.phone,
-                "logo": restaurant.logo,
-                "description": restaurant.description,
-                "average_rating": round(float(avg_rating), 1),
-                "review_count": review_count
-            })
-        
+    session = get_request_session()
+    average_rating = func.coalesce(RestaurantRatingModel.rating_avg, 0.0)
+    review_count = func.coalesce(RestaurantRatingModel.rating_count, 0)
+    query = session.query(TenantModel, average_rating, review_count).outerjoin(
+        RestaurantRatingModel, RestaurantRatingModel.tenant_id == TenantModel.id
+    ).filter(
+        TenantModel.status == TenantStatus.ACTIVE
+    )
+    
+    # Search by name or address, with or without diacritics
+    if search_term:
+        ranked = search_ids(search_term, RESTAURANT)
+        if min_rating:
+            # Filtered in SQL too: only the best matches up to this page are looked up
+            candidates = ranked[:max(limit, MAX_PAGE_SIZE) * page]
+        else:
+            # Every match is listed: look up just this page
+            candidates = ranked[(page - 1) * limit:page * limit]
+        query = query.filter(TenantModel.id.in_(candidates))
+    
+    # Filter by min_rating if provided
+    if min_rating:
+        query = query.filter(average_rating >= min_rating)
+    
+    if search_term:
+        # Best match first
+        rank = {restaurant_id: position for position, restaurant_id in enumerate(ranked)}
+        rows = sorted(query.all(), key=lambda row: rank[row[0].id])
+        if min_rating:
+            total = len(rows)
+            restaurants = rows[(page - 1) * limit:page * limit]
+        else:
+            total = len(ranked)
+            restaurants = rows
+    else:
+        total = query.count()
         # Sort by rating
-        restaurant_data.sort(key=lambda x: x['average_rating'], reverse=True)
-        
-        # Pagination
-        total = len(restaurant_data)
-        start = (page - 1) * limit
-        end = start + limit
-        paginated_data = restaurant_data[start:end]
-        
-        return jsonify({
-            "data": {
-                "items": paginated_data,
-                "total": total,
-                "page": page,
-                "limit": limit
-            },
-            "message": "Lấy danh sách nhà hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+        restaurants = query.order_by(
+            average_rating.desc(), review_count.desc(), TenantModel.id
+        ).offset((page - 1) * limit).limit(limit).all()
+    
+    paginated_data = [{
+        "id": restaurant.id,
+        "name": restaurant.name,
+        "slug": restaurant.slug,
+        "address": restaurant.address,
+        "phone": restaurant.phone,
+        "logo": restaurant.logo,
+        "logo_variants": image_variants(restaurant.logo),
+        "description": restaurant.description,
+        "average_rating": round(float(avg_rating), 1),
+        "review_count": count
+    } for restaurant, avg_rating, count in restaurants]
+    
+    return jsonify({
+        "data": {
+            "items": paginated_data,
+            "total": total,
+            "page": page,
+            "limit": limit
+        },
+        "message": "Lấy danh sách nhà hàng thành công!"
+    }), 200
+
+
+@mobile_bp.route("/restaurants/nearby", methods=["GET"])
+def get_nearby_restaurants():
+    """Restaurants near a point, nearest first: ?lat=&lng=&radius=km&page=&limit="""
+    page = request.args.get('page', 1, type=int)
+    limit = request.args.get('limit', 20, type=int)
+    radius = request.args.get('radius', Config.NEARBY_DEFAULT_RADIUS_KM, type=float)
+    try:
+        latitude, longitude = parse_coordinates(request.args.get('lat'), request.args.get('lng'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if latitude is None or page < 1 or limit < 1 or not 0 < radius <= Config.NEARBY_MAX_RADIUS_KM:
+        return jsonify({"message": "Invalid request"}), 400
+    
+    session = get_request_session()
+    nearby = nearby_restaurants(session, latitude, longitude, radius)
+    page_items = nearby[(page - 1) * limit:page * limit]
+    
+    rows = session.query(
+        TenantModel, RestaurantRatingModel.rating_avg, RestaurantRatingModel.rating_count
+    ).outerjoin(
+        RestaurantRatingModel, RestaurantRatingModel.tenant_id == TenantModel.id
+    ).filter(
+        TenantModel.id.in_([item.tenant_id for item in page_items])
+    ).all()
+    by_id = {restaurant.id: (restaurant, avg_rating, count) for restaurant, avg_rating, count in rows}
+    
+    items = []
+    for item in page_items:
+        restaurant, avg_rating, count = by_id[item.tenant_id]
+        items.append({
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "slug": restaurant.slug,
+            "address": restaurant.address,
+            "phone": restaurant.phone,
+            "logo": restaurant.logo,
+            "logo_variants": image_variants(restaurant.logo),
+            "description": restaurant.description,
+            "average_rating": round(float(avg_rating or 0), 1),
+            "review_count": count or 0,
+            "distance_km": round(item.distance_km, 3),
+            "branch_id": item.branch_id,
+            "latitude": item.latitude,
+            "longitude": item.longitude
+        })
+    
+    return jsonify({
+        "data": {
+            "items": items,
+            "total": len(nearby),
+            "page": page,
+            "limit": limit
+        },
+        "message": "Lấy danh sách nhà hàng gần bạn thành công!"
+    }), 200
 
 
 @mobile_bp.route("/restaurants/recommended", methods=["GET"])
+@cached_response(lambda: (RESTAURANTS,))
 def get_recommended_restaurants():
     """Get recommended restaurants (top rated)"""
     limit = request.args.get('limit', 10, type=int)
     
-    session = get_session()
-    try:
+    session = get_request_session()
         # Get restaurants with highest ratings
-        restaurants = session.query(
-            TenantModel,
-            func.avg(ReviewModel.rating).label('avg_rating'),
-            func.count(ReviewModel.id).label('review_count')
-        ).join(
-            ReviewModel, TenantModel.id == ReviewModel.tenant_id, isouter=True
-        ).filter(
-            TenantModel.status == TenantStatus.ACTIVE
-        ).group_by(
-            TenantModel.id
-        ).order_by(
-            desc('avg_rating'),
-            desc('review_count')
-        ).limit(limit).all()
-        
-        restaurant_data = []
-        for restaurant, avg_rating, review_count in restaurants:
-            restaurant_data.append({
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "slug": restaurant.slug,
-                "address": restaurant.address,
-                "phone": restaurant.phone,
-                "logo": restaurant.logo,
-                "description": restaurant.description,
-                "average_rating": round(float(avg_rating or 0), 1),
-                "review_count": review_count or 0
-            })
-        
-        return jsonify({
-            "data": restaurant_data,
-            "message": "Lấy danh sách nhà hàng đề xuất thành công!"
-        }), 200
-    finally:
-        session.close()
+    restaurants = session.query(
+        TenantModel,
+        RestaurantRatingModel.rating_avg,
+        RestaurantRatingModel.rating_count
+    ).outerjoin(
+        RestaurantRatingModel, RestaurantRatingModel.tenant_id == TenantModel.id
+    ).filter(
+        TenantModel.status == TenantStatus.ACTIVE
+    ).order_by(
+        func.coalesce(RestaurantRatingModel.rating_avg, 0.0).desc(),
+        func.coalesce(RestaurantRatingModel.rating_count, 0).desc()
+    ).limit(limit).all()
+    
+    restaurant_data = []
+    for restaurant, avg_rating, review_count in restaurants:
+        restaurant_data.append({
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "slug": restaurant.slug,
+            "address": restaurant.address,
+            "phone": restaurant.phone,
+            "logo": restaurant.logo,
+            "logo_variants": image_variants(restaurant.logo),
+            "description": restaurant.description,
+            "average_rating": round(float(avg_rating or 0), 1),
+            "review_count": review_count or 0
+        })
+    
+    return jsonify({
+        "data": restaurant_data,
+        "message": "Lấy danh sách nhà hàng đề xuất thành công!"
+    }), 200
+
+
+def _directions_url(restaurant):
+    """Google Maps URL: exact coordinates when known, else the address"""
+    if restaurant.latitude is not None and restaurant.longitude is not None:
+        query = f"{restaurant.latitude},{restaurant.longitude}"
+    elif restaurant.address:
+        query = urllib.parse.quote(restaurant.address)
+    else:
+        return None
+    return f"https://www.google.com/maps/search/?api=1&query={query}"
 
 
 @mobile_bp.route("/restaurants/<int:restaurant_id>", methods=["GET"])
+@conditional(lambda restaurant_id: tenant_versions(restaurant_id, RESTAURANT_VERSION),
+             public=True, max_age=Config.PUBLIC_CACHE_MAX_AGE)
+@cached_response(lambda restaurant_id: (restaurant_tag(restaurant_id),))
 def get_restaurant_detail(restaurant_id):
     """Get restaurant detail for mobile app"""
-    session = get_session()
-    try:
-        restaurant = session.query(TenantModel).filter(
-            TenantModel.id == restaurant_id,
-            TenantModel.status == TenantStatus.ACTIVE
-        ).first()
-        
-        if not restaurant:
-            return jsonify({"message": "Restaurant not found"}), 404
-        
-        # Get average rating and review count
-        avg_rating = session.query(func.avg(ReviewModel.rating)).filter(
-            ReviewModel.tenant_id == restaurant.id
-        ).scalar() or 0.0
-        
-        review_count = session.query(func.count(ReviewModel.id)).filter(
-            ReviewModel.tenant_id == restaurant.id
-        ).scalar() or 0
-        
-        return jsonify({
-            "data": {
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "slug": restaurant.slug,
-                "address": restaurant.address,
-                "phone": restaurant.phone,
-                "logo": restaurant.logo,
-                "description": restaurant.description,
-                "average_rating": round(float(avg_rating), 1),
-                "review_count": review_count,
-                "directions_url": f"https://www.google.com/maps/search/?api=1&query={restaurant.address}" if restaurant.address else None
-            },
-            "message": "Lấy thông tin nhà hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    restaurant = session.query(TenantModel).filter(
+        TenantModel.id == restaurant_id,
+        TenantModel.status == TenantStatus.ACTIVE
+    ).first()
+    
+    if not restaurant:
+        return jsonify({"message": "Restaurant not found"}), 404
+    
+    # Get average rating, review count and star histogram
+    rating = session.query(RestaurantRatingModel).filter(
+        RestaurantRatingModel.tenant_id == restaurant.id
+    ).first()
+    avg_rating = rating.rating_avg if rating else 0.0
+    review_count = rating.rating_count if rating else 0
+    histogram = rating.histogram() if rating else {str(star): 0 for star in range(1, 6)}
+    
+    return jsonify({
+        "data": {
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "slug": restaurant.slug,
+            "address": restaurant.address,
+            "phone": restaurant.phone,
+            "logo": restaurant.logo,
+            "logo_variants": image_variants(restaurant.logo),
+            "description": restaurant.description,
+            "average_rating": round(float(avg_rating), 1),
+            "review_count": review_count,
+            "rating_histogram": histogram,
+            "latitude": restaurant.latitude,
+            "longitude": restaurant.longitude,
+            "directions_url": _directions_url(restaurant)
+        },
+        "message": "Lấy thông tin nhà hàng thành công!"
+    }), 200
 
 
 @mobile_bp.route("/restaurants/<int:restaurant_id>/directions", methods=["GET"])
 def get_restaurant_directions(restaurant_id):
     """Get directions to restaurant (Google Maps URL)"""
-    session = get_session()
-    try:
-        restaurant = session.query(TenantModel).filter(
-            TenantModel.id == restaurant_id
-        ).first()
-        
-        if not restaurant:
-            return jsonify({"message": "Restaurant not found"}), 404
-        
-        if not restaurant.address:
-            return jsonify({"message": "Restaurant address not available"}), 404
-        
-        # Generate Google Maps URL
-        import urllib.parse
-        encoded_address = urllib.parse.quote(restaurant.address)
-        directions_url = f"https://www.google.com/maps/search/?api=1&query={encoded_address}"
-        
-        return jsonify({
-            "data": {
-                "restaurant_id": restaurant.id,
-                "restaurant_name": restaurant.name,
-                "address": restaurant.address,
-                "directions_url": directions_url,
-                "google_maps_url": directions_url
-            },
-            "message": "Lấy chỉ đường thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    restaurant = session.query(TenantModel).filter(
+        TenantModel.id == restaurant_id
+    ).first()
+    
+    if not restaurant:
+        return jsonify({"message": "Restaurant not found"}), 404
+    
+    directions_url = _directions_url(restaurant)
+    if not directions_url:
+        return jsonify({"message": "Restaurant address not available"}), 404
+    
+    return jsonify({
+        "data": {
+            "restaurant_id": restaurant.id,
+            "restaurant_name": restaurant.name,
+            "address": restaurant.address,
+            "latitude": restaurant.latitude,
+            "longitude": restaurant.longitude,
+            "directions_url": directions_url,
+            "google_maps_url": directions_url
+        },
+        "message": "Lấy chỉ đường thành công!"
+    }), 200
+
+
+
+def _search_item(score, document):
+    return {
+        "type": document.kind,
+        "id": document.id,
+        "name": document.name,
+        "restaurant_id": document.tenant_id,
+        "score": round(score, 3),
+        **document.data
+    }
+
 
+@mobile_bp.route("/search", methods=["GET"])
+def search_all():
+    """Ranked restaurants and dishes: ?q=&type=restaurant|dish&restaurant_id=&limit="""
+    query = (request.args.get('q') or '').strip()
+    kind = request.args.get('type')
+    restaurant_id = request.args.get('restaurant_id', type=int)
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    if kind not in (None, RESTAURANT, DISH) or limit < 1:
+        return jsonify({"message": "Invalid request"}), 400
+    
+    results = search(query, (kind,) if kind else (RESTAURANT, DISH), restaurant_id, limit) if query else []
+    return jsonify({
+        "data": {
+            "query": query,
+            "items": [_search_item(score, document) for score, document in results]
+        },
+        "message": "Tìm kiếm thành công!"
+    }), 200
+
+
+@mobile_bp.route("/search/autocomplete", methods=["GET"])
+def autocomplete():
+    """Suggestions while typing: the last word of ?q= may be incomplete"""
+    query = (request.args.get('q') or '').strip()
+    limit = min(request.args.get('limit', 8, type=int), 20)
+    if limit < 1:
+        return jsonify({"message": "Invalid request"}), 400
+    
+    results = search(query, limit=limit, prefix=True) if query else []
+    return jsonify({
+        "data": [{
+            "type": document.kind,
+            "id": document.id,
+            "name": document.name,
+            "restaurant_id": document.tenant_id
+        } for _, document in results],
+        "message": "Lấy gợi ý tìm kiếm thành công!"
+    }), 200
@@ -2,10 +2,16 @@
 Order routes
 """
 from flask import Blueprint, request, jsonify, g
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.order_model import OrderModel, OrderStatus
-from app.models.dish_model import DishModel, DishSnapshotModel
 from app.api.decorators import require_employee
+from app.services.order_service import create_order_batch, OrderError
+from app.services.revenue_service import record_paid_orders
+from app.services.settlement_service import settle_table
+from app.services.check_service import add_check_lines, is_billable
+from app.services.realtime_service import publish_event, ORDER_CREATED, ORDER_STATUS_CHANGED, ORDER_PAID
+from app.utils.pagination import encode_cursor, decode_cursor, estimate_count, MAX_PAGE_SIZE
+from sqlalchemy import tuple_
 from datetime import datetime
 
 order_bp = Blueprint("order", __name__)
@@ -22,79 +28,54 @@ def create_orders():
     if not data or 'orders' not in data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
-        orders = []
-        table_number = data.get('table_number')
+        orders = create_order_batch(
+            session,
+            g.current_user.tenant_id,
+            data['orders'],
+            table_number=data.get('table_number')
+        )
         
-        for order_data in data['orders']:
-            # Get dish
-            dish = session.query(DishModel).filter(
-                DishModel.id == order_data.get('dish_id')
-            ).first()
-            
-            if not dish:
-                return jsonify({"message": f"Dish {order_data.get('dish_id')} not found"}), 404
-            
-            # Check tenant access
-            if dish.tenant_id != g.current_user.tenant_id:
-                return jsonify({"message": "Access denied"}), 403
-            
-            # Create dish snapshot
-            dish_snapshot = DishSnapshotModel(
-                dish_id=dish.id,
-                name=dish.name,
-                price=dish.price,
-                description=dish.description,
-                image=dish.image,
-                category=dish.category,
-                status=dish.status.value
-            )
-            session.add(dish_snapshot)
-            session.flush()
-            
-            # Create order
-            order = OrderModel(
-                tenant_id=g.current_user.tenant_id,
-                table_number=order_data.get('table_number') or table_number,
-                dish_snapshot_id=dish_snapshot.id,
-                quantity=order_data.get('quantity', 1),
-                notes=order_data.get('notes'),
-                status=OrderStatus.PENDING
-            )
-            session.add(order)
-            orders.append(order)
+        # Serialize before commit so expired rows are not re-fetched one by one
+        items = [{
+            "id": o.id,
+            "tenant_id": o.tenant_id,
+            "table_number": o.table_number,
+            "dish_snapshot_id": o.dish_snapshot_id,
+            "quantity": o.quantity,
+            "unit_price": o.unit_price,
+            "discount_id": o.discount_id,
+            "notes": o.notes,
+            "status": o.status.value,
+            "created_at": o.created_at.isoformat() if o.created_at else None
+        } for o in orders]
         
+        publish_event(session, ORDER_CREATED, items, tenant_id=g.current_user.tenant_id)
         session.commit()
         
-        # Refresh orders
-        for order in orders:
-            session.refresh(order)
-        
         return jsonify({
-            "data": [{
-                "id": o.id,
-                "tenant_id": o.tenant_id,
-                "table_number": o.table_number,
-                "dish_snapshot_id": o.dish_snapshot_id,
-                "quantity": o.quantity,
-                "notes": o.notes,
-                "status": o.status.value,
-                "created_at": o.created_at.isoformat() if o.created_at else None
-            } for o in orders],
-            "message": f"Tạo thành công {len(orders)} đơn hàng!"
+            "data": items,
+            "message": f"Tạo thành công {len(items)} đơn hàng!"
         }), 201
+    except OrderError as e:
+        session.rollback()
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @order_bp.route("", methods=["GET"])
 @require_employee
 def get_orders():
-    """Get list of orders"""
+    """
+    Get list of orders
+
+    Offset mode (page/limit) is the default. Passing `cursor` (empty for the
+    first page) switches to keyset pagination on (created_at, id), which
+    returns `next_cursor`; `total=exact|estimate` opts into a total count.
+    """
     if not g.current_user.tenant_id:
         return jsonify({"message": "User must belong to a tenant"}), 403
     
@@ -104,86 +85,113 @@ def get_orders():
     status = request.args.get('status')
     from_date = request.args.get('from_date')
     to_date = request.args.get('to_date')
+    cursor = request.args.get('cursor')
+    total_mode = request.args.get('total', 'exact' if cursor is None else None)
+    if page < 1 or not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"message": f"page must be >= 1 and limit between 1 and {MAX_PAGE_SIZE}"}), 400
     
-    session = get_session()
-    try:
-        query = session.query(OrderModel).filter(
-            OrderModel.tenant_id == g.current_user.tenant_id
-        )
-        
-        if table_number:
-            query = query.filter(OrderModel.table_number == table_number)
-        
-        if status:
-            query = query.filter(OrderModel.status == OrderStatus(status))
-        
-        if from_date:
-            query = query.filter(OrderModel.created_at >= datetime.fromisoformat(from_date))
-        
-        if to_date:
-            query = query.filter(OrderModel.created_at <= datetime.fromisoformat(to_date))
-        
+    session = get_request_session()
+    query = session.query(OrderModel).filter(
+        OrderModel.tenant_id == g.current_user.tenant_id
+    )
+    
+    if table_number:
+        query = query.filter(OrderModel.table_number == table_number)
+    
+    if status:
+        query = query.filter(OrderModel.status == OrderStatus(status))
+    
+    if from_date:
+        query = query.filter(OrderModel.created_at >= datetime.fromisoformat(from_date))
+    
+    if to_date:
+        query = query.filter(OrderModel.created_at <= datetime.fromisoformat(to_date))
+    
+    total = None
+    if total_mode == 'exact':
         total = query.count()
-        orders = query.order_by(OrderModel.created_at.desc()).offset(
-            (page - 1) * limit
-        ).limit(limit).all()
-        
-        return jsonify({
-            "data": {
-                "items": [{
-                    "id": o.id,
-                    "tenant_id": o.tenant_id,
-                    "table_number": o.table_number,
-                    "guest_id": o.guest_id,
-                    "dish_snapshot_id": o.dish_snapshot_id,
-                    "quantity": o.quantity,
-                    "notes": o.notes,
-                    "status": o.status.value,
-                    "order_handler_id": o.order_handler_id,
-                    "created_at": o.created_at.isoformat() if o.created_at else None,
-                    "updated_at": o.updated_at.isoformat() if o.updated_at else None
-                } for o in orders],
-                "total": total
-            },
-            "message": "Lấy danh sách đơn hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    elif total_mode == 'estimate':
+        total = estimate_count(session, query)
+    
+    ordered = query.order_by(OrderModel.created_at.desc(), OrderModel.id.desc())
+    next_cursor = None
+    if cursor is None:
+        orders = ordered.offset((page - 1) * limit).limit(limit).all()
+    else:
+        if cursor:
+            try:
+                after_created_at, after_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({"message": "Invalid cursor"}), 400
+            ordered = ordered.filter(
+                tuple_(OrderModel.created_at, OrderModel.id) < (after_created_at, after_id)
+            )
+        # One extra row tells whether another page exists
+        orders = ordered.limit(limit + 1).all()
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    
+    result = {
+        "items": [{
+            "id": o.id,
+            "tenant_id": o.tenant_id,
+            "table_number": o.table_number,
+            "guest_id": o.guest_id,
+            "dish_snapshot_id": o.dish_snapshot_id,
+            "quantity": o.quantity,
+            "unit_price": o.unit_price,
+            "discount_id": o.discount_id,
+            "notes": o.notes,
+            "status": o.status.value,
+            "order_handler_id": o.order_handler_id,
+            "created_at": o.created_at.isoformat() if o.created_at else None,
+            "updated_at": o.updated_at.isoformat() if o.updated_at else None
+        } for o in orders],
+        "total": total
+    }
+    if cursor is not None:
+        result["next_cursor"] = next_cursor
+        result["total_estimated"] = total_mode == 'estimate'
+    
+    return jsonify({
+        "data": result,
+        "message": "Lấy danh sách đơn hàng thành công!"
+    }), 200
 
 
 @order_bp.route("/<int:order_id>", methods=["GET"])
 @require_employee
 def get_order(order_id):
     """Get order by ID"""
-    session = get_session()
-    try:
-        order = session.query(OrderModel).filter(OrderModel.id == order_id).first()
-        
-        if not order:
-            return jsonify({"message": "Order not found"}), 404
-        
-        # Check tenant access
-        if order.tenant_id != g.current_user.tenant_id:
-            return jsonify({"message": "Access denied"}), 403
-        
-        return jsonify({
-            "data": {
-                "id": order.id,
-                "tenant_id": order.tenant_id,
-                "table_number": order.table_number,
-                "guest_id": order.guest_id,
-                "dish_snapshot_id": order.dish_snapshot_id,
-                "quantity": order.quantity,
-                "notes": order.notes,
-                "status": order.status.value,
-                "order_handler_id": order.order_handler_id,
-                "created_at": order.created_at.isoformat() if order.created_at else None,
-                "updated_at": order.updated_at.isoformat() if order.updated_at else None
-            },
-            "message": "Lấy đơn hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    order = session.query(OrderModel).filter(OrderModel.id == order_id).first()
+    
+    if not order:
+        return jsonify({"message": "Order not found"}), 404
+    
+    # Check tenant access
+    if order.tenant_id != g.current_user.tenant_id:
+        return jsonify({"message": "Access denied"}), 403
+    
+    return jsonify({
+        "data": {
+            "id": order.id,
+            "tenant_id": order.tenant_id,
+            "table_number": order.table_number,
+            "guest_id": order.guest_id,
+            "dish_snapshot_id": order.dish_snapshot_id,
+            "quantity": order.quantity,
+            "unit_price": order.unit_price,
+            "discount_id": order.discount_id,
+            "notes": order.notes,
+            "status": order.status.value,
+            "order_handler_id": order.order_handler_id,
+            "created_at": order.created_at.isoformat() if order.created_at else None,
+            "updated_at": order.updated_at.isoformat() if order.updated_at else None
+        },
+        "message": "Lấy đơn hàng thành công!"
+    }), 200
 
 
 @order_bp.route("/<int:order_id>", methods=["PUT"])
@@ -194,7 +202,7 @@ def update_order(order_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         order = session.query(OrderModel).filter(OrderModel.id == order_id).first()
         
@@ -206,6 +214,7 @@ def update_order(order_id):
             return jsonify({"message": "Access denied"}), 403
         
         # Update fields
+        previous_status = order.status
         if 'status' in data:
             order.status = OrderStatus(data['status'])
         if 'order_handler_id' in data:
@@ -213,6 +222,29 @@ def update_order(order_id):
         else:
             order.order_handler_id = g.current_user.id
         
+        if order.status != previous_status:
+            amount = order.amount
+            # Keep the table's open check in step with lines being cancelled/restored
+            if is_billable(order.status) != is_billable(previous_status):
+                add_check_lines(
+                    session,
+                    [(order.tenant_id, order.table_number, amount, order.quantity)],
+                    reverse=not is_billable(order.status)
+                )
+            # Keep the revenue rollup in step with orders entering/leaving PAID
+            if OrderStatus.PAID in (order.status, previous_status):
+                record_paid_orders(
+                    session,
+                    [(order.tenant_id, order.branch_id, order.created_at, amount)],
+                    reverse=order.status != OrderStatus.PAID
+                )
+            publish_event(session, ORDER_STATUS_CHANGED, {
+                "id": order.id,
+                "table_number": order.table_number,
+                "status": order.status.value,
+                "previous_status": previous_status.value,
+                "order_handler_id": order.order_handler_id
+            }, tenant_id=order.tenant_id)
         session.commit()
         session.refresh(order)
         
@@ -227,8 +259,6 @@ def update_order(order_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @order_bp.route("/pay", methods=["POST"])
@@ -243,52 +273,39 @@ def pay_orders():
         return jsonify({"message": "Invalid request"}), 400
     
     table_number = data['table_number']
+    customer_id = data.get('customer_id')  # Optional: credit the bill to a member
     
-    session = get_session()
+    session = get_request_session()
     try:
-        # Get unpaid orders for table
-        orders = session.query(OrderModel).filter(
-            OrderModel.tenant_id == g.current_user.tenant_id,
-            OrderModel.table_number == table_number,
-            OrderModel.status != OrderStatus.PAID
-        ).all()
+        settlement = settle_table(
+            session,
+            g.current_user.tenant_id,
+            table_number,
+            g.current_user.id,
+            customer_id=customer_id
+        )
         
-        if not orders:
+        if not settlement:
             return jsonify({"message": "No unpaid orders found for this table"}), 404
         
-        # Update orders to paid
-        for order in orders:
-            order.status = OrderStatus.PAID
-            order.order_handler_id = g.current_user.id
-            
-            # Update customer history if order has customer_id
-            if order.guest_id:
-                # Check if guest is actually a customer
-                from app.models.guest_model import GuestModel
-                guest = session.query(GuestModel).filter(GuestModel.id == order.guest_id).first()
-                # If guest has customer_id, update history
-                # For now, we'll skip guest orders
-                pass
-        
+        publish_event(session, ORDER_PAID, {
+            "table_number": table_number,
+            "order_ids": settlement.order_ids,
+            "total_amount": settlement.total,
+            "order_handler_id": g.current_user.id
+        }, tenant_id=g.current_user.tenant_id)
         session.commit()
         
-        # Update customer history for customer orders
-        for order in orders:
-            if hasattr(order, 'customer_id') and order.customer_id:
-                from app.services.customer_service import update_customer_history_from_order
-                update_customer_history_from_order(order.id, order.customer_id)
-        
         return jsonify({
             "data": [{
-                "id": o.id,
-                "status": o.status.value,
-                "order_handler_id": o.order_handler_id
-            } for o in orders],
-            "message": f"Thanh toán thành công {len(orders)} đơn!"
+                "id": order_id,
+                "status": OrderStatus.PAID.value,
+                "order_handler_id": g.current_user.id
+            } for order_id in settlement.order_ids],
+            "total_amount": settlement.total,
+            "message": f"Thanh toán thành công {len(settlement.order_ids)} đơn!"
         }), 200
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
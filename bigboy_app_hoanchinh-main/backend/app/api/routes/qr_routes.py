@@ -2,9 +2,12 @@
 QR Code routes - Quét mã QR menu
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.table_model import TableModel
 from app.models.tenant_model import TenantModel
+from app.api.conditional import conditional, tenant_versions
+from app.services.version_service import RESTAURANT, TABLES
+from app.services.image_service import image_variants
 
 qr_bp = Blueprint("qr", __name__)
 
@@ -16,44 +19,56 @@ def scan_qr_code():
     if not data or 'token' not in data:
         return jsonify({"message": "Invalid request"}), 400
     
-    token = data.get('token')
+    return _scan(data.get('token'))
+
+
+def _scan_key(token):
+    tenant_id = get_request_session().query(TableModel.tenant_id).filter(TableModel.token == token).scalar()
+    return tenant_versions(tenant_id, RESTAURANT, TABLES)
+
+
+@qr_bp.route("/scan/<token>", methods=["GET"])
+@conditional(_scan_key)
+def get_qr_scan(token):
+    """Same as POST /scan, cacheable: re-scans answer 304 until the restaurant or table changes"""
+    return _scan(token)
+
+
+def _scan(token):
+    session = get_request_session()
+    # Find table by token
+    table = session.query(TableModel).filter(
+        TableModel.token == token
+    ).first()
+    
+    if not table:
+        return jsonify({"message": "Invalid QR code"}), 404
+    
+    # Get restaurant info
+    restaurant = session.query(TenantModel).filter(
+        TenantModel.id == table.tenant_id
+    ).first()
     
-    session = get_session()
-    try:
-        # Find table by token
-        table = session.query(TableModel).filter(
-            TableModel.token == token
-        ).first()
-        
-        if not table:
-            return jsonify({"message": "Invalid QR code"}), 404
-        
-        # Get restaurant info
-        restaurant = session.query(TenantModel).filter(
-            TenantModel.id == table.tenant_id
-        ).first()
-        
-        if not restaurant:
-            return jsonify({"message": "Restaurant not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "restaurant": {
-                    "id": restaurant.id,
-                    "name": restaurant.name,
-                    "slug": restaurant.slug,
-                    "logo": restaurant.logo,
-                    "address": restaurant.address
-                },
-                "table": {
-                    "number": table.number,
-                    "capacity": table.capacity,
-                    "status": table.status.value
-                },
-                "token": token
+    if not restaurant:
+        return jsonify({"message": "Restaurant not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "restaurant": {
+                "id": restaurant.id,
+                "name": restaurant.name,
+                "slug": restaurant.slug,
+                "logo": restaurant.logo,
+                "logo_variants": image_variants(restaurant.logo),
+                "address": restaurant.address
+            },
+            "table": {
+                "number": table.number,
+                "capacity": table.capacity,
+                "status": table.status.value
             },
-            "message": "Quét mã QR thành công!"
-        }), 200
-    finally:
-        session.close()
+            "token": token
+        },
+        "message": "Quét mã QR thành công!"
+    }), 200
 
@@ -2,12 +2,19 @@
 Reservation routes - Table booking
 """
 from flask import Blueprint, request, jsonify, g
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.reservation_model import ReservationModel, ReservationStatus
 from app.models.tenant_model import TenantModel
 from app.models.table_model import TableModel
-from app.models.customer_model import CustomerModel
 from app.api.decorators import require_auth, require_manager
+from app.services.name_service import tenant_names, customer_names
+from app.services.realtime_service import publish_event, RESERVATION_CREATED, RESERVATION_UPDATED
+from app.services.availability_service import (
+    BLOCKING_STATUSES, ReservationConflict, reservation_window, day_slots
+)
+from app.services.table_assignment_service import assign_reservation, plan_day, apply_plan
+from app.services.revenue_service import parse_day
+from app.services.tenant_service import get_tenant
 from datetime import datetime
 import logging
 
@@ -24,6 +31,35 @@ def _safe_isoformat(value):
     return str(value)
 
 
+def _publish_reservation(session, reservation, event_name=RESERVATION_UPDATED):
+    """Notify the restaurant's staff and the booking customer once committed"""
+    session.flush()
+    publish_event(session, event_name, {
+        "id": reservation.id,
+        "restaurant_id": reservation.tenant_id,
+        "customer_id": reservation.customer_id,
+        "table_number": reservation.table_number,
+        "date": _safe_isoformat(reservation.date),
+        "time": reservation.time,
+        "start_at": _safe_isoformat(reservation.start_at),
+        "end_at": _safe_isoformat(reservation.end_at),
+        "guests": reservation.guests,
+        "status": reservation.status.value
+    }, tenant_id=reservation.tenant_id, customer_id=reservation.customer_id)
+
+
+def _assign(session, reservation):
+    """Seat the reservation; tell the owners of bookings moved to make room"""
+    for moved in assign_reservation(session, reservation):
+        _publish_reservation(session, moved)
+
+
+def _reschedule(session, reservation, duration=None):
+    """Recompute start/end from date and time and re-check the table"""
+    reservation.start_at, reservation.end_at = reservation_window(reservation.date, reservation.time, duration)
+    _assign(session, reservation)
+
+
 def verify_customer_token():
     """Helper to verify customer token and return customer_id"""
     auth_header = request.headers.get('Authorization')
@@ -71,6 +107,29 @@ def verify_customer_token():
         return None, "Invalid token"
 
 
+@reservation_bp.route("/restaurants/<int:restaurant_id>/availability", methods=["GET"])
+def get_availability(restaurant_id):
+    """Free booking slots of a day: ?date=YYYY-MM-DD&guests=N[&duration=minutes]"""
+    day = parse_day(request.args.get('date'))
+    guests = request.args.get('guests', 1, type=int)
+    duration = request.args.get('duration', type=int)
+    if not day or guests < 1 or (duration is not None and duration < 1):
+        return jsonify({"message": "Invalid request"}), 400
+    
+    if not get_tenant(restaurant_id):
+        return jsonify({"message": "Restaurant not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "restaurant_id": restaurant_id,
+            "date": day.isoformat(),
+            "guests": guests,
+            "slots": day_slots(restaurant_id, day, guests, duration)
+        },
+        "message": "Lấy lịch bàn trống thành công!"
+    }), 200
+
+
 @reservation_bp.route("/restaurants/<int:restaurant_id>/reservations", methods=["POST"])
 def create_reservation(restaurant_id):
     """Create a table reservation"""
@@ -82,7 +141,7 @@ def create_reservation(restaurant_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         # Check if restaurant exists
         restaurant = session.query(TenantModel).filter(
@@ -98,21 +157,31 @@ def create_reservation(restaurant_id):
         
         try:
             reservation_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        except:
+            start_at, end_at = reservation_window(reservation_date, time_str, data.get('duration'))
+            guests = int(data.get('guests', 1))
+        except (AttributeError, TypeError, ValueError):
             return jsonify({"message": "Invalid date format"}), 400
+        if guests < 1:
+            return jsonify({"message": "Invalid number of guests"}), 400
         
         # Create reservation
         reservation = ReservationModel(
             tenant_id=restaurant_id,
             customer_id=customer_id,
             table_number=data.get('table_number'),
+            table_pinned=data.get('table_number') is not None,
             date=reservation_date,
             time=time_str,
-            guests=data.get('guests', 1),
+            start_at=start_at,
+            end_at=end_at,
+            guests=guests,
             notes=data.get('notes'),
             status=ReservationStatus.PENDING
         )
+        # Checks the table (or picks one) and locks it until commit
+        _assign(session, reservation)
         session.add(reservation)
+        _publish_reservation(session, reservation, RESERVATION_CREATED)
         session.commit()
         session.refresh(reservation)
         
@@ -123,16 +192,19 @@ def create_reservation(restaurant_id):
                 "table_number": reservation.table_number,
                 "date": reservation.date.isoformat() if reservation.date else None,
                 "time": reservation.time,
+                "start_at": _safe_isoformat(reservation.start_at),
+                "end_at": _safe_isoformat(reservation.end_at),
                 "guests": reservation.guests,
                 "status": reservation.status.value
             },
             "message": "Đặt bàn thành công!"
         }), 201
+    except ReservationConflict as e:
+        session.rollback()
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @reservation_bp.route("/reservations", methods=["GET"])
@@ -142,33 +214,31 @@ def get_customer_reservations():
     if not customer_id:
         return jsonify({"message": error_msg}), 401
     
-    session = get_session()
-    try:
-        reservations = session.query(ReservationModel).filter(
-            ReservationModel.customer_id == customer_id
-        ).order_by(ReservationModel.date.desc()).all()
-        
-        return jsonify({
-            "data": {
-                "items": [{
-                    "id": r.id,
-                    "restaurant_id": r.tenant_id,
-                    "restaurant_name": session.query(TenantModel.name).filter(
-                        TenantModel.id == r.tenant_id
-                    ).scalar(),
-                    "table_number": r.table_number,
-                    "date": r.date.isoformat() if r.date else None,
-                    "time": r.time,
-                    "guests": r.guests,
-                    "status": r.status.value,
-                    "notes": r.notes
-                } for r in reservations],
-                "total": len(reservations)
-            },
-            "message": "Lấy danh sách đặt bàn thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    reservations = session.query(ReservationModel).filter(
+        ReservationModel.customer_id == customer_id
+    ).order_by(ReservationModel.date.desc()).all()
+    names = tenant_names.resolve(session, (r.tenant_id for r in reservations))
+    
+    return jsonify({
+        "data": {
+            "items": [{
+                "id": r.id,
+                "restaurant_id": r.tenant_id,
+                "restaurant_name": names.get(r.tenant_id),
+                "table_number": r.table_number,
+                "date": r.date.isoformat() if r.date else None,
+                "time": r.time,
+                "start_at": _safe_isoformat(r.start_at),
+                "end_at": _safe_isoformat(r.end_at),
+                "guests": r.guests,
+                "status": r.status.value,
+                "notes": r.notes
+            } for r in reservations],
+            "total": len(reservations)
+        },
+        "message": "Lấy danh sách đặt bàn thành công!"
+    }), 200
 
 
 @reservation_bp.route("/reservations/<int:reservation_id>", methods=["PUT"])
@@ -182,7 +252,7 @@ def update_reservation(reservation_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         reservation = session.query(ReservationModel).filter(
             ReservationModel.id == reservation_id,
@@ -192,36 +262,53 @@ def update_reservation(reservation_id):
         if not reservation:
             return jsonify({"message": "Reservation not found"}), 404
         
-        # Update fields
-        if 'date' in data:
-            reservation.date = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
-        if 'time' in data:
-            reservation.time = data['time']
-        if 'guests' in data:
-            reservation.guests = data['guests']
-        if 'notes' in data:
-            reservation.notes = data['notes']
-        if 'status' in data:
-            reservation.status = ReservationStatus(data['status'])
+        was_blocking = reservation.status in BLOCKING_STATUSES
         
+        # Update fields
+        try:
+            if 'date' in data:
+                reservation.date = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
+            if 'time' in data:
+                reservation.time = data['time']
+            if 'guests' in data:
+                reservation.guests = int(data['guests'])
+            if 'status' in data:
+                reservation.status = ReservationStatus(data['status'])
+            if 'notes' in data:
+                reservation.notes = data['notes']
+            
+            # The slot only needs checking when it moved, grew or is held again
+            if reservation.status in BLOCKING_STATUSES and (
+                not was_blocking or {'date', 'time', 'guests', 'duration'} & data.keys()
+            ):
+                _reschedule(session, reservation, data.get('duration'))
+        except (AttributeError, TypeError, ValueError):
+            session.rollback()
+            return jsonify({"message": "Invalid reservation"}), 400
+        
+        _publish_reservation(session, reservation)
         session.commit()
         session.refresh(reservation)
         
         return jsonify({
             "data": {
                 "id": reservation.id,
+                "table_number": reservation.table_number,
                 "date": reservation.date.isoformat() if reservation.date else None,
                 "time": reservation.time,
+                "start_at": _safe_isoformat(reservation.start_at),
+                "end_at": _safe_isoformat(reservation.end_at),
                 "guests": reservation.guests,
                 "status": reservation.status.value
             },
             "message": "Cập nhật đặt bàn thành công!"
         }), 200
+    except ReservationConflict as e:
+        session.rollback()
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @reservation_bp.route("/reservations/<int:reservation_id>", methods=["DELETE"])
@@ -231,7 +318,7 @@ def cancel_reservation(reservation_id):
     if not customer_id:
         return jsonify({"message": error_msg}), 401
     
-    session = get_session()
+    session = get_request_session()
     try:
         reservation = session.query(ReservationModel).filter(
             ReservationModel.id == reservation_id,
@@ -242,14 +329,13 @@ def cancel_reservation(reservation_id):
             return jsonify({"message": "Reservation not found"}), 404
         
         reservation.status = ReservationStatus.CANCELLED
+        _publish_reservation(session, reservation)
         session.commit()
         
         return jsonify({"message": "Hủy đặt bàn thành công!"}), 200
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 # ==================== RESTAURANT STAFF ENDPOINTS ====================
@@ -258,7 +344,7 @@ def cancel_reservation(reservation_id):
 @require_auth
 def get_restaurant_reservations():
     """Get all reservations for the authenticated restaurant (Restaurant staff only)"""
-    session = get_session()
+    session = get_request_session()
     try:
         # Get tenant_id from authenticated user
         user = g.current_user
@@ -291,13 +377,7 @@ def get_restaurant_reservations():
         reservations = query.offset((page - 1) * limit).limit(limit).all()
         
         # Get customer names
-        customer_ids = [r.customer_id for r in reservations if r.customer_id]
-        customers = {}
-        if customer_ids:
-            customer_list = session.query(CustomerModel).filter(
-                CustomerModel.id.in_(customer_ids)
-            ).all()
-            customers = {c.id: c.name for c in customer_list}
+        customers = customer_names.resolve(session, (r.customer_id for r in reservations))
         
         items = []
         for r in reservations:
@@ -308,6 +388,8 @@ def get_restaurant_reservations():
                 "table_number": r.table_number,
                 "date": _safe_isoformat(r.date),
                 "time": r.time or "",
+                "start_at": _safe_isoformat(r.start_at),
+                "end_at": _safe_isoformat(r.end_at),
                 "guests": r.guests if r.guests is not None else 1,
                 "status": r.status.value if hasattr(r.status, "value") else str(r.status),
                 "notes": r.notes,
@@ -326,15 +408,73 @@ def get_restaurant_reservations():
     except Exception as e:
         logger.error(f"Error getting restaurant reservations: {str(e)}", exc_info=True)
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
+
+
+@reservation_bp.route("/restaurants/my/floor-plan", methods=["GET"])
+@require_manager
+def preview_floor_plan():
+    """Dry run: proposed table assignment of a day's bookings (?date=YYYY-MM-DD)"""
+    day = parse_day(request.args.get('date'))
+    if not day:
+        return jsonify({"message": "Invalid date"}), 400
+
+    session = get_request_session()
+    try:
+        tenant_id = g.current_user.tenant_id
+        if not tenant_id:
+            return jsonify({"message": "Bạn không thuộc nhà hàng nào"}), 403
+
+        plan = plan_day(session, tenant_id, day)
+        return jsonify({
+            "data": plan.to_dict(),
+            "message": "Lấy sơ đồ bàn thành công!"
+        }), 200
+    except Exception as e:
+        logger.error(f"Error planning floor: {str(e)}", exc_info=True)
+        return jsonify({"message": str(e)}), 500
+
+
+@reservation_bp.route("/restaurants/my/floor-plan", methods=["POST"])
+@require_manager
+def apply_floor_plan():
+    """Re-plan a day's bookings and save the new tables ({"date": "YYYY-MM-DD"})"""
+    data = request.get_json() or {}
+    day = parse_day(data.get('date'))
+    if not day:
+        return jsonify({"message": "Invalid date"}), 400
+
+    session = get_request_session()
+    try:
+        tenant_id = g.current_user.tenant_id
+        if not tenant_id:
+            return jsonify({"message": "Bạn không thuộc nhà hàng nào"}), 403
+
+        # Locks the tenant's tables so no booking lands mid re-plan
+        plan = plan_day(session, tenant_id, day, lock=True)
+        try:
+            moved = apply_plan(plan)
+        except ReservationConflict as e:
+            session.rollback()
+            return jsonify({"message": e.message}), e.status_code
+        for reservation in moved:
+            _publish_reservation(session, reservation)
+        session.commit()
+
+        return jsonify({
+            "data": plan.to_dict(),
+            "message": "Sắp xếp lại bàn thành công!"
+        }), 200
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error applying floor plan: {str(e)}", exc_info=True)
+        return jsonify({"message": str(e)}), 500
 
 
 @reservation_bp.route("/restaurants/my/reservations/<int:reservation_id>/approve", methods=["PUT"])
 @require_manager
 def approve_reservation(reservation_id):
     """Approve a reservation (Manager/Owner only)"""
-    session = get_session()
+    session = get_request_session()
     try:
         user = g.current_user
         tenant_id = user.tenant_id
@@ -353,7 +493,11 @@ def approve_reservation(reservation_id):
         if reservation.status == ReservationStatus.CANCELLED:
             return jsonify({"message": "Không thể duyệt đặt bàn đã bị hủy"}), 400
         
+        was_blocking = reservation.status in BLOCKING_STATUSES
         reservation.status = ReservationStatus.CONFIRMED
+        if not was_blocking or reservation.table_number is None:
+            _reschedule(session, reservation)
+        _publish_reservation(session, reservation)
         session.commit()
         session.refresh(reservation)
         
@@ -366,19 +510,20 @@ def approve_reservation(reservation_id):
             },
             "message": "Duyệt đặt bàn thành công!"
         }), 200
+    except ReservationConflict as e:
+        session.rollback()
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         session.rollback()
         logger.error(f"Error approving reservation: {str(e)}", exc_info=True)
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @reservation_bp.route("/restaurants/my/reservations/<int:reservation_id>/reject", methods=["PUT"])
 @require_manager
 def reject_reservation(reservation_id):
     """Reject a reservation (Manager/Owner only)"""
-    session = get_session()
+    session = get_request_session()
     try:
         user = g.current_user
         tenant_id = user.tenant_id
@@ -403,6 +548,7 @@ def reject_reservation(reservation_id):
         reservation.status = ReservationStatus.CANCELLED
         if rejection_reason:
             reservation.notes = (reservation.notes or '') + f"\n[Lý do từ chối: {rejection_reason}]"
+        _publish_reservation(session, reservation)
         session.commit()
         session.refresh(reservation)
         
@@ -418,15 +564,13 @@ def reject_reservation(reservation_id):
         session.rollback()
         logger.error(f"Error rejecting reservation: {str(e)}", exc_info=True)
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @reservation_bp.route("/restaurants/my/reservations/<int:reservation_id>/status", methods=["PUT"])
 @require_manager
 def update_reservation_status(reservation_id):
     """Update reservation status (Manager/Owner only) - General endpoint"""
-    session = get_session()
+    session = get_request_session()
     try:
         user = g.current_user
         tenant_id = user.tenant_id
@@ -451,10 +595,14 @@ def update_reservation_status(reservation_id):
         if not reservation:
             return jsonify({"message": "Đặt bàn không tồn tại"}), 404
         
+        was_blocking = reservation.status in BLOCKING_STATUSES
         reservation.status = new_status
         if 'notes' in data:
             reservation.notes = data['notes']
+        if new_status in BLOCKING_STATUSES and not was_blocking:
+            _reschedule(session, reservation)
         
+        _publish_reservation(session, reservation)
         session.commit()
         session.refresh(reservation)
         
@@ -468,10 +616,11 @@ def update_reservation_status(reservation_id):
             },
             "message": "Cập nhật trạng thái đặt bàn thành công!"
         }), 200
+    except ReservationConflict as e:
+        session.rollback()
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         session.rollback()
         logger.error(f"Error updating reservation status: {str(e)}", exc_info=True)
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
@@ -2,9 +2,15 @@
 Restaurant (Tenant) routes
 """
 from flask import Blueprint, request, jsonify, g
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.tenant_model import TenantModel, TenantStatus
-from app.api.decorators import require_auth, require_admin, require_owner
+from app.models.daily_revenue_model import DailyRevenueModel
+from app.api.decorators import require_auth, require_admin, require_owner, require_manager
+from app.services.tenant_service import invalidate_tenant
+from app.services.revenue_service import parse_day
+from app.services.geo_service import parse_coordinates
+from app.services.image_service import image_variants
+from sqlalchemy import func
 
 restaurant_bp = Blueprint("restaurant", __name__)
 
@@ -17,34 +23,32 @@ def get_restaurants():
     limit = request.args.get('limit', 10, type=int)
     status = request.args.get('status')
     
-    session = get_session()
-    try:
-        query = session.query(TenantModel)
-        
-        if status:
-            query = query.filter(TenantModel.status == TenantStatus(status))
-        
-        restaurants = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return jsonify({
-            "data": [{
-                "id": r.id,
-                "name": r.name,
-                "slug": r.slug,
-                "email": r.email,
-                "phone": r.phone,
-                "address": r.address,
-                "logo": r.logo,
-                "description": r.description,
-                "status": r.status.value,
-                "subscription": r.subscription.value,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-                "updated_at": r.updated_at.isoformat() if r.updated_at else None
-            } for r in restaurants],
-            "message": "Lấy danh sách nhà hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    query = session.query(TenantModel)
+    
+    if status:
+        query = query.filter(TenantModel.status == TenantStatus(status))
+    
+    restaurants = query.offset((page - 1) * limit).limit(limit).all()
+    
+    return jsonify({
+        "data": [{
+            "id": r.id,
+            "name": r.name,
+            "slug": r.slug,
+            "email": r.email,
+            "phone": r.phone,
+            "address": r.address,
+            "logo": r.logo,
+            "logo_variants": image_variants(r.logo),
+            "description": r.description,
+            "status": r.status.value,
+            "subscription": r.subscription.value,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "updated_at": r.updated_at.isoformat() if r.updated_at else None
+        } for r in restaurants],
+        "message": "Lấy danh sách nhà hàng thành công!"
+    }), 200
 
 
 @restaurant_bp.route("/me", methods=["GET"])
@@ -54,63 +58,110 @@ def get_my_restaurant():
     if not g.current_user.tenant_id:
         return jsonify({"message": "User does not belong to a restaurant"}), 404
     
-    session = get_session()
-    try:
-        restaurant = session.query(TenantModel).filter(
-            TenantModel.id == g.current_user.tenant_id
-        ).first()
-        
-        if not restaurant:
-            return jsonify({"message": "Restaurant not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "slug": restaurant.slug,
-                "email": restaurant.email,
-                "phone": restaurant.phone,
-                "address": restaurant.address,
-                "logo": restaurant.logo,
-                "description": restaurant.description,
-                "status": restaurant.status.value,
-                "subscription": restaurant.subscription.value
-            },
-            "message": "Lấy thông tin nhà hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    restaurant = session.query(TenantModel).filter(
+        TenantModel.id == g.current_user.tenant_id
+    ).first()
+    
+    if not restaurant:
+        return jsonify({"message": "Restaurant not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "slug": restaurant.slug,
+            "email": restaurant.email,
+            "phone": restaurant.phone,
+            "address": restaurant.address,
+            "latitude": restaurant.latitude,
+            "longitude": restaurant.longitude,
+            "logo": restaurant.logo,
+            "logo_variants": image_variants(restaurant.logo),
+            "description": restaurant.description,
+            "status": restaurant.status.value,
+            "subscription": restaurant.subscription.value
+        },
+        "message": "Lấy thông tin nhà hàng thành công!"
+    }), 200
+
+
+@restaurant_bp.route("/me/revenue", methods=["GET"])
+@require_manager
+def get_my_revenue():
+    """Daily revenue of current user's restaurant, read from the rollup"""
+    if not g.current_user.tenant_id:
+        return jsonify({"message": "User does not belong to a restaurant"}), 404
+    
+    date_from = request.args.get('date_from')  # YYYY-MM-DD, server timezone
+    date_to = request.args.get('date_to')
+    branch_id = request.args.get('branch_id', type=int)
+    
+    session = get_request_session()
+    query = session.query(
+        DailyRevenueModel.day,
+        func.sum(DailyRevenueModel.revenue).label("revenue"),
+        func.sum(DailyRevenueModel.order_count).label("order_count")
+    ).filter(
+        DailyRevenueModel.tenant_id == g.current_user.tenant_id
+    )
+    
+    day_from = parse_day(date_from)
+    if day_from:
+        query = query.filter(DailyRevenueModel.day >= day_from)
+    day_to = parse_day(date_to)
+    if day_to:
+        query = query.filter(DailyRevenueModel.day <= day_to)
+    if branch_id is not None:
+        query = query.filter(DailyRevenueModel.branch_id == branch_id)
+    
+    rows = query.group_by(DailyRevenueModel.day).order_by(DailyRevenueModel.day).all()
+    
+    return jsonify({
+        "data": {
+            "days": [{
+                "day": r.day.isoformat(),
+                "revenue": int(r.revenue or 0),
+                "order_count": int(r.order_count or 0)
+            } for r in rows],
+            "total_revenue": int(sum(r.revenue or 0 for r in rows)),
+            "order_count": int(sum(r.order_count or 0 for r in rows)),
+            "date_from": date_from,
+            "date_to": date_to
+        },
+        "message": "Lấy doanh thu thành công!"
+    }), 200
 
 
 @restaurant_bp.route("/<int:restaurant_id>", methods=["GET"])
 def get_restaurant(restaurant_id):
     """Get restaurant by ID"""
-    session = get_session()
-    try:
-        restaurant = session.query(TenantModel).filter(
-            TenantModel.id == restaurant_id
-        ).first()
-        
-        if not restaurant:
-            return jsonify({"message": "Restaurant not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "slug": restaurant.slug,
-                "email": restaurant.email,
-                "phone": restaurant.phone,
-                "address": restaurant.address,
-                "logo": restaurant.logo,
-                "description": restaurant.description,
-                "status": restaurant.status.value,
-                "subscription": restaurant.subscription.value
-            },
-            "message": "Lấy thông tin nhà hàng thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    restaurant = session.query(TenantModel).filter(
+        TenantModel.id == restaurant_id
+    ).first()
+    
+    if not restaurant:
+        return jsonify({"message": "Restaurant not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "slug": restaurant.slug,
+            "email": restaurant.email,
+            "phone": restaurant.phone,
+            "address": restaurant.address,
+            "latitude": restaurant.latitude,
+            "longitude": restaurant.longitude,
+            "logo": restaurant.logo,
+            "logo_variants": image_variants(restaurant.logo),
+            "description": restaurant.description,
+            "status": restaurant.status.value,
+            "subscription": restaurant.subscription.value
+        },
+        "message": "Lấy thông tin nhà hàng thành công!"
+    }), 200
 
 
 @restaurant_bp.route("/me", methods=["PUT"])
@@ -124,7 +175,7 @@ def update_my_restaurant():
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         restaurant = session.query(TenantModel).filter(
             TenantModel.id == g.current_user.tenant_id
@@ -140,6 +191,14 @@ def update_my_restaurant():
             restaurant.phone = data['phone']
         if 'address' in data:
             restaurant.address = data['address']
+        if 'latitude' in data or 'longitude' in data:
+            try:
+                restaurant.latitude, restaurant.longitude = parse_coordinates(
+                    data.get('latitude'), data.get('longitude')
+                )
+            except (TypeError, ValueError) as e:
+                session.rollback()
+                return jsonify({"message": str(e)}), 400
         if 'logo' in data:
             restaurant.logo = data['logo']
         if 'description' in data:
@@ -148,6 +207,7 @@ def update_my_restaurant():
             restaurant.status = TenantStatus(data['status'])
         
         session.commit()
+        invalidate_tenant(restaurant.id, restaurant.slug)
         session.refresh(restaurant)
         
         return jsonify({
@@ -158,7 +218,10 @@ def update_my_restaurant():
                 "email": restaurant.email,
                 "phone": restaurant.phone,
                 "address": restaurant.address,
+                "latitude": restaurant.latitude,
+                "longitude": restaurant.longitude,
                 "logo": restaurant.logo,
+                "logo_variants": image_variants(restaurant.logo),
                 "description": restaurant.description,
                 "status": restaurant.status.value
             },
@@ -167,6 +230,4 @@ def update_my_restaurant():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
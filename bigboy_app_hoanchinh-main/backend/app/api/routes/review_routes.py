@@ -2,11 +2,13 @@
 Review routes - Restaurant reviews
 """
 from flask import Blueprint, request, jsonify
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.review_model import ReviewModel
 from app.models.tenant_model import TenantModel
-from app.models.customer_model import CustomerModel
 from app.api.decorators import require_auth
+from app.api.response_cache import cached_response, restaurant_tag
+from app.services.rating_service import parse_rating, apply_rating_change
+from app.services.name_service import customer_names
 from datetime import datetime
 import logging
 
@@ -62,40 +64,37 @@ def verify_customer_token():
 
 
 @review_bp.route("/restaurants/<int:restaurant_id>/reviews", methods=["GET"])
+@cached_response(lambda restaurant_id: (restaurant_tag(restaurant_id),))
 def get_restaurant_reviews(restaurant_id):
     """Get reviews for a restaurant"""
     page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 10, type=int)
     
-    session = get_session()
-    try:
-        reviews = session.query(ReviewModel).filter(
-            ReviewModel.tenant_id == restaurant_id
-        ).order_by(ReviewModel.created_at.desc()).offset(
-            (page - 1) * limit
-        ).limit(limit).all()
-        
-        return jsonify({
-            "data": {
-                "items": [{
-                    "id": r.id,
-                    "customer_id": r.customer_id,
-                    "customer_name": session.query(CustomerModel.name).filter(
-                        CustomerModel.id == r.customer_id
-                    ).scalar() if r.customer_id else "Anonymous",
-                    "rating": r.rating,
-                    "comment": r.comment,
-                    "dish_ratings": r.dish_ratings,
-                    "created_at": r.created_at.isoformat() if r.created_at else None
-                } for r in reviews],
-                "total": session.query(ReviewModel).filter(
-                    ReviewModel.tenant_id == restaurant_id
-                ).count()
-            },
-            "message": "Lấy danh sách đánh giá thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    reviews = session.query(ReviewModel).filter(
+        ReviewModel.tenant_id == restaurant_id
+    ).order_by(ReviewModel.created_at.desc()).offset(
+        (page - 1) * limit
+    ).limit(limit).all()
+    names = customer_names.resolve(session, (r.customer_id for r in reviews))
+    
+    return jsonify({
+        "data": {
+            "items": [{
+                "id": r.id,
+                "customer_id": r.customer_id,
+                "customer_name": names.get(r.customer_id) if r.customer_id else "Anonymous",
+                "rating": r.rating,
+                "comment": r.comment,
+                "dish_ratings": r.dish_ratings,
+                "created_at": r.created_at.isoformat() if r.created_at else None
+            } for r in reviews],
+            "total": session.query(ReviewModel).filter(
+                ReviewModel.tenant_id == restaurant_id
+            ).count()
+        },
+        "message": "Lấy danh sách đánh giá thành công!"
+    }), 200
 
 
 @review_bp.route("/restaurants/<int:restaurant_id>/reviews", methods=["POST"])
@@ -109,7 +108,11 @@ def create_review(restaurant_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    rating = parse_rating(data.get('rating'))
+    if rating is None:
+        return jsonify({"message": "Rating must be an integer from 1 to 5"}), 400
+    
+    session = get_request_session()
     try:
         # Check if restaurant exists
         restaurant = session.query(TenantModel).filter(
@@ -132,11 +135,12 @@ def create_review(restaurant_id):
         review = ReviewModel(
             tenant_id=restaurant_id,
             customer_id=customer_id,
-            rating=data.get('rating'),
+            rating=rating,
             comment=data.get('comment'),
             dish_ratings=data.get('dish_ratings')
         )
         session.add(review)
+        apply_rating_change(session, restaurant_id, new_rating=rating)
         session.commit()
         session.refresh(review)
         
@@ -152,8 +156,6 @@ def create_review(restaurant_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @review_bp.route("/reviews/<int:review_id>", methods=["PUT"])
@@ -167,7 +169,13 @@ def update_review(review_id):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    rating = None
+    if 'rating' in data:
+        rating = parse_rating(data['rating'])
+        if rating is None:
+            return jsonify({"message": "Rating must be an integer from 1 to 5"}), 400
+    
+    session = get_request_session()
     try:
         review = session.query(ReviewModel).filter(
             ReviewModel.id == review_id,
@@ -178,8 +186,10 @@ def update_review(review_id):
             return jsonify({"message": "Review not found"}), 404
         
         # Update fields
-        if 'rating' in data:
-            review.rating = data['rating']
+        if rating is not None and rating != review.rating:
+            old_rating = review.rating
+            review.rating = rating
+            apply_rating_change(session, review.tenant_id, old_rating=old_rating, new_rating=rating)
         if 'comment' in data:
             review.comment = data['comment']
         if 'dish_ratings' in data:
@@ -200,8 +210,6 @@ def update_review(review_id):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @review_bp.route("/reviews/<int:review_id>", methods=["DELETE"])
@@ -211,7 +219,7 @@ def delete_review(review_id):
     if not customer_id:
         return jsonify({"message": error_msg}), 401
     
-    session = get_session()
+    session = get_request_session()
     try:
         review = session.query(ReviewModel).filter(
             ReviewModel.id == review_id,
@@ -222,12 +230,11 @@ def delete_review(review_id):
             return jsonify({"message": "Review not found"}), 404
         
         session.delete(review)
+        apply_rating_change(session, review.tenant_id, old_rating=review.rating)
         session.commit()
         
         return jsonify({"message": "Xóa đánh giá thành công!"}), 200
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
@@ -1,17 +1,97 @@
 """
 Static file routes
 """
-from flask import Blueprint, send_from_directory
-from app.config import Config
 import os
+import urllib.parse
+from datetime import datetime, timezone
+from flask import Blueprint, Response, request
+from werkzeug.http import is_resource_modified
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.wsgi import wrap_file
+from app.config import Config
+from app.services.image_service import pending_variant
+from app.services.static_service import static_index
 
 static_bp = Blueprint("static", __name__)
 
+# Longest wait for a variant still being rendered
+VARIANT_WAIT = 10
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _find(filename):
+    entry = static_index.lookup(filename)
+    if entry is not None:
+        return entry
+    # Variant requested right after the upload: wait for it
+    rendering = pending_variant(filename)
+    if rendering is None:
+        return None
+    try:
+        rendering.result(VARIANT_WAIT)
+    except Exception:
+        return None
+    return static_index.add(filename)
+
+
+def _negotiate(entry):
+    """The precompressed sibling the client accepts, else the file itself"""
+    for encoding, sibling in entry.encoded.items():
+        # Quality, not membership: "gzip;q=0" refuses gzip
+        if request.accept_encodings[encoding] > 0:
+            return encoding, sibling
+    return None, entry
+
+
 @static_bp.route("/<path:filename>")
 def serve_static(filename):
     """Serve static files from uploads folder"""
-    upload_folder = Config.UPLOAD_FOLDER
-    if os.path.exists(os.path.join(upload_folder, filename)):
-        return send_from_directory(upload_folder, filename)
-    return {"message": "File not found"}, 404
+    entry = _find(filename)
+    if entry is None:
+        return {"message": "File not found"}, 404
+    encoding, served = _negotiate(entry)
+    # Size and mtime come from the index: nothing is stat'ed per request
+    modified = datetime.fromtimestamp(served.mtime, timezone.utc)
+    full_path = os.path.join(static_index.root, served.path)
+    streamed = False
+
+    if not is_resource_modified(request.environ, served.etag, last_modified=modified):
+        response = Response(status=304)
+    elif Config.STATIC_SENDFILE == "x-accel":
+        # nginx copies the bytes (and handles Range) from its internal location
+        response = Response(mimetype=entry.mimetype)
+        response.headers["X-Accel-Redirect"] = (
+            Config.STATIC_ACCEL_PREFIX.rstrip("/") + "/" + urllib.parse.quote(served.path)
+        )
+    elif Config.STATIC_SENDFILE == "x-sendfile":
+        response = Response(mimetype=entry.mimetype)
+        response.headers["X-Sendfile"] = full_path
+    else:
+        try:
+            file = open(full_path, "rb")
+        except FileNotFoundError:
+            static_index.discard(entry.path)
+            return {"message": "File not found"}, 404
+        response = Response(
+            wrap_file(request.environ, file), mimetype=entry.mimetype, direct_passthrough=True
+        )
+        response.content_length = served.size
+        streamed = True
+    response.set_etag(served.etag)
+    response.last_modified = modified
+    if streamed:
+        # Range and If-Range
+        try:
+            response.make_conditional(request.environ, accept_ranges=True, complete_length=served.size)
+        except RequestedRangeNotSatisfiable:
+            response.close()
+            raise
 
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if entry.encoded:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if entry.immutable else f"public, max-age={Config.STATIC_MAX_AGE}"
+    )
+    return response
@@ -2,73 +2,118 @@
 Table routes
 """
 from flask import Blueprint, request, jsonify, g
-from app.infrastructure.databases import get_session
+from app.infrastructure.databases import get_request_session
 from app.models.table_model import TableModel, TableStatus
+from app.models.open_check_model import OpenCheckModel
 from app.api.decorators import require_employee
+from app.api.conditional import conditional, tenant_versions
+from app.services.realtime_service import publish_event, TABLE_STATUS
+from app.services.check_service import get_open_check
+from app.services.version_service import TABLES
 from app.utils.helpers import generate_qr_token
 
 table_bp = Blueprint("table", __name__)
 
 
+def _tables_key(*args, **kwargs):
+    return tenant_versions(g.current_user.tenant_id, TABLES)
+
+
+def _check_data(check):
+    if not check:
+        return None
+    return {
+        "subtotal": check.subtotal,
+        "item_count": check.item_count,
+        "opened_at": check.opened_at.isoformat() if check.opened_at else None,
+        "last_activity_at": check.last_activity_at.isoformat() if check.last_activity_at else None
+    }
+
+
 @table_bp.route("", methods=["GET"])
 @require_employee
+@conditional(_tables_key)
 def get_tables():
-    """Get list of tables"""
+    """Get list of tables, with each table's open check"""
     if not g.current_user.tenant_id:
         return jsonify({"message": "User must belong to a tenant"}), 403
     
-    session = get_session()
-    try:
-        tables = session.query(TableModel).filter(
-            TableModel.tenant_id == g.current_user.tenant_id
-        ).all()
-        
-        return jsonify({
-            "data": [{
-                "number": t.number,
-                "tenant_id": t.tenant_id,
-                "branch_id": t.branch_id,
-                "capacity": t.capacity,
-                "status": t.status.value,
-                "token": t.token,
-                "created_at": t.created_at.isoformat() if t.created_at else None
-            } for t in tables],
-            "message": "Lấy danh sách bàn thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    rows = session.query(TableModel, OpenCheckModel).outerjoin(
+        OpenCheckModel,
+        (OpenCheckModel.tenant_id == TableModel.tenant_id) & (OpenCheckModel.table_number == TableModel.number)
+    ).filter(
+        TableModel.tenant_id == g.current_user.tenant_id
+    ).all()
+    
+    return jsonify({
+        "data": [{
+            "number": t.number,
+            "tenant_id": t.tenant_id,
+            "branch_id": t.branch_id,
+            "capacity": t.capacity,
+            "status": t.status.value,
+            "token": t.token,
+            "created_at": t.created_at.isoformat() if t.created_at else None,
+            "open_check": _check_data(check)
+        } for t, check in rows],
+        "message": "Lấy danh sách bàn thành công!"
+    }), 200
 
 
 @table_bp.route("/<int:table_number>", methods=["GET"])
 @require_employee
+@conditional(_tables_key)
 def get_table(table_number):
     """Get table by number"""
     if not g.current_user.tenant_id:
         return jsonify({"message": "User must belong to a tenant"}), 403
     
-    session = get_session()
-    try:
-        table = session.query(TableModel).filter(
-            TableModel.number == table_number,
-            TableModel.tenant_id == g.current_user.tenant_id
-        ).first()
-        
-        if not table:
-            return jsonify({"message": "Table not found"}), 404
-        
-        return jsonify({
-            "data": {
-                "number": table.number,
-                "tenant_id": table.tenant_id,
-                "branch_id": table.branch_id,
-                "capacity": table.capacity,
-                "status": table.status.value,
-                "token": table.token
-            },
-            "message": "Lấy thông tin bàn thành công!"
-        }), 200
-    finally:
-        session.close()
+    session = get_request_session()
+    table = session.query(TableModel).filter(
+        TableModel.number == table_number,
+        TableModel.tenant_id == g.current_user.tenant_id
+    ).first()
+    
+    if not table:
+        return jsonify({"message": "Table not found"}), 404
+    
+    return jsonify({
+        "data": {
+            "number": table.number,
+            "tenant_id": table.tenant_id,
+            "branch_id": table.branch_id,
+            "capacity": table.capacity,
+            "status": table.status.value,
+            "token": table.token,
+            "open_check": _check_data(get_open_check(session, table.tenant_id, table.number))
+        },
+        "message": "Lấy thông tin bàn thành công!"
+    }), 200
+
+
+@table_bp.route("/<int:table_number>/check", methods=["GET"])
+@require_employee
+@conditional(_tables_key)
+def get_table_check(table_number):
+    """Bill preview: the table's running subtotal"""
+    if not g.current_user.tenant_id:
+        return jsonify({"message": "User must belong to a tenant"}), 403
+    
+    session = get_request_session()
+    check = get_open_check(session, g.current_user.tenant_id, table_number)
+    
+    return jsonify({
+        "data": {
+            "table_number": table_number,
+            "is_open": check is not None,
+            "subtotal": check.subtotal if check else 0,
+            "item_count": check.item_count if check else 0,
+            "opened_at": check.opened_at.isoformat() if check and check.opened_at else None,
+            "last_activity_at": check.last_activity_at.isoformat() if check and check.last_activity_at else None
+        },
+        "message": "Lấy hóa đơn tạm tính thành công!"
+    }), 200
 
 
 @table_bp.route("", methods=["POST"])
@@ -82,7 +127,7 @@ def create_table():
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         # Check if table number already exists for this tenant
         existing_table = session.query(TableModel).filter(
@@ -106,6 +151,11 @@ def create_table():
         )
         
         session.add(table)
+        publish_event(session, TABLE_STATUS, {
+            "number": table.number,
+            "capacity": table.capacity,
+            "status": table.status.value
+        }, tenant_id=table.tenant_id)
         session.commit()
         session.refresh(table)
         
@@ -123,8 +173,6 @@ def create_table():
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @table_bp.route("/<int:table_number>", methods=["PUT"])
@@ -138,7 +186,7 @@ def update_table(table_number):
     if not data:
         return jsonify({"message": "Invalid request"}), 400
     
-    session = get_session()
+    session = get_request_session()
     try:
         table = session.query(TableModel).filter(
             TableModel.number == table_number,
@@ -154,6 +202,11 @@ def update_table(table_number):
         if 'status' in data:
             table.status = TableStatus(data['status'])
         
+        publish_event(session, TABLE_STATUS, {
+            "number": table.number,
+            "capacity": table.capacity,
+            "status": table.status.value
+        }, tenant_id=table.tenant_id)
         session.commit()
         session.refresh(table)
         
@@ -168,8 +221,6 @@ def update_table(table_number):
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
 
 @table_bp.route("/<int:table_number>", methods=["DELETE"])
@@ -179,7 +230,7 @@ def delete_table(table_number):
     if not g.current_user.tenant_id:
         return jsonify({"message": "User must belong to a tenant"}), 403
     
-    session = get_session()
+    session = get_request_session()
     try:
         table = session.query(TableModel).filter(
             TableModel.number == table_number,
@@ -190,12 +241,15 @@ def delete_table(table_number):
             return jsonify({"message": "Table not found"}), 404
         
         session.delete(table)
+        publish_event(session, TABLE_STATUS, {
+            "number": table.number,
+            "status": None,
+            "deleted": True
+        }, tenant_id=table.tenant_id)
         session.commit()
         
         return jsonify({"message": "Xóa bàn thành công!"}), 200
     except Exception as e:
         session.rollback()
         return jsonify({"message": str(e)}), 500
-    finally:
-        session.close()
 
@@ -0,0 +1,44 @@
+"""
+Upload routes - Dish photos and restaurant logos
+"""
+from flask import Blueprint, request, jsonify
+from app.api.decorators import require_employee
+from app.services.image_service import ImageError, store_image, render_variants, image_url, image_variants
+import logging
+
+logger = logging.getLogger(__name__)
+
+upload_bp = Blueprint("upload", __name__)
+
+
+@upload_bp.route("/images", methods=["POST"])
+@require_employee
+def upload_image():
+    """
+    Upload an image as the raw request body (Content-Type: image/*), or as
+    the "file" field of a multipart form. Use the returned url as a dish
+    image or restaurant logo; its resized variants are rendered shortly after.
+    """
+    if request.mimetype.startswith("multipart/"):
+        upload = request.files.get("file")
+        if upload is None:
+            return jsonify({"message": "Missing file"}), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+
+    try:
+        stored = store_image(stream)
+    except ImageError as e:
+        return jsonify({"message": e.message}), e.status_code
+    render_variants(stored)
+
+    url = image_url(stored, request.host_url)
+    return jsonify({
+        "data": {
+            "url": url,
+            "hash": stored.digest,
+            "variants": image_variants(url)
+        },
+        "message": "Tải ảnh lên thành công!"
+    }), 201 if stored.created else 200
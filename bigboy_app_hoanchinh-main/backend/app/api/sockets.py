@@ -0,0 +1,99 @@
+"""
+Socket.IO gateway - Tenant-scoped real-time events
+"""
+import logging
+from flask import request
+from flask_socketio import SocketIO, join_room
+from app.config import Config
+from app.infrastructure.databases import session_scope
+from app.models.socket_model import SocketModel
+from app.services.principal_service import get_principal
+from app.utils.jwt import verify_access_token
+
+logger = logging.getLogger(__name__)
+
+socketio = SocketIO()
+
+
+def tenant_room(tenant_id: int) -> str:
+    """Room joined by every staff socket of a tenant"""
+    return f"tenant:{tenant_id}"
+
+
+def customer_room(customer_id: int) -> str:
+    """Room joined by every socket of a mobile customer"""
+    return f"customer:{customer_id}"
+
+
+def _extract_token(auth):
+    """Token from the Socket.IO auth payload, ?token= or the Authorization header"""
+    token = None
+    if isinstance(auth, dict):
+        token = auth.get('token')
+    token = token or request.args.get('token') or request.headers.get('Authorization')
+    if token and token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    return token
+
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """Authenticate with an access token and join the caller's rooms"""
+    token = _extract_token(auth)
+    payload = verify_access_token(token) if token else None
+    if not payload:
+        logger.warning("❌ Socket connection rejected: invalid token")
+        return False
+
+    # Mobile customers only receive their own reservation updates
+    if payload.get('role') == 'Customer':
+        if not payload.get('customer_id'):
+            return False
+        join_room(customer_room(payload['customer_id']))
+        return True
+
+    try:
+        principal = get_principal(int(payload.get('sub')), payload.get('iat'))
+    except (TypeError, ValueError):
+        principal = None
+    if not principal:
+        return False
+
+    if principal.tenant_id:
+        join_room(tenant_room(principal.tenant_id))
+
+    with session_scope() as session:
+        try:
+            # One live socket per account
+            session.query(SocketModel).filter(SocketModel.account_id == principal.id).delete()
+            session.add(SocketModel(
+                socket_id=request.sid,
+                account_id=principal.id,
+                tenant_id=principal.tenant_id
+            ))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving socket {request.sid}: {e}", exc_info=True)
+    return True
+
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    with session_scope() as session:
+        try:
+            session.query(SocketModel).filter(SocketModel.socket_id == request.sid).delete()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error removing socket {request.sid}: {e}", exc_info=True)
+
+
+def init_socketio(app):
+    """Attach the Socket.IO server to the app"""
+    socketio.init_app(
+        app,
+        async_mode=Config.SOCKETIO_ASYNC_MODE,
+        cors_allowed_origins="*"
+    )
+    return socketio
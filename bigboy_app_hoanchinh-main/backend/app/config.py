@@ -23,6 +23,8 @@ class Config:
     REFRESH_TOKEN_EXPIRES_IN = int(os.environ.get('REFRESH_TOKEN_EXPIRES_IN', 604800))  # 7 days
     GUEST_ACCESS_TOKEN_EXPIRES_IN = int(os.environ.get('GUEST_ACCESS_TOKEN_EXPIRES_IN', 7200))  # 2 hours
     GUEST_REFRESH_TOKEN_EXPIRES_IN = int(os.environ.get('GUEST_REFRESH_TOKEN_EXPIRES_IN', 604800))  # 7 days
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))  # 1 minute
+    PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 4096))
     
     # Initial Owner Account
     INITIAL_EMAIL_OWNER = os.environ.get('INITIAL_EMAIL_OWNER', 'admin@bigboy.com')
@@ -35,11 +37,23 @@ class Config:
     PRODUCTION = os.environ.get('PRODUCTION', 'false').lower() == 'true'
     PRODUCTION_URL = os.environ.get('PRODUCTION_URL', '')
     DOCKER = os.environ.get('DOCKER', 'false').lower() == 'true'
+    # threading | eventlet (eventlet monkey-patches the process at startup)
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')
     
     # Upload
     _base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     _upload_folder = os.environ.get('UPLOAD_FOLDER', 'uploads')
     UPLOAD_FOLDER = os.path.join(_base_dir, _upload_folder) if not os.path.isabs(_upload_folder) else _upload_folder
+    # Uploaded images get these resized variants (longest side in px), as WebP and JPEG
+    IMAGE_VARIANT_SIZES = os.environ.get('IMAGE_VARIANT_SIZES', 'thumbnail:160,medium:480,large:1080')
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))  # Threads rendering variants
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 80))
+    IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 40_000_000))  # Larger images are rejected
+    # Serving uploads: off (Python streams the file) | x-sendfile (Apache, lighttpd) | x-accel (nginx)
+    STATIC_SENDFILE = os.environ.get('STATIC_SENDFILE', 'off').lower()
+    STATIC_ACCEL_PREFIX = os.environ.get('STATIC_ACCEL_PREFIX', '/protected-uploads/')  # nginx internal location
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 300))  # Files without a content hash in their name
+    STATIC_INDEX_TTL = int(os.environ.get('STATIC_INDEX_TTL', 300))  # Full rescan of UPLOAD_FOLDER
     
     # Client
     CLIENT_URL = os.environ.get('CLIENT_URL', 'http://localhost:3000')
@@ -53,6 +67,11 @@ class Config:
     # Multi-tenant
     TENANT_HEADER = os.environ.get('TENANT_HEADER', 'X-Tenant-ID')
     DEFAULT_TENANT_ID = os.environ.get('DEFAULT_TENANT_ID', 'default')
+    TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', 300))  # 5 minutes
+    TENANT_CACHE_SIZE = int(os.environ.get('TENANT_CACHE_SIZE', 1024))
+    TENANT_CACHE_NEGATIVE_TTL = int(os.environ.get('TENANT_CACHE_NEGATIVE_TTL', 30))
+    NAME_CACHE_TTL = int(os.environ.get('NAME_CACHE_TTL', 60))  # id -> display name, 1 minute
+    NAME_CACHE_SIZE = int(os.environ.get('NAME_CACHE_SIZE', 4096))
     
     # Redis
     REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
@@ -60,6 +79,48 @@ class Config:
     REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', '')
     REDIS_DB = int(os.environ.get('REDIS_DB', 0))
     
+    # Event bus: memory (single process) | redis (multiple workers/nodes)
+    EVENT_BUS_BACKEND = os.environ.get('EVENT_BUS_BACKEND', 'memory').lower()
+    EVENT_BUS_CHANNEL_PREFIX = os.environ.get('EVENT_BUS_CHANNEL_PREFIX', 'bigboy:events:')
+    
+    # Reservations (times in SERVER_TIMEZONE)
+    RESERVATION_DURATION = int(os.environ.get('RESERVATION_DURATION', 120))  # minutes a booking holds its table
+    RESERVATION_OPEN_TIME = os.environ.get('RESERVATION_OPEN_TIME', '10:00')
+    RESERVATION_CLOSE_TIME = os.environ.get('RESERVATION_CLOSE_TIME', '22:00')  # Latest end of a booking
+    RESERVATION_SLOT_MINUTES = int(os.environ.get('RESERVATION_SLOT_MINUTES', 30))
+    AVAILABILITY_INDEX_TTL = int(os.environ.get('AVAILABILITY_INDEX_TTL', 300))  # Safety net; writes invalidate
+    
+    # Restaurant/dish search index: writes re-index their rows; full rebuild after this many seconds
+    SEARCH_INDEX_TTL = int(os.environ.get('SEARCH_INDEX_TTL', 600))
+    
+    # Cache-Control max-age (seconds) of public, ETag-validated responses
+    PUBLIC_CACHE_MAX_AGE = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', 15))
+    
+    # Response cache of public GET endpoints: memory (per process) | redis (shared by workers) | off
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory').lower()
+    RESPONSE_CACHE_PREFIX = os.environ.get('RESPONSE_CACHE_PREFIX', 'bigboy:responses:')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 30))  # Served as is
+    RESPONSE_CACHE_STALE_TTL = int(os.environ.get('RESPONSE_CACHE_STALE_TTL', 300))  # Then served while refreshed
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 2048))
+    RESPONSE_CACHE_LOCK_TIMEOUT = float(os.environ.get('RESPONSE_CACHE_LOCK_TIMEOUT', 5))  # Wait for a concurrent render
+    RESPONSE_CACHE_REFRESH_WORKERS = int(os.environ.get('RESPONSE_CACHE_REFRESH_WORKERS', 2))
+    
+    # Nearby restaurants (km)
+    NEARBY_DEFAULT_RADIUS_KM = float(os.environ.get('NEARBY_DEFAULT_RADIUS_KM', 5))
+    NEARBY_MAX_RADIUS_KM = float(os.environ.get('NEARBY_MAX_RADIUS_KM', 50))
+    
+    # Background jobs: embedded (in web workers, one elected leader) | standalone (run_scheduler.py) | off
+    SCHEDULER_MODE = os.environ.get('SCHEDULER_MODE', 'embedded').lower()
+    SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', 1000))  # Rows per transaction
+    SCHEDULER_MAX_BATCHES = int(os.environ.get('SCHEDULER_MAX_BATCHES', 50))  # Per job run
+    SCHEDULER_LEADER_KEY = os.environ.get('SCHEDULER_LEADER_KEY', 'bigboy:scheduler:leader')
+    SCHEDULER_LEADER_TTL = int(os.environ.get('SCHEDULER_LEADER_TTL', 60))  # seconds
+    SOCKET_MAX_AGE = int(os.environ.get('SOCKET_MAX_AGE', 86400))  # 1 day
+    OUTBOX_POLL_INTERVAL = int(os.environ.get('OUTBOX_POLL_INTERVAL', 5))  # seconds
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 10))
+    OUTBOX_RETENTION = int(os.environ.get('OUTBOX_RETENTION', 604800))  # Keep processed events 7 days
+    MENU_TOMBSTONE_RETENTION = int(os.environ.get('MENU_TOMBSTONE_RETENTION', 2592000))  # Deleted-dish records, 30 days
+    
     # Other
     SERVER_TIMEZONE = os.environ.get('SERVER_TIMEZONE', 'Asia/Ho_Chi_Minh')
     PAUSE_SOME_ENDPOINTS = os.environ.get('PAUSE_SOME_ENDPOINTS', 'false').lower() == 'true'
@@ -8,7 +8,10 @@ from datetime import datetime
 from app.config import Config
 from app.api.routes import register_routes
 from app.api.middleware import setup_middleware
+from app.api.sockets import init_socketio
 from app.infrastructure.databases import init_db
+from app.infrastructure.events import init_event_bus
+from app.infrastructure.scheduler import init_scheduler
 from app.error_handler import setup_error_handler
 from app.utils.helpers import create_folder
 from app.utils.init_data import (
@@ -16,6 +19,10 @@ from app.utils.init_data import (
     init_demo_restaurants,
     init_demo_dishes,
     init_riverside_dishes,
+    init_rating_summaries,
+    init_revenue_rollup,
+    init_open_checks,
+    init_reservation_windows,
 )
 
 def create_app():
@@ -82,6 +89,9 @@ def create_app():
     # Create upload folder
     upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
     create_folder(upload_folder)
+    # Index uploads now rather than on the first static request
+    from app.services.static_service import static_index
+    static_index.rebuild()
     
     # Health check endpoints
     @app.route('/', methods=['GET'])
@@ -111,12 +121,23 @@ def create_app():
     # Register routes
     register_routes(app)
     
+    # Event bus (cross-worker fan-out) and real-time gateway (Socket.IO)
+    init_event_bus(app)
+    init_socketio(app)
+    
     # Initialize admin account and demo data
     with app.app_context():
         init_admin_account()
         init_demo_restaurants()
         init_demo_dishes()
         init_riverside_dishes()
+        init_rating_summaries()
+        init_revenue_rollup()
+        init_open_checks()
+        init_reservation_windows()
+    
+    # Maintenance jobs (unless they run in a separate scheduler process)
+    init_scheduler(app)
 
     return app
 
@@ -1,11 +1,16 @@
 """
 Database initialization and session management
 """
+from contextlib import contextmanager
+import logging
+from flask import g, has_request_context
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from app.infrastructure.databases.base import Base
 from app.config import Config
 
+logger = logging.getLogger(__name__)
+
 engine = None
 SessionLocal = None
 
@@ -48,11 +53,43 @@ def init_db(app):
         refresh_token_model,
         socket_model,
         customer_model,
-        customer_history_model
+        customer_history_model,
+        restaurant_rating_model,
+        daily_revenue_model,
+        open_check_model,
+        outbox_model,
+        version_counter_model
     )
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+
+    # Add columns/indexes introduced after the tables were first created
+    from app.infrastructure.databases.schema import upgrade_schema
+    upgrade_schema(engine)
+
+    # One unit of work per request: commit/rollback/close on teardown
+    @app.after_request
+    def mark_failed_request(response):
+        if response.status_code >= 400:
+            g.db_request_failed = True
+        return response
+    
+    @app.teardown_request
+    def close_request_session(exc):
+        session = g.pop('db_session', None)
+        if session is None:
+            return
+        try:
+            if exc is None and not g.pop('db_request_failed', False):
+                session.commit()
+            else:
+                session.rollback()
+        except Exception as e:
+            logger.error(f"Error finishing request session: {e}", exc_info=True)
+            session.rollback()
+        finally:
+            session.close()
     
     return SessionLocal
 
@@ -60,3 +97,23 @@ def get_session():
     """Get database session"""
     return SessionLocal()
 
+def get_request_session():
+    """Get the session shared by middleware, decorators and the view of the current request"""
+    if not has_request_context():
+        return get_session()
+    if 'db_session' not in g:
+        g.db_session = SessionLocal.session_factory()
+    return g.db_session
+
+@contextmanager
+def session_scope():
+    """Yield the request session, or a private session closed on exit outside requests"""
+    if has_request_context():
+        yield get_request_session()
+        return
+    session = get_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
@@ -0,0 +1,57 @@
+"""
+In-place schema upgrades for existing databases
+
+create_all() only creates missing tables; this module adds the columns,
+indexes and constraint changes introduced after a table was first created.
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from app.infrastructure.databases.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _add_missing_columns(connection, table, existing_columns):
+    for column in table.columns:
+        if column.name in existing_columns:
+            continue
+        # Enum columns on PostgreSQL need their type before the column
+        if hasattr(column.type, "create"):
+            column.type.create(connection, checkfirst=True)
+        ddl = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        logger.info(f"Added column {table.name}.{column.name}")
+
+
+def _add_missing_indexes(connection, table, existing_indexes):
+    for index in table.indexes:
+        if index.name in existing_indexes:
+            continue
+        index.create(connection, checkfirst=True)
+        logger.info(f"Created index {index.name}")
+
+
+def _drop_order_snapshot_unique(connection, inspector):
+    """Orders may now share a deduplicated dish snapshot"""
+    for constraint in inspector.get_unique_constraints("orders"):
+        if constraint["column_names"] == ["dish_snapshot_id"]:
+            connection.execute(text(f'ALTER TABLE orders DROP CONSTRAINT "{constraint["name"]}"'))
+            logger.info(f"Dropped constraint {constraint['name']}")
+
+
+def upgrade_schema(engine):
+    """Bring existing tables in line with the current models"""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        table_names = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in table_names:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            _add_missing_columns(connection, table, existing_columns)
+            _add_missing_indexes(connection, table, existing_indexes)
+
+        if connection.dialect.name == "postgresql" and "orders" in table_names:
+            _drop_order_snapshot_unique(connection, inspector)
@@ -0,0 +1,58 @@
+"""
+Internal event bus
+
+EVENT_BUS_BACKEND selects the backend:
+- memory: handlers run in this process only (single worker, tests)
+- redis: events fan out to every worker/node through Redis pub/sub
+"""
+import logging
+import threading
+from app.config import Config
+from app.infrastructure.events.memory import InMemoryEventBus
+
+logger = logging.getLogger(__name__)
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def _create_bus():
+    backend = Config.EVENT_BUS_BACKEND
+    if backend == 'redis':
+        from app.infrastructure.events.redis_backend import RedisEventBus
+        return RedisEventBus(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            db=Config.REDIS_DB,
+            password=Config.REDIS_PASSWORD,
+            prefix=Config.EVENT_BUS_CHANNEL_PREFIX
+        )
+    if backend != 'memory':
+        logger.warning(f"Unknown EVENT_BUS_BACKEND '{backend}', using memory")
+    return InMemoryEventBus()
+
+
+def get_event_bus():
+    """Process-wide event bus, created on first use"""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = _create_bus()
+    return _bus
+
+
+def init_event_bus(app):
+    """Start delivering events published by other processes"""
+    bus = get_event_bus()
+    bus.start()
+    app.logger.info(f"Event bus: {type(bus).__name__}")
+    return bus
+
+
+def publish(channel: str, message) -> None:
+    get_event_bus().publish(channel, message)
+
+
+def subscribe(channel: str, handler) -> None:
+    get_event_bus().subscribe(channel, handler)
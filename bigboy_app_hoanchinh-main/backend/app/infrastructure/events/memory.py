@@ -0,0 +1,42 @@
+"""
+In-process event bus
+"""
+import logging
+import threading
+import uuid
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryEventBus:
+    """Delivers events synchronously to handlers registered in this process"""
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self._handlers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, handler) -> None:
+        """Call handler(message) for every event published on channel"""
+        with self._lock:
+            if handler not in self._handlers[channel]:
+                self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, message) -> None:
+        self._dispatch(channel, message)
+
+    def _dispatch(self, channel: str, message) -> None:
+        with self._lock:
+            handlers = list(self._handlers.get(channel, ()))
+        for handler in handlers:
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Error handling event on {channel}: {e}", exc_info=True)
+
+    def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,86 @@
+"""
+Redis pub/sub event bus for multi-process deployments
+"""
+import json
+import logging
+import threading
+import time
+import redis
+from app.infrastructure.events.memory import InMemoryEventBus
+
+logger = logging.getLogger(__name__)
+
+
+class RedisEventBus(InMemoryEventBus):
+    """
+    Publishes to Redis and dispatches to local handlers. The publishing
+    process handles its own events synchronously and skips the copy that
+    comes back from Redis; other processes receive it on a listener thread.
+    """
+
+    def __init__(self, host, port, db=0, password=None, prefix="bigboy:events:"):
+        super().__init__()
+        self.prefix = prefix
+        self._client = redis.Redis(
+            host=host,
+            port=port,
+            db=db,
+            password=password or None,
+            socket_keepalive=True,
+            health_check_interval=30
+        )
+        self._listener = None
+        self._stopping = threading.Event()
+
+    def publish(self, channel: str, message) -> None:
+        self._dispatch(channel, message)
+        envelope = json.dumps({"origin": self.node_id, "data": message}, default=str)
+        try:
+            self._client.publish(self.prefix + channel, envelope)
+        except redis.RedisError as e:
+            logger.error(f"Error publishing event on {channel}: {e}")
+
+    def start(self) -> None:
+        """Start the listener thread (idempotent)"""
+        if self._listener and self._listener.is_alive():
+            return
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="event-bus-listener", daemon=True)
+        self._listener.start()
+
+    def close(self) -> None:
+        self._stopping.set()
+
+    def _listen(self) -> None:
+        backoff = 1
+        while not self._stopping.is_set():
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.prefix + "*")
+                backoff = 1
+                while not self._stopping.is_set():
+                    item = pubsub.get_message(timeout=1.0)
+                    if item:
+                        self._handle(item)
+            except redis.RedisError as e:
+                logger.warning(f"Event bus connection lost, retrying in {backoff}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                try:
+                    pubsub.close()
+                except redis.RedisError:
+                    pass
+
+    def _handle(self, item) -> None:
+        channel = item["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        try:
+            envelope = json.loads(item["data"])
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed event on {channel}")
+            return
+        if envelope.get("origin") == self.node_id:
+            return
+        self._dispatch(channel[len(self.prefix):], envelope.get("data"))
@@ -0,0 +1,137 @@
+"""
+Background job scheduler (APScheduler)
+
+SCHEDULER_MODE selects where the maintenance jobs run:
+- embedded: in every web process; leader election lets exactly one of them run jobs
+- standalone: only in run_scheduler.py, web processes never start a scheduler
+- off: nowhere
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Callable, Dict, Any
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
+from app.config import Config
+from app.infrastructure.scheduler.leader import create_leader_election
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    """A maintenance job: func(session, limit) -> rows touched"""
+    name: str
+    func: Callable
+    trigger: str  # APScheduler trigger: interval | cron
+    trigger_args: Dict[str, Any]
+    batched: bool = True  # Call again while a call fills a whole batch
+
+
+_metrics: Dict[str, dict] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(name: str, **values) -> None:
+    with _metrics_lock:
+        stats = _metrics.setdefault(name, {
+            "runs": 0, "failures": 0, "skipped": 0, "rows": 0,
+            "last_rows": None, "last_batches": None, "last_duration_ms": None,
+            "last_run_at": None, "last_error": None
+        })
+        for key in ("runs", "failures", "skipped", "rows"):
+            stats[key] += values.pop(key, 0)
+        stats.update(values)
+
+
+def job_metrics() -> Dict[str, dict]:
+    """Per-job counters and last-run details of this process"""
+    with _metrics_lock:
+        return {name: dict(stats) for name, stats in _metrics.items()}
+
+
+def _run_batches(job: Job):
+    from app.infrastructure.databases import get_session
+
+    rows = batches = 0
+    while batches < Config.SCHEDULER_MAX_BATCHES:
+        session = get_session()
+        try:
+            count = job.func(session, Config.SCHEDULER_BATCH_SIZE) or 0
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        rows += count
+        batches += 1
+        if not job.batched or count < Config.SCHEDULER_BATCH_SIZE:
+            break
+    return rows, batches
+
+
+def _execute(job: Job, leader) -> None:
+    if not leader.is_leader():
+        _record(job.name, skipped=1)
+        return
+    started = time.monotonic()
+    run_at = datetime.now(timezone.utc).isoformat()
+    try:
+        rows, batches = _run_batches(job)
+    except Exception as e:
+        logger.error(f"Job {job.name} failed: {e}", exc_info=True)
+        _record(job.name, runs=1, failures=1, last_run_at=run_at, last_error=str(e),
+                last_duration_ms=int((time.monotonic() - started) * 1000))
+        return
+    duration_ms = int((time.monotonic() - started) * 1000)
+    _record(job.name, runs=1, rows=rows, last_rows=rows, last_batches=batches,
+            last_run_at=run_at, last_duration_ms=duration_ms, last_error=None)
+    if rows:
+        logger.info(f"Job {job.name}: {rows} rows in {batches} batches, {duration_ms} ms")
+
+
+def create_scheduler(blocking: bool = False):
+    """Scheduler with every maintenance job registered (not started)"""
+    from app.infrastructure import databases
+    from app.services.maintenance_service import MAINTENANCE_JOBS
+
+    leader = create_leader_election(databases.engine)
+    scheduler_class = BlockingScheduler if blocking else BackgroundScheduler
+    scheduler = scheduler_class(
+        timezone=Config.SERVER_TIMEZONE,
+        executors={"default": ThreadPoolExecutor(max_workers=2)},
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 300}
+    )
+    for job in MAINTENANCE_JOBS:
+        scheduler.add_job(_execute, job.trigger, args=(job, leader), id=job.name, name=job.name, **job.trigger_args)
+    # Keep (or take over) leadership between job runs
+    scheduler.add_job(
+        leader.is_leader, "interval",
+        seconds=max(Config.SCHEDULER_LEADER_TTL // 3, 1),
+        id="leader-heartbeat", name="leader-heartbeat"
+    )
+    return scheduler, leader
+
+
+def init_scheduler(app):
+    """Start the embedded scheduler when SCHEDULER_MODE is 'embedded'"""
+    if Config.SCHEDULER_MODE != 'embedded':
+        return None
+    # With the reloader on, only the child process that serves requests runs jobs
+    if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return None
+
+    scheduler, leader = create_scheduler()
+    scheduler.start()
+
+    def shutdown():
+        scheduler.shutdown(wait=False)
+        leader.release()
+
+    atexit.register(shutdown)
+    app.logger.info(f"Scheduler started ({type(leader).__name__})")
+    return scheduler
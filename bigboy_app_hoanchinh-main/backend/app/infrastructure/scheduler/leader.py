@@ -0,0 +1,143 @@
+"""
+Leader election, so a single process runs the scheduled jobs
+
+- redis: a key holding the leader's id with a TTL, renewed by the leader
+- postgresql: a session-level advisory lock held on a dedicated connection
+- local: single process (e.g. SQLite development), always the leader
+"""
+import logging
+import threading
+import uuid
+import redis
+from sqlalchemy import text
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+ADVISORY_LOCK_KEY = 0x6269676A6F6273  # "bigjobs"
+
+
+class LocalLeaderElection:
+    """No other candidates: this process always leads"""
+
+    def is_leader(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+
+class RedisLeaderElection:
+    """Leadership is a Redis key set with NX and a TTL the leader keeps renewing"""
+
+    _RENEW = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    _RELEASE = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client, key: str, ttl: int):
+        self.node_id = uuid.uuid4().hex
+        self.key = key
+        self.ttl_ms = ttl * 1000
+        self._client = client
+        self._renew = client.register_script(self._RENEW)
+        self._release = client.register_script(self._RELEASE)
+
+    def is_leader(self) -> bool:
+        """Acquire leadership if it is free, or renew it if this node holds it"""
+        try:
+            if self._client.set(self.key, self.node_id, nx=True, px=self.ttl_ms):
+                logger.info(f"Scheduler leadership acquired ({self.node_id})")
+                return True
+            return bool(self._renew(keys=[self.key], args=[self.node_id, self.ttl_ms]))
+        except redis.RedisError as e:
+            logger.error(f"Leader election failed: {e}")
+            return False
+
+    def release(self) -> None:
+        try:
+            self._release(keys=[self.key], args=[self.node_id])
+        except redis.RedisError:
+            pass
+
+
+class PostgresLeaderElection:
+    """Leadership is an advisory lock, released by PostgreSQL if the holder dies"""
+
+    def __init__(self, engine, key: int = ADVISORY_LOCK_KEY):
+        self.key = key
+        self._engine = engine
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def is_leader(self) -> bool:
+        """Try to take the lock, or check that the connection holding it is alive"""
+        with self._lock:
+            return self._check()
+
+    def _check(self) -> bool:
+        try:
+            if self._connection is None:
+                connection = self._engine.connect()
+                acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+                ).scalar()
+                connection.commit()
+                if not acquired:
+                    connection.close()
+                    return False
+                self._connection = connection
+                logger.info("Scheduler leadership acquired (advisory lock)")
+            else:
+                self._connection.execute(text("SELECT 1"))
+                self._connection.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Leader election failed: {e}")
+            self._drop_connection()
+            return False
+
+    def _drop_connection(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.invalidate()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def release(self) -> None:
+        with self._lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                self._connection.commit()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+def create_leader_election(engine):
+    """Pick the election backend that matches the deployment"""
+    if Config.EVENT_BUS_BACKEND == 'redis':
+        client = redis.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            db=Config.REDIS_DB,
+            password=Config.REDIS_PASSWORD or None
+        )
+        return RedisLeaderElection(client, Config.SCHEDULER_LEADER_KEY, Config.SCHEDULER_LEADER_TTL)
+    if engine.dialect.name == "postgresql":
+        return PostgresLeaderElection(engine)
+    return LocalLeaderElection()
@@ -10,7 +10,13 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+# eventlet must patch the standard library before anything else is imported
+if os.environ.get('SOCKETIO_ASYNC_MODE') == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
 from app.create_app import create_app
+from app.api.sockets import socketio
 
 app = create_app()
 
@@ -47,7 +53,7 @@ if __name__ == "__main__":
     print("=" * 60)
     
     try:
-        app.run(host="0.0.0.0", port=port, debug=debug)
+        socketio.run(app, host="0.0.0.0", port=port, debug=debug, allow_unsafe_werkzeug=True)
     except Exception as e:
         print(f"❌ Error starting server: {e}")
         import traceback
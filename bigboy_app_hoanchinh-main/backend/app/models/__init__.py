@@ -4,7 +4,7 @@ Database Models
 from app.models.tenant_model import TenantModel
 from app.models.branch_model import BranchModel
 from app.models.account_model import AccountModel
-from app.models.dish_model import DishModel, DishSnapshotModel
+from app.models.dish_model import DishModel, DishSnapshotModel, DishTombstoneModel
 from app.models.table_model import TableModel
 from app.models.order_model import OrderModel
 from app.models.guest_model import GuestModel
@@ -15,6 +15,11 @@ from app.models.refresh_token_model import RefreshTokenModel
 from app.models.socket_model import SocketModel
 from app.models.customer_model import CustomerModel
 from app.models.customer_history_model import CustomerHistoryModel
+from app.models.restaurant_rating_model import RestaurantRatingModel
+from app.models.daily_revenue_model import DailyRevenueModel
+from app.models.open_check_model import OpenCheckModel
+from app.models.outbox_model import OutboxModel
+from app.models.version_counter_model import VersionCounterModel
 
 __all__ = [
     "TenantModel",
@@ -22,6 +27,7 @@ __all__ = [
     "AccountModel",
     "DishModel",
     "DishSnapshotModel",
+    "DishTombstoneModel",
     "TableModel",
     "OrderModel",
     "GuestModel",
@@ -32,5 +38,10 @@ __all__ = [
     "SocketModel",
     "CustomerModel",
     "CustomerHistoryModel",
+    "RestaurantRatingModel",
+    "DailyRevenueModel",
+    "OpenCheckModel",
+    "OutboxModel",
+    "VersionCounterModel",
 ]
 
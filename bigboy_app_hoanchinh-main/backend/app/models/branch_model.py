@@ -1,7 +1,7 @@
 """
 Branch Model - Multi-branch support
 """
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,12 +21,19 @@ class BranchModel(Base):
     tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String, nullable=False)
     address = Column(String, nullable=False)
+    latitude = Column(Float, nullable=True)  # WGS84 degrees
+    longitude = Column(Float, nullable=True)
     phone = Column(String, nullable=True)
     status = Column(Enum(BranchStatus), default=BranchStatus.ACTIVE, nullable=False)
     settings = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Bounding-box lookups for nearby search
+    __table_args__ = (
+        Index('ix_branches_lat_lng', 'latitude', 'longitude'),
+    )
+
     # Relationships
     tenant = relationship("TenantModel", back_populates="branches")
     tables = relationship("TableModel", back_populates="branch", cascade="all, delete-orphan")
@@ -0,0 +1,22 @@
+"""
+Daily Revenue Model - Revenue rollup per restaurant, day and branch
+"""
+from sqlalchemy import Column, Integer, BigInteger, Date, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.infrastructure.databases.base import Base
+
+
+class DailyRevenueModel(Base):
+    __tablename__ = "daily_revenue"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)  # Local date in Config.SERVER_TIMEZONE
+    branch_id = Column(Integer, primary_key=True, default=0)  # 0 = orders without a branch
+    revenue = Column(BigInteger, nullable=False, default=0)  # Sum of price * quantity of PAID orders
+    order_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    tenant = relationship("TenantModel")
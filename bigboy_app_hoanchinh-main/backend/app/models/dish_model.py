@@ -1,7 +1,7 @@
 """
 Dish Model - Menu items
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -26,9 +26,15 @@ class DishModel(Base):
     image = Column(String, nullable=False)
     category = Column(String, nullable=True, index=True)
     status = Column(Enum(DishStatus), default=DishStatus.AVAILABLE, nullable=False)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")  # Menu version of the last change
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Delta sync: a tenant's dishes changed after a menu version
+    __table_args__ = (
+        Index('ix_dishes_tenant_version', 'tenant_id', 'version'),
+    )
+
     # Relationships
     tenant = relationship("TenantModel", back_populates="dishes")
     dish_snapshots = relationship("DishSnapshotModel", back_populates="dish", cascade="all, delete-orphan")
@@ -46,10 +52,26 @@ class DishSnapshotModel(Base):
     image = Column(String, nullable=False)
     category = Column(String, nullable=True)
     status = Column(String, nullable=False)
+    content_hash = Column(String(64), unique=True, nullable=True, index=True)  # SHA-256 of snapshotted fields
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     dish = relationship("DishModel", back_populates="dish_snapshots")
-    order = relationship("OrderModel", back_populates="dish_snapshot", uselist=False)
+    orders = relationship("OrderModel", back_populates="dish_snapshot")
+
+
+
+class DishTombstoneModel(Base):
+    """A deleted dish, kept so delta-syncing clients learn of the delete"""
+    __tablename__ = "dish_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    dish_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False)  # Menu version of the delete
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
+    __table_args__ = (
+        Index('ix_dish_tombstones_tenant_version', 'tenant_id', 'version'),
+    )
@@ -0,0 +1,22 @@
+"""
+Open Check Model - Running bill of a table until it is paid
+"""
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.infrastructure.databases.base import Base
+
+
+class OpenCheckModel(Base):
+    __tablename__ = "open_checks"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    table_number = Column(Integer, primary_key=True)
+    subtotal = Column(BigInteger, nullable=False, default=0)  # Sum of price * quantity of unpaid, uncancelled orders
+    item_count = Column(Integer, nullable=False, default=0)  # Sum of their quantities
+    opened_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    # Relationships
+    tenant = relationship("TenantModel")
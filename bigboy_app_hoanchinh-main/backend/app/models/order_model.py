@@ -1,7 +1,7 @@
 """
 Order Model
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -26,19 +26,38 @@ class OrderModel(Base):
     branch_id = Column(Integer, ForeignKey("branches.id", ondelete="SET NULL"), nullable=True, index=True)
     guest_id = Column(Integer, ForeignKey("guests.id", ondelete="SET NULL"), nullable=True, index=True)
     table_number = Column(Integer, ForeignKey("tables.number", ondelete="SET NULL"), nullable=True, index=True)
-    dish_snapshot_id = Column(Integer, ForeignKey("dish_snapshots.id", ondelete="CASCADE"), unique=True, nullable=False)
+    dish_snapshot_id = Column(Integer, ForeignKey("dish_snapshots.id", ondelete="CASCADE"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
+    unit_price = Column(Integer, nullable=True)  # Price charged per unit after discounts; NULL = snapshot price
+    discount_id = Column(Integer, ForeignKey("discounts.id", ondelete="SET NULL"), nullable=True)
     notes = Column(String, nullable=True)  # Guest notes for the dish
     order_handler_id = Column(Integer, ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True, index=True)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Keyset pagination of a tenant's orders by (created_at, id)
+    __table_args__ = (
+        Index('ix_orders_tenant_created_id', 'tenant_id', 'created_at', 'id'),
+    )
+
     # Relationships
     tenant = relationship("TenantModel", back_populates="orders")
     branch = relationship("BranchModel", back_populates="orders")
     guest = relationship("GuestModel", back_populates="orders")
     table = relationship("TableModel", back_populates="orders", foreign_keys="[OrderModel.table_number]")
-    dish_snapshot = relationship("DishSnapshotModel", back_populates="order", uselist=False)
+    dish_snapshot = relationship("DishSnapshotModel", back_populates="orders")
     order_handler = relationship("AccountModel", foreign_keys="[OrderModel.order_handler_id]")
+    discount = relationship("DiscountModel")
+
+    @property
+    def amount(self) -> int:
+        """Billed amount of the line"""
+        unit_price = self.unit_price if self.unit_price is not None else self.dish_snapshot.price
+        return unit_price * self.quantity
+
+    @classmethod
+    def amount_expr(cls, snapshot_price):
+        """SQL expression of the billed amount, given the joined snapshot price column"""
+        return func.coalesce(cls.unit_price, snapshot_price) * cls.quantity
 
@@ -0,0 +1,33 @@
+"""
+Outbox Model - Durable queue of work done after a transaction commits
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum, Index
+from sqlalchemy.sql import func
+import enum
+
+from app.infrastructure.databases.base import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "Pending"
+    DONE = "Done"
+    FAILED = "Failed"  # Gave up after OUTBOX_MAX_ATTEMPTS
+
+
+class OutboxModel(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Retry backoff
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # The worker polls pending events in order
+    __table_args__ = (
+        Index('ix_outbox_events_status_available', 'status', 'available_at', 'id'),
+    )
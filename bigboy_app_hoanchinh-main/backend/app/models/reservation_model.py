@@ -1,7 +1,7 @@
 """
 Reservation Model - Table booking
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Index, false
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -23,14 +23,22 @@ class ReservationModel(Base):
     tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id", ondelete="SET NULL"), nullable=True, index=True)
     table_number = Column(Integer, nullable=True, index=True)
+    table_pinned = Column(Boolean, nullable=False, default=False, server_default=false())  # Chosen by the customer; re-plans keep it
     date = Column(DateTime(timezone=True), nullable=False, index=True)
     time = Column(String, nullable=False)
+    start_at = Column(DateTime(timezone=True), nullable=True)  # date + time in the server timezone
+    end_at = Column(DateTime(timezone=True), nullable=True)  # start_at + booking duration
     guests = Column(Integer, nullable=False)
     status = Column(Enum(ReservationStatus), default=ReservationStatus.PENDING, nullable=False)
     notes = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Overlap lookups per table
+    __table_args__ = (
+        Index('ix_reservations_tenant_table_start', 'tenant_id', 'table_number', 'start_at'),
+    )
+
     # Relationships
     tenant = relationship("TenantModel", back_populates="reservations")
     customer = relationship("CustomerModel", back_populates="reservations")
@@ -0,0 +1,30 @@
+"""
+Restaurant Rating Model - Materialized review aggregates per restaurant
+"""
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.infrastructure.databases.base import Base
+
+
+class RestaurantRatingModel(Base):
+    __tablename__ = "restaurant_ratings"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_avg = Column(Float, nullable=False, default=0.0, index=True)  # rating_sum / rating_count
+    # Histogram: number of reviews per star
+    stars_1 = Column(Integer, nullable=False, default=0)
+    stars_2 = Column(Integer, nullable=False, default=0)
+    stars_3 = Column(Integer, nullable=False, default=0)
+    stars_4 = Column(Integer, nullable=False, default=0)
+    stars_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    tenant = relationship("TenantModel")
+
+    def histogram(self) -> dict:
+        return {str(star): getattr(self, f"stars_{star}") for star in range(1, 6)}
@@ -1,7 +1,7 @@
 """
 Tenant Model - Multi-tenant support
 """
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -30,6 +30,8 @@ class TenantModel(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     phone = Column(String, nullable=True)
     address = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)  # WGS84 degrees
+    longitude = Column(Float, nullable=True)
     logo = Column(String, nullable=True)
     description = Column(String, nullable=True)
     status = Column(Enum(TenantStatus), default=TenantStatus.ACTIVE, nullable=False)
@@ -38,6 +40,11 @@ class TenantModel(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Bounding-box lookups for nearby search
+    __table_args__ = (
+        Index('ix_tenants_lat_lng', 'latitude', 'longitude'),
+    )
+
     # Relationships
     accounts = relationship("AccountModel", back_populates="tenant")
     dishes = relationship("DishModel", back_populates="tenant")
@@ -0,0 +1,16 @@
+"""
+Version Counter Model - Per-tenant change counters (menu version, ...)
+"""
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.infrastructure.databases.base import Base
+
+
+class VersionCounterModel(Base):
+    __tablename__ = "version_counters"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    scope = Column(String, primary_key=True)  # What is versioned, e.g. "menu"
+    version = Column(BigInteger, nullable=False, default=0)  # Bumped by every committed change
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
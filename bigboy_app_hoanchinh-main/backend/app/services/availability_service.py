@@ -0,0 +1,268 @@
+"""
+Availability service - Per-table interval index of reservations
+
+Each tenant's upcoming bookings are kept in memory, per table, sorted by
+start time with a running maximum of end times, so "is table T free between
+t1 and t2" is one binary search. Writes to reservations or tables drop the
+tenant's index on every worker once they commit; it is rebuilt on next use.
+"""
+import bisect
+import threading
+import time as clock
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.infrastructure.databases import session_scope
+from app.infrastructure.events import publish, subscribe
+from app.models.reservation_model import ReservationModel, ReservationStatus
+from app.models.table_model import TableModel
+from app.services.revenue_service import SERVER_TZ, local_day, day_start
+
+# Reservations in these states hold their table
+BLOCKING_STATUSES = (ReservationStatus.PENDING, ReservationStatus.CONFIRMED)
+# Event bus channel carrying availability invalidations
+AVAILABILITY_CHANNEL = "cache.availability"
+
+
+class ReservationConflict(Exception):
+    """Booking rejected; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def parse_clock(value) -> time:
+    """HH:MM or HH:MM:SS to a time; ValueError otherwise"""
+    parts = str(value).strip().split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid time: {value}")
+    return time(*(int(part) for part in parts))
+
+
+def reservation_window(day_value, time_value, duration: int = None) -> Tuple[datetime, datetime]:
+    """
+    (start_at, end_at) in UTC of a booking given its date and "HH:MM" time in
+    the server timezone. Aware dates are read in the server timezone.
+    """
+    if isinstance(day_value, datetime):
+        day = local_day(day_value) if day_value.tzinfo else day_value.date()
+    else:
+        day = day_value
+    start = datetime.combine(day, parse_clock(time_value), tzinfo=SERVER_TZ)
+    end = start + timedelta(minutes=duration or Config.RESERVATION_DURATION)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+class _TableIntervals:
+    """Bookings of one table sorted by start, with the running max of their ends"""
+    __slots__ = ("starts", "ends", "ids", "max_ends")
+
+    def __init__(self, rows):
+        rows.sort()
+        self.starts = [start for start, _, _ in rows]
+        self.ends = [end for _, end, _ in rows]
+        self.ids = [reservation_id for _, _, reservation_id in rows]
+        self.max_ends = []
+        latest = None
+        for end in self.ends:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def is_free(self, start: datetime, end: datetime, ignore_id: int = None) -> bool:
+        # Only bookings starting before `end` can overlap
+        count = bisect.bisect_left(self.starts, end)
+        if count == 0 or self.max_ends[count - 1] <= start:
+            return True
+        if ignore_id is None:
+            return False
+        return all(
+            self.ends[i] <= start or self.ids[i] == ignore_id
+            for i in range(count)
+        )
+
+
+class AvailabilityIndex:
+    """One tenant's tables (by capacity) and their upcoming bookings"""
+
+    def __init__(self, tables, bookings, expires_at: float):
+        self.tables = sorted((capacity, number) for number, capacity in tables)
+        self._capacities = [capacity for capacity, _ in self.tables]
+        self._capacity_of = {number: capacity for number, capacity in tables}
+        rows_by_table = {}
+        for reservation_id, table_number, start, end in bookings:
+            rows_by_table.setdefault(table_number, []).append((_aware(start), _aware(end), reservation_id))
+        self._intervals = {number: _TableIntervals(rows) for number, rows in rows_by_table.items()}
+        self.expires_at = expires_at
+
+    def capacity(self, table_number: int) -> Optional[int]:
+        return self._capacity_of.get(table_number)
+
+    def is_free(self, table_number: int, start: datetime, end: datetime, ignore_id: int = None) -> bool:
+        intervals = self._intervals.get(table_number)
+        return intervals is None or intervals.is_free(start, end, ignore_id)
+
+    def free_tables(self, start: datetime, end: datetime, guests: int = 1, ignore_id: int = None) -> List[int]:
+        """Free tables seating at least `guests`, smallest first"""
+        first = bisect.bisect_left(self._capacities, guests)
+        return [
+            number for _, number in self.tables[first:]
+            if self.is_free(number, start, end, ignore_id)
+        ]
+
+
+_indexes: Dict[int, AvailabilityIndex] = {}
+_lock = threading.Lock()
+# Bumped by every invalidation: a build that straddles one is not stored
+_generations: Dict[int, int] = {}
+
+
+def _build_index(tenant_id: int) -> AvailabilityIndex:
+    since = day_start(local_day(None)).astimezone(timezone.utc)
+    with session_scope() as session:
+        tables = session.query(TableModel.number, TableModel.capacity).filter(
+            TableModel.tenant_id == tenant_id
+        ).all()
+        bookings = session.query(
+            ReservationModel.id,
+            ReservationModel.table_number,
+            ReservationModel.start_at,
+            ReservationModel.end_at
+        ).filter(
+            ReservationModel.tenant_id == tenant_id,
+            ReservationModel.status.in_(BLOCKING_STATUSES),
+            ReservationModel.table_number.isnot(None),
+            ReservationModel.end_at > since
+        ).all()
+    return AvailabilityIndex(tables, bookings, clock.monotonic() + Config.AVAILABILITY_INDEX_TTL)
+
+
+def get_availability_index(tenant_id: int) -> AvailabilityIndex:
+    """The tenant's index, rebuilt from the DB after writes or once its TTL passes"""
+    index = _indexes.get(tenant_id)
+    if index is not None and clock.monotonic() < index.expires_at:
+        return index
+    with _lock:
+        index = _indexes.get(tenant_id)
+        if index is None or clock.monotonic() >= index.expires_at:
+            generation = _generations.get(tenant_id, 0)
+            index = _build_index(tenant_id)
+            if _generations.get(tenant_id, 0) == generation:
+                _indexes[tenant_id] = index
+    return index
+
+
+def invalidate_availability(tenant_id: int) -> None:
+    """Drop a tenant's index on every worker"""
+    publish(AVAILABILITY_CHANNEL, {"tenant_id": tenant_id})
+
+
+def _drop_index(message) -> None:
+    tenant_id = message["tenant_id"]
+    _generations[tenant_id] = _generations.get(tenant_id, 0) + 1
+    _indexes.pop(tenant_id, None)
+
+
+subscribe(AVAILABILITY_CHANNEL, _drop_index)
+
+
+def _table_has_overlap(session, tenant_id, table_number, start, end, ignore_id=None) -> bool:
+    query = session.query(ReservationModel.id).filter(
+        ReservationModel.tenant_id == tenant_id,
+        ReservationModel.table_number == table_number,
+        ReservationModel.status.in_(BLOCKING_STATUSES),
+        ReservationModel.start_at < end,
+        ReservationModel.end_at > start
+    )
+    if ignore_id is not None:
+        query = query.filter(ReservationModel.id != ignore_id)
+    return session.query(query.exists()).scalar()
+
+
+def reserve_table(session, reservation: ReservationModel) -> int:
+    """
+    Check the reservation's table (or pick the smallest free one that seats
+    the party) for its start_at/end_at. The index answers first; then the
+    table row is locked and the overlap re-checked in the DB, so concurrent
+    bookings of one table are serialized. Raises ReservationConflict.
+    """
+    tenant_id = reservation.tenant_id
+    start, end = _aware(reservation.start_at), _aware(reservation.end_at)
+    guests = reservation.guests or 1
+    index = get_availability_index(tenant_id)
+
+    if reservation.table_number is None:
+        candidates = index.free_tables(start, end, guests, ignore_id=reservation.id)
+    else:
+        capacity = index.capacity(reservation.table_number)
+        if capacity is None:
+            raise ReservationConflict("Table not found", 404)
+        if capacity < guests:
+            raise ReservationConflict("Table is too small for this party", 400)
+        candidates = [reservation.table_number] if index.is_free(
+            reservation.table_number, start, end, ignore_id=reservation.id
+        ) else []
+
+    for table_number in candidates:
+        # Serialize bookings of this table until the transaction ends
+        session.query(TableModel.number).filter(
+            TableModel.tenant_id == tenant_id,
+            TableModel.number == table_number
+        ).with_for_update().first()
+        if not _table_has_overlap(session, tenant_id, table_number, start, end, ignore_id=reservation.id):
+            reservation.table_number = table_number
+            return table_number
+    raise ReservationConflict("No table is available at this time")
+
+
+def day_slots(tenant_id: int, day: date, guests: int = 1, duration: int = None) -> List[dict]:
+    """Bookable start times of a day and the free tables for each"""
+    duration = duration or Config.RESERVATION_DURATION
+    index = get_availability_index(tenant_id)
+    opening = datetime.combine(day, parse_clock(Config.RESERVATION_OPEN_TIME), tzinfo=SERVER_TZ)
+    closing = datetime.combine(day, parse_clock(Config.RESERVATION_CLOSE_TIME), tzinfo=SERVER_TZ)
+    now = datetime.now(timezone.utc)
+
+    slots = []
+    start = opening
+    while start + timedelta(minutes=duration) <= closing:
+        end = start + timedelta(minutes=duration)
+        tables = index.free_tables(start, end, guests) if start > now else []
+        slots.append({
+            "time": start.strftime("%H:%M"),
+            "start_at": start.isoformat(),
+            "end_at": end.isoformat(),
+            "available": bool(tables),
+            "tables": tables
+        })
+        start += timedelta(minutes=Config.RESERVATION_SLOT_MINUTES)
+    return slots
+
+
+def _track(mapper, connection, target):
+    tenant_id = target.tenant_id
+    if tenant_id is not None:
+        inspect(target).session.info.setdefault("availability_tenant_ids", set()).add(tenant_id)
+
+
+for _model in (ReservationModel, TableModel):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _track)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_tenants(session):
+    for tenant_id in session.info.pop("availability_tenant_ids", ()):
+        invalidate_availability(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_tenants(session):
+    session.info.pop("availability_tenant_ids", None)
@@ -0,0 +1,145 @@
+"""
+Check service - Open check (running bill) per table, maintained as lines change
+"""
+from typing import Optional
+from sqlalchemy import func, insert, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.open_check_model import OpenCheckModel
+from app.models.order_model import OrderModel, OrderStatus
+from app.models.dish_model import DishSnapshotModel
+from app.services.version_service import TABLES, bump_version
+
+# Orders in these states are no longer owed by the table
+CLOSED_STATUSES = (OrderStatus.PAID, OrderStatus.CANCELLED)
+
+
+def is_billable(status) -> bool:
+    """Whether an order in this status counts towards the open check"""
+    return status not in CLOSED_STATUSES
+
+
+def _upsert_insert(session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def add_check_lines(session, lines, reverse: bool = False) -> None:
+    """
+    Add order lines to their tables' open checks (or take them out with
+    reverse=True). The first line of a table opens its check; taking out
+    its last line closes it. lines: iterable of (tenant_id, table_number, amount, quantity)
+    """
+    sign = -1 if reverse else 1
+    totals = {}
+    for tenant_id, table_number, amount, quantity in lines:
+        if table_number is None:
+            continue
+        subtotal, count = totals.get((tenant_id, table_number), (0, 0))
+        totals[(tenant_id, table_number)] = (subtotal + sign * int(amount or 0), count + sign * int(quantity or 0))
+    if not totals:
+        return
+    # Counter first, then check rows: the same lock order as close_check
+    for tenant_id in sorted({tenant_id for tenant_id, _ in totals}):
+        bump_version(session, tenant_id, TABLES)
+
+    insert_fn = None if reverse else _upsert_insert(session)
+    if insert_fn is None:
+        for (tenant_id, table_number), (subtotal, count) in totals.items():
+            result = session.execute(
+                update(OpenCheckModel)
+                .where(OpenCheckModel.tenant_id == tenant_id, OpenCheckModel.table_number == table_number)
+                .values(
+                    subtotal=OpenCheckModel.subtotal + subtotal,
+                    item_count=OpenCheckModel.item_count + count,
+                    last_activity_at=func.now()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0 and not reverse:
+                session.add(OpenCheckModel(
+                    tenant_id=tenant_id, table_number=table_number, subtotal=subtotal, item_count=count
+                ))
+            elif reverse:
+                # Its last line is paid or cancelled: the table owes nothing, as after close_check
+                session.execute(
+                    delete(OpenCheckModel)
+                    .where(
+                        OpenCheckModel.tenant_id == tenant_id,
+                        OpenCheckModel.table_number == table_number,
+                        OpenCheckModel.item_count <= 0
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+        session.flush()
+        return
+
+    stmt = insert_fn(OpenCheckModel).values([
+        {"tenant_id": tenant_id, "table_number": table_number, "subtotal": subtotal, "item_count": count}
+        for (tenant_id, table_number), (subtotal, count) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "table_number"],
+        set_={
+            "subtotal": OpenCheckModel.subtotal + stmt.excluded.subtotal,
+            "item_count": OpenCheckModel.item_count + stmt.excluded.item_count,
+            "last_activity_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+
+def get_open_check(session, tenant_id: int, table_number: int) -> Optional[OpenCheckModel]:
+    """The table's open check, or None when it owes nothing"""
+    return session.get(OpenCheckModel, (tenant_id, table_number))
+
+
+def close_check(session, tenant_id: int, table_number: int) -> bool:
+    """Drop the table's check once its bill is settled"""
+    bump_version(session, tenant_id, TABLES)
+    result = session.execute(
+        delete(OpenCheckModel)
+        .where(OpenCheckModel.tenant_id == tenant_id, OpenCheckModel.table_number == table_number)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def rebuild_open_checks(session, tenant_id: int = None) -> int:
+    """
+    Recompute the open checks from unpaid, uncancelled orders (optionally for
+    one tenant); returns the number of open checks in that scope
+    """
+    delete_query = session.query(OpenCheckModel)
+    if tenant_id is not None:
+        delete_query = delete_query.filter(OpenCheckModel.tenant_id == tenant_id)
+    delete_query.delete(synchronize_session=False)
+
+    select_query = session.query(
+        OrderModel.tenant_id,
+        OrderModel.table_number,
+        func.sum(OrderModel.amount_expr(DishSnapshotModel.price)),
+        func.sum(OrderModel.quantity),
+        func.min(OrderModel.created_at),
+        func.max(func.coalesce(OrderModel.updated_at, OrderModel.created_at)),
+    ).join(
+        DishSnapshotModel, OrderModel.dish_snapshot_id == DishSnapshotModel.id
+    ).filter(
+        OrderModel.status.notin_(CLOSED_STATUSES),
+        OrderModel.table_number.isnot(None)
+    )
+    if tenant_id is not None:
+        select_query = select_query.filter(OrderModel.tenant_id == tenant_id)
+    select_query = select_query.group_by(OrderModel.tenant_id, OrderModel.table_number)
+
+    session.execute(
+        insert(OpenCheckModel).from_select(
+            ["tenant_id", "table_number", "subtotal", "item_count", "opened_at", "last_activity_at"],
+            select_query.statement,
+        )
+    )
+    session.flush()
+    return delete_query.count()
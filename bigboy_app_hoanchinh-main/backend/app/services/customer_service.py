@@ -1,93 +1,87 @@
 """
 Customer service - Auto update history and membership
+
+Settlements reach this service through the outbox (see outbox_service), off
+the payment request.
 """
-from app.infrastructure.databases import get_session
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update, case, literal, cast
 from app.models.customer_model import CustomerModel, MembershipTier
 from app.models.customer_history_model import CustomerHistoryModel
-from app.models.order_model import OrderModel, OrderStatus
-from app.models.dish_model import DishSnapshotModel
-from datetime import datetime
+from app.services.revenue_service import local_day, day_start
+
+# Minimum total spending per tier, highest first
+TIER_THRESHOLDS = (
+    (MembershipTier.DIAMOND, 10000000),
+    (MembershipTier.GOLD, 5000000),
+    (MembershipTier.SILVER, 1000000),
+)
+POINTS_RATE = 0.01  # 1% of spending
+
+
+def record_customer_settlement(session, customer_id, tenant_id, total_amount, dish_ids, order_id=None,
+                               paid_at: datetime = None):
+    """
+    Credit one paid bill to a customer: a single UPDATE for spending, points
+    and tier, plus the visit on the (local) day of paid_at (default: now) in
+    the history. Nothing is committed.
+    """
+    new_spending = CustomerModel.total_spending + total_amount
+    tier_type = CustomerModel.membership_tier.type
+    result = session.execute(
+        update(CustomerModel)
+        .where(CustomerModel.id == customer_id)
+        .values(
+            total_spending=new_spending,
+            points=CustomerModel.points + int(total_amount * POINTS_RATE),
+            membership_tier=cast(case(
+                *[(new_spending >= threshold, literal(tier, tier_type)) for tier, threshold in TIER_THRESHOLDS],
+                else_=literal(MembershipTier.IRON, tier_type)
+            ), tier_type)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return False
+
+    dish_ids = [dish_id for dish_id in dict.fromkeys(dish_ids) if dish_id]
+    paid_at = paid_at or datetime.now(timezone.utc)
+    day = local_day(paid_at)
+
+    # One history row per customer, restaurant and (local) day
+    history = session.query(CustomerHistoryModel).filter(
+        CustomerHistoryModel.customer_id == customer_id,
+        CustomerHistoryModel.tenant_id == tenant_id,
+        CustomerHistoryModel.visit_date >= day_start(day),
+        CustomerHistoryModel.visit_date < day_start(day + timedelta(days=1))
+    ).first()
 
+    if history:
+        history.dish_ids = list(dict.fromkeys((history.dish_ids or []) + dish_ids))
+        history.total_amount += total_amount
+        history.order_id = order_id
+    else:
+        session.add(CustomerHistoryModel(
+            customer_id=customer_id,
+            tenant_id=tenant_id,
+            order_id=order_id,
+            dish_ids=dish_ids,
+            total_amount=total_amount,
+            visit_date=paid_at
+        ))
+    session.flush()
+    return True
 
-def update_customer_history_from_order(order_id, customer_id):
-    """Update customer history when order is paid"""
-    session = get_session()
-    try:
-        # Get order
-        order = session.query(OrderModel).filter(OrderModel.id == order_id).first()
-        if not order or order.status != OrderStatus.PAID:
-            return
-        
-        # Get dish snapshot to get dish_id
-        dish_snapshot = session.query(DishSnapshotModel).filter(
-            DishSnapshotModel.id == order.dish_snapshot_id
-        ).first()
-        
-        if not dish_snapshot:
-            return
-        
-        # Check if history already exists for this order
-        existing_history = session.query(CustomerHistoryModel).filter(
-            CustomerHistoryModel.order_id == order_id
-        ).first()
-        
-        if existing_history:
-            return
-        
-        # Get or create history for this visit
-        # Group orders by tenant and date
-        history = session.query(CustomerHistoryModel).filter(
-            CustomerHistoryModel.customer_id == customer_id,
-            CustomerHistoryModel.tenant_id == order.tenant_id,
-            CustomerHistoryModel.visit_date >= datetime.utcnow().replace(hour=0, minute=0, second=0)
-        ).first()
-        
-        total_amount = dish_snapshot.price * order.quantity
-        
-        if history:
-            # Update existing history
-            if history.dish_ids:
-                if dish_snapshot.dish_id not in history.dish_ids:
-                    history.dish_ids.append(dish_snapshot.dish_id)
-            else:
-                history.dish_ids = [dish_snapshot.dish_id] if dish_snapshot.dish_id else []
-            history.total_amount += total_amount
-            history.order_id = order_id
-        else:
-            # Create new history
-            history = CustomerHistoryModel(
-                customer_id=customer_id,
-                tenant_id=order.tenant_id,
-                order_id=order_id,
-                dish_ids=[dish_snapshot.dish_id] if dish_snapshot.dish_id else [],
-                total_amount=total_amount,
-                visit_date=order.created_at or datetime.utcnow()
-            )
-            session.add(history)
-        
-        # Update customer total spending
-        customer = session.query(CustomerModel).filter(CustomerModel.id == customer_id).first()
-        if customer:
-            customer.total_spending += total_amount
-            
-            # Calculate points (1% of spending)
-            points_earned = int(total_amount * 0.01)
-            customer.points += points_earned
-            
-            # Update membership tier
-            if customer.total_spending >= 10000000:
-                customer.membership_tier = MembershipTier.DIAMOND
-            elif customer.total_spending >= 5000000:
-                customer.membership_tier = MembershipTier.GOLD
-            elif customer.total_spending >= 1000000:
-                customer.membership_tier = MembershipTier.SILVER
-            else:
-                customer.membership_tier = MembershipTier.IRON
-        
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        print(f"Error updating customer history: {e}")
-    finally:
-        session.close()
 
+def apply_customer_settlement(session, payload) -> None:
+    """Outbox handler for CUSTOMER_SETTLEMENT events"""
+    record_customer_settlement(
+        session,
+        payload["customer_id"],
+        payload["tenant_id"],
+        total_amount=payload["total_amount"],
+        dish_ids=payload.get("dish_ids") or [],
+        order_id=payload.get("order_id"),
+        # Absent from events queued before it was added
+        paid_at=datetime.fromisoformat(payload["paid_at"]) if payload.get("paid_at") else None
+    )
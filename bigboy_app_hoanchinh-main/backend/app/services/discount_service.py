@@ -0,0 +1,163 @@
+"""
+Discount service - In-memory index of active discounts used to price order lines
+"""
+import threading
+from datetime import datetime, timezone
+from typing import NamedTuple, Dict, Optional, Tuple
+from sqlalchemy import update, select
+from app.infrastructure.databases import session_scope
+from app.infrastructure.events import publish, subscribe
+from app.models.discount_model import DiscountModel, DiscountStatus, DiscountType
+
+# Event bus channel carrying discount invalidations
+DISCOUNT_CHANNEL = "cache.discount"
+
+_FAR_FUTURE = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class BestDiscount(NamedTuple):
+    """Largest percentage and largest fixed amount that apply to a dish"""
+    percentage: Optional[Tuple[int, int]] = None  # (value, discount_id)
+    fixed: Optional[Tuple[int, int]] = None  # (value, discount_id)
+
+    def merge(self, other: "BestDiscount") -> "BestDiscount":
+        return BestDiscount(
+            percentage=max(filter(None, (self.percentage, other.percentage)), default=None),
+            fixed=max(filter(None, (self.fixed, other.fixed)), default=None),
+        )
+
+
+class DiscountIndex(NamedTuple):
+    """Discounts of one tenant that are active now, valid until the next start/end boundary"""
+    tenant_wide: BestDiscount
+    by_dish: Dict[int, BestDiscount]
+    valid_until: datetime
+
+    def price(self, dish_id: int, price: int) -> Tuple[int, Optional[int]]:
+        """Unit price after the single best discount, and that discount's id"""
+        best = self.tenant_wide
+        dish_best = self.by_dish.get(dish_id)
+        if dish_best is not None:
+            best = best.merge(dish_best)
+
+        final_price, discount_id = price, None
+        if best.percentage:
+            value, candidate_id = best.percentage
+            candidate = price - price * min(value, 100) // 100
+            if candidate < final_price:
+                final_price, discount_id = candidate, candidate_id
+        if best.fixed:
+            value, candidate_id = best.fixed
+            candidate = max(price - value, 0)
+            if candidate < final_price:
+                final_price, discount_id = candidate, candidate_id
+        return final_price, discount_id
+
+
+_indexes: Dict[int, DiscountIndex] = {}
+# One build lock per tenant: a cold tenant never blocks another's lookups
+_build_locks: Dict[int, threading.Lock] = {}
+_lock = threading.Lock()  # Guards _build_locks
+# Bumped by every invalidation: a build that straddles one is not stored
+_generations: Dict[int, int] = {}
+
+
+def _build_index(tenant_id: int, now: datetime) -> DiscountIndex:
+    with session_scope() as session:
+        rows = session.query(
+            DiscountModel.id,
+            DiscountModel.dish_id,
+            DiscountModel.type,
+            DiscountModel.value,
+            DiscountModel.start_date,
+            DiscountModel.end_date
+        ).filter(
+            DiscountModel.tenant_id == tenant_id,
+            DiscountModel.status == DiscountStatus.ACTIVE,
+            DiscountModel.end_date > now
+        ).all()
+
+    tenant_wide = BestDiscount()
+    by_dish = {}
+    valid_until = _FAR_FUTURE
+    for discount_id, dish_id, discount_type, value, start_date, end_date in rows:
+        start_date, end_date = _aware(start_date), _aware(end_date)
+        if start_date > now:
+            # Not started yet: the index must be rebuilt when it does
+            valid_until = min(valid_until, start_date)
+            continue
+        valid_until = min(valid_until, end_date)
+        if discount_type == DiscountType.PERCENTAGE:
+            best = BestDiscount(percentage=(value, discount_id))
+        else:
+            best = BestDiscount(fixed=(value, discount_id))
+        if dish_id is None:
+            tenant_wide = tenant_wide.merge(best)
+        else:
+            by_dish[dish_id] = by_dish.get(dish_id, BestDiscount()).merge(best)
+    return DiscountIndex(tenant_wide=tenant_wide, by_dish=by_dish, valid_until=valid_until)
+
+
+def _build_lock(tenant_id: int) -> threading.Lock:
+    with _lock:
+        return _build_locks.setdefault(tenant_id, threading.Lock())
+
+
+def get_discount_index(tenant_id: int) -> DiscountIndex:
+    """The tenant's active-discount index, rebuilt after writes and at start/end boundaries"""
+    now = datetime.now(timezone.utc)
+    index = _indexes.get(tenant_id)
+    if index is not None and now < index.valid_until:
+        return index
+    with _build_lock(tenant_id):
+        index = _indexes.get(tenant_id)
+        if index is None or now >= index.valid_until:
+            generation = _generations.get(tenant_id, 0)
+            index = _build_index(tenant_id, now)
+            if _generations.get(tenant_id, 0) == generation:
+                _indexes[tenant_id] = index
+    return index
+
+
+def price_dish(tenant_id: int, dish_id: int, price: int) -> Tuple[int, Optional[int]]:
+    """Discounted unit price of a dish and the applied discount id (None when full price)"""
+    return get_discount_index(tenant_id).price(dish_id, price)
+
+
+def invalidate_discounts(tenant_id: int) -> None:
+    """Drop a tenant's index on every worker after its discounts changed"""
+    publish(DISCOUNT_CHANNEL, {"tenant_id": tenant_id})
+
+
+def _drop_index(message) -> None:
+    tenant_id = message["tenant_id"]
+    _generations[tenant_id] = _generations.get(tenant_id, 0) + 1
+    _indexes.pop(tenant_id, None)
+
+
+subscribe(DISCOUNT_CHANNEL, _drop_index)
+
+
+def expire_discounts(session, now: datetime = None, limit: int = None) -> int:
+    """
+    Flip ACTIVE discounts whose end_date has passed (at most `limit`) to
+    EXPIRED in one UPDATE; returns how many were expired. Nothing is committed.
+    """
+    now = now or datetime.now(timezone.utc)
+    condition = (DiscountModel.status == DiscountStatus.ACTIVE) & (DiscountModel.end_date <= now)
+    if limit is not None:
+        condition = DiscountModel.id.in_(
+            select(DiscountModel.id).where(condition).limit(limit).scalar_subquery()
+        )
+    # No invalidation needed: indexes already stop at the earliest end_date
+    result = session.execute(
+        update(DiscountModel)
+        .where(condition)
+        .values(status=DiscountStatus.EXPIRED)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
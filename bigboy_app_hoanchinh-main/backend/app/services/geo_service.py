@@ -0,0 +1,93 @@
+"""
+Geo service - Nearby restaurants by bounding box and haversine distance
+
+A restaurant is located at its own coordinates and at those of its active
+branches. The (latitude, longitude) indexes narrow the search to a bounding
+box around the user in SQL; only those candidates get an exact great-circle
+distance, and each restaurant keeps its nearest location.
+"""
+import math
+from typing import List, NamedTuple, Optional, Tuple
+from app.models.branch_model import BranchModel, BranchStatus
+from app.models.tenant_model import TenantModel, TenantStatus
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class NearbyRestaurant(NamedTuple):
+    tenant_id: int
+    distance_km: float
+    branch_id: Optional[int]  # None when the restaurant's own location is nearest
+    latitude: float
+    longitude: float
+
+
+def parse_coordinates(latitude, longitude) -> Tuple[Optional[float], Optional[float]]:
+    """Validated (lat, lng), (None, None) to clear; ValueError otherwise"""
+    if latitude is None and longitude is None:
+        return None, None
+    if latitude is None or longitude is None:
+        raise ValueError("latitude and longitude must be given together")
+    latitude, longitude = float(latitude), float(longitude)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+    return latitude, longitude
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """
+    (min_lat, max_lat, min_lng, max_lng) enclosing the radius. The longitude
+    bounds are None when the box reaches a pole or crosses the antimeridian.
+    """
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - d_lat, latitude + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+    d_lng = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(latitude))))
+    min_lng, max_lng = longitude - d_lng, longitude + d_lng
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def _within(query, model, box):
+    min_lat, max_lat, min_lng, max_lng = box
+    query = query.filter(model.latitude.between(min_lat, max_lat))
+    if min_lng is not None:
+        query = query.filter(model.longitude.between(min_lng, max_lng))
+    return query
+
+
+def nearby_restaurants(session, latitude: float, longitude: float, radius_km: float) -> List[NearbyRestaurant]:
+    """Active restaurants within `radius_km`, nearest first"""
+    box = bounding_box(latitude, longitude, radius_km)
+    tenant_points = _within(session.query(
+        TenantModel.id, TenantModel.latitude, TenantModel.longitude
+    ).filter(TenantModel.status == TenantStatus.ACTIVE), TenantModel, box).all()
+    branch_points = _within(session.query(
+        BranchModel.tenant_id, BranchModel.id, BranchModel.latitude, BranchModel.longitude
+    ).join(TenantModel, TenantModel.id == BranchModel.tenant_id).filter(
+        TenantModel.status == TenantStatus.ACTIVE,
+        BranchModel.status == BranchStatus.ACTIVE
+    ), BranchModel, box).all()
+
+    nearest = {}
+    candidates = [(tenant_id, None, lat, lng) for tenant_id, lat, lng in tenant_points]
+    candidates += branch_points
+    for tenant_id, branch_id, lat, lng in candidates:
+        distance = haversine_km(latitude, longitude, lat, lng)
+        if distance > radius_km:
+            continue
+        current = nearest.get(tenant_id)
+        if current is None or distance < current.distance_km:
+            nearest[tenant_id] = NearbyRestaurant(tenant_id, distance, branch_id, lat, lng)
+    return sorted(nearest.values(), key=lambda item: (item.distance_km, item.tenant_id))
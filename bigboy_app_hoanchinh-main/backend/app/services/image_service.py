@@ -0,0 +1,210 @@
+"""
+Image service - Content-addressed uploads and resized variants
+
+An upload is streamed to a temporary file in chunks while it is hashed, then
+moved to images/<h[:2]>/<sha256>.<ext> under UPLOAD_FOLDER: the same picture
+uploaded twice is stored once. Each image gets WebP and JPEG variants in
+IMAGE_VARIANT_SIZES, rendered by a small worker pool next to the original
+(<sha256>-<size>.<format>). Variants that exist are never rendered again.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional
+from PIL import Image, ImageOps
+from app.config import Config
+from app.services.static_service import static_index
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIR = "images"
+CHUNK_SIZE = 64 * 1024
+# Pillow format -> stored extension
+FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+VARIANT_FORMATS = (("webp", "WEBP"), ("jpeg", "JPEG"))
+_STORED = re.compile(r"/static/images/([0-9a-f]{2})/([0-9a-f]{64})\.(\w+)$")
+_VARIANT = re.compile(r"images/([0-9a-f]{2})/([0-9a-f]{64})-(\w+)\.(webp|jpeg)$")
+
+
+class ImageError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class StoredImage(NamedTuple):
+    digest: str  # sha256 of the original bytes
+    path: str  # Relative to UPLOAD_FOLDER
+    created: bool  # False when the same bytes were already stored
+
+
+def _variant_sizes() -> Dict[str, int]:
+    """IMAGE_VARIANT_SIZES, e.g. "thumbnail:160,medium:480,large:1080" (longest side in px)"""
+    sizes = {}
+    for item in Config.IMAGE_VARIANT_SIZES.split(","):
+        name, _, pixels = item.partition(":")
+        sizes[name.strip()] = int(pixels)
+    return sizes
+
+
+VARIANT_SIZES = _variant_sizes()
+
+_renderer = ThreadPoolExecutor(max_workers=Config.IMAGE_WORKERS, thread_name_prefix="image-variants")
+_rendering = {}  # digest -> Future of its variants
+_rendering_lock = threading.Lock()
+
+
+def _original_path(digest: str, ext: str) -> str:
+    return os.path.join(IMAGE_DIR, digest[:2], f"{digest}.{ext}")
+
+
+def _variant_path(digest: str, size: str, fmt: str) -> str:
+    return os.path.join(IMAGE_DIR, digest[:2], f"{digest}-{size}.{fmt}")
+
+
+def store_image(stream) -> StoredImage:
+    """Copy a file-like stream to content-addressed storage; ImageError if it is not an acceptable image"""
+    tmp_dir = os.path.join(Config.UPLOAD_FOLDER, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > Config.MAX_CONTENT_LENGTH:
+                    raise ImageError("File too large", 413)
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    try:
+        if not size:
+            raise ImageError("Empty file")
+        ext = _check_image(tmp.name)
+        digest = digest.hexdigest()
+        path = _original_path(digest, ext)
+        full_path = os.path.join(Config.UPLOAD_FOLDER, path)
+        if os.path.exists(full_path):
+            return StoredImage(digest, path, False)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(tmp.name, full_path)
+        static_index.add(path.replace(os.sep, "/"))
+        return StoredImage(digest, path, True)
+    finally:
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+
+
+def _check_image(path: str) -> str:
+    """Stored extension of the image at `path`, reading only its header"""
+    try:
+        with Image.open(path) as image:
+            fmt = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ImageError("Unsupported image file")
+    if fmt not in FORMATS:
+        raise ImageError(f"Unsupported image format {fmt}")
+    if width * height > Config.IMAGE_MAX_PIXELS:
+        raise ImageError("Image dimensions too large")
+    return FORMATS[fmt]
+
+
+def render_variants(stored: StoredImage):
+    """Queue rendering of missing variants; the Future, or None when all exist"""
+    if all(
+        os.path.exists(os.path.join(Config.UPLOAD_FOLDER, _variant_path(stored.digest, size, fmt)))
+        for size in VARIANT_SIZES for fmt, _ in VARIANT_FORMATS
+    ):
+        return None
+    with _rendering_lock:
+        future = _rendering.get(stored.digest)
+        if future is None:
+            future = _rendering[stored.digest] = _renderer.submit(_render, stored)
+            future.add_done_callback(lambda _: _done(stored.digest))
+        return future
+
+
+def _done(digest: str) -> None:
+    with _rendering_lock:
+        _rendering.pop(digest, None)
+
+
+def _render(stored: StoredImage) -> None:
+    source = os.path.join(Config.UPLOAD_FOLDER, stored.path)
+    try:
+        with Image.open(source) as image:
+            # JPEG: let the decoder downscale while reading
+            image.draft("RGB", (max(VARIANT_SIZES.values()),) * 2)
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+            # Largest first: each size is resized from the previous one
+            for size, pixels in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+                image.thumbnail((pixels, pixels), Image.LANCZOS)
+                for fmt, pil_format in VARIANT_FORMATS:
+                    _save(image, _variant_path(stored.digest, size, fmt), pil_format)
+    except Exception as e:
+        logger.error(f"Rendering variants of {stored.path} failed: {e}", exc_info=True)
+        raise
+
+
+def _save(image, path: str, pil_format: str) -> None:
+    full_path = os.path.join(Config.UPLOAD_FOLDER, path)
+    if os.path.exists(full_path):
+        return
+    if pil_format == "JPEG" and image.mode == "RGBA":
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel("A"))
+        image = flat
+    # Write next to the target and rename: readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            image.save(out, pil_format, quality=Config.IMAGE_QUALITY, optimize=pil_format == "JPEG")
+        os.replace(tmp, full_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    static_index.add(path.replace(os.sep, "/"))
+
+
+def image_url(stored: StoredImage, base_url: str) -> str:
+    return f"{base_url.rstrip('/')}/static/{stored.path.replace(os.sep, '/')}"
+
+
+def image_variants(url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """{size: {format: url}} for an uploaded image's URL; None for external images"""
+    match = _STORED.search(url or "")
+    if not match:
+        return None
+    prefix = url[:match.start()]
+    shard, digest, _ = match.groups()
+    return {
+        size: {fmt: f"{prefix}/static/images/{shard}/{digest}-{size}.{fmt}" for fmt, _ in VARIANT_FORMATS}
+        for size in VARIANT_SIZES
+    }
+
+
+def pending_variant(path: str):
+    """For a missing variant file (relative to UPLOAD_FOLDER): the Future rendering it, or None"""
+    match = _VARIANT.search(path)
+    if not match or match.group(3) not in VARIANT_SIZES:
+        return None
+    _, digest, _, _ = match.groups()
+    for ext in FORMATS.values():
+        original = _original_path(digest, ext)
+        if os.path.exists(os.path.join(Config.UPLOAD_FOLDER, original)):
+            return render_variants(StoredImage(digest, original, False))
+    return None
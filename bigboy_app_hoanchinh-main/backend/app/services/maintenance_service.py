@@ -0,0 +1,123 @@
+"""
+Maintenance service - Housekeeping sweeps run by the scheduler
+
+Each sweep handles at most `limit` rows per call and returns how many it
+touched; the scheduler commits and calls again until a call comes back short.
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, delete, or_
+from app.config import Config
+from app.infrastructure.scheduler import Job
+from app.models.refresh_token_model import RefreshTokenModel
+from app.models.guest_model import GuestModel
+from app.models.reservation_model import ReservationModel, ReservationStatus
+from app.models.socket_model import SocketModel
+from app.services.discount_service import expire_discounts
+from app.services.revenue_service import rebuild_daily_revenue, local_day, day_start
+from app.services.outbox_service import process_outbox, purge_outbox
+from app.services.menu_service import purge_tombstones
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _delete_batch(session, model, key_column, condition, limit: int) -> int:
+    keys = select(key_column).where(condition).limit(limit).scalar_subquery()
+    result = session.execute(
+        delete(model).where(key_column.in_(keys)).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def purge_refresh_tokens(session, limit: int) -> int:
+    """Delete expired account refresh tokens"""
+    return _delete_batch(
+        session, RefreshTokenModel, RefreshTokenModel.token,
+        RefreshTokenModel.expires_at < _now(), limit
+    )
+
+
+def clear_guest_refresh_tokens(session, limit: int) -> int:
+    """Clear expired refresh tokens stored on guests"""
+    ids = select(GuestModel.id).where(
+        GuestModel.refresh_token.isnot(None),
+        GuestModel.refresh_token_expires_at < _now()
+    ).limit(limit).scalar_subquery()
+    result = session.execute(
+        update(GuestModel)
+        .where(GuestModel.id.in_(ids))
+        .values(refresh_token=None, refresh_token_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def close_stale_reservations(session, limit: int) -> int:
+    """
+    Settle reservations whose day is over: confirmed ones are completed,
+    ones still pending are cancelled
+    """
+    today_start = day_start(local_day(_now()))
+    touched = 0
+    for current, final in (
+        (ReservationStatus.CONFIRMED, ReservationStatus.COMPLETED),
+        (ReservationStatus.PENDING, ReservationStatus.CANCELLED),
+    ):
+        ids = select(ReservationModel.id).where(
+            ReservationModel.status == current,
+            ReservationModel.date < today_start
+        ).limit(limit - touched).scalar_subquery()
+        result = session.execute(
+            update(ReservationModel)
+            .where(ReservationModel.id.in_(ids))
+            .values(status=final)
+            .execution_options(synchronize_session=False)
+        )
+        touched += result.rowcount
+        if touched >= limit:
+            break
+    return touched
+
+
+def expire_ended_discounts(session, limit: int) -> int:
+    """Mark ended discounts EXPIRED"""
+    return expire_discounts(session, limit=limit)
+
+
+def prune_sockets(session, limit: int) -> int:
+    """
+    Delete socket rows left behind by connections that never disconnected
+    cleanly: rows whose owner is gone, or older than SOCKET_MAX_AGE
+    """
+    cutoff = _now() - timedelta(seconds=Config.SOCKET_MAX_AGE)
+    return _delete_batch(
+        session, SocketModel, SocketModel.socket_id,
+        or_(
+            (SocketModel.account_id.is_(None) & SocketModel.guest_id.is_(None)),
+            SocketModel.created_at < cutoff
+        ),
+        limit
+    )
+
+
+def reconcile_revenue(session, limit: int) -> int:
+    """
+    Rebuild yesterday's revenue rollup from its PAID orders, catching
+    anything the incremental updates missed. A single day, so `limit` is unused.
+    """
+    yesterday = local_day(_now()) - timedelta(days=1)
+    return rebuild_daily_revenue(session, day_from=yesterday, day_to=yesterday)
+
+
+MAINTENANCE_JOBS = (
+    Job("process-outbox", process_outbox, "interval", {"seconds": Config.OUTBOX_POLL_INTERVAL}),
+    Job("purge-outbox", purge_outbox, "interval", {"hours": 6}),
+    Job("purge-refresh-tokens", purge_refresh_tokens, "interval", {"hours": 1}),
+    Job("clear-guest-refresh-tokens", clear_guest_refresh_tokens, "interval", {"hours": 1}),
+    Job("close-stale-reservations", close_stale_reservations, "interval", {"minutes": 30}),
+    Job("expire-discounts", expire_ended_discounts, "interval", {"minutes": 5}),
+    Job("prune-sockets", prune_sockets, "interval", {"minutes": 15}),
+    Job("purge-dish-tombstones", purge_tombstones, "interval", {"hours": 6}),
+    Job("reconcile-revenue", reconcile_revenue, "cron", {"hour": 0, "minute": 30}, batched=False),
+)
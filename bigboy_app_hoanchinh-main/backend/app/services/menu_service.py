@@ -0,0 +1,84 @@
+"""
+Menu service - Versioned menus for delta sync
+
+Every flush that creates, changes or deletes dishes bumps their tenant's
+menu version once and stamps it on the dishes; a delete leaves a tombstone
+with that version. A client that synced at version N asks for what changed
+after N and gets just those dishes and tombstones.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, List
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.models.dish_model import DishModel, DishTombstoneModel
+from app.services.version_service import MENU, MENU_PURGED, bump_version, get_version, set_version
+
+
+class MenuDelta(NamedTuple):
+    version: int  # Pass back as `since` on the next sync
+    reset: bool  # True: `dishes` is the whole menu, drop what you have
+    dishes: List[DishModel]
+    deleted: List[int]  # Ids of deleted dishes
+
+
+def menu_delta(session, tenant_id: int, since: int = 0) -> MenuDelta:
+    """Dishes changed and deleted after menu version `since` (everything when 0)"""
+    version = get_version(session, tenant_id, MENU)
+    # Tombstones up to this version are gone: a full resync is the only safe answer
+    reset = not since or since < get_version(session, tenant_id, MENU_PURGED) or since > version
+    dishes = session.query(DishModel).filter(DishModel.tenant_id == tenant_id)
+    if reset:
+        return MenuDelta(version, True, dishes.order_by(DishModel.id).all(), [])
+
+    dishes = dishes.filter(DishModel.version > since).order_by(DishModel.version, DishModel.id).all()
+    deleted = [dish_id for dish_id, in session.query(DishTombstoneModel.dish_id).filter(
+        DishTombstoneModel.tenant_id == tenant_id,
+        DishTombstoneModel.version > since
+    ).order_by(DishTombstoneModel.version)]
+    # A re-created id is live again
+    live = {dish.id for dish in dishes}
+    return MenuDelta(version, False, dishes, [dish_id for dish_id in deleted if dish_id not in live])
+
+
+def purge_tombstones(session, limit: int) -> int:
+    """Delete tombstones older than MENU_TOMBSTONE_RETENTION; clients further behind resync fully"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.MENU_TOMBSTONE_RETENTION)
+    rows = session.query(DishTombstoneModel.id, DishTombstoneModel.tenant_id, DishTombstoneModel.version).filter(
+        DishTombstoneModel.deleted_at < cutoff
+    ).order_by(DishTombstoneModel.id).limit(limit).all()
+    if not rows:
+        return 0
+    purged = {}
+    for _, tenant_id, version in rows:
+        purged[tenant_id] = max(version, purged.get(tenant_id, 0))
+    for tenant_id, version in purged.items():
+        current = get_version(session, tenant_id, MENU_PURGED)
+        if version > current:
+            set_version(session, tenant_id, MENU_PURGED, version)
+    session.query(DishTombstoneModel).filter(
+        DishTombstoneModel.id.in_([row_id for row_id, _, _ in rows])
+    ).delete(synchronize_session=False)
+    return len(rows)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_menu_changes(session, flush_context, instances):
+    changed, deleted = {}, {}
+    for dish in session.new:
+        if isinstance(dish, DishModel) and dish.tenant_id is not None:
+            changed.setdefault(dish.tenant_id, []).append(dish)
+    for dish in session.dirty:
+        if isinstance(dish, DishModel) and session.is_modified(dish):
+            changed.setdefault(dish.tenant_id, []).append(dish)
+    for dish in session.deleted:
+        if isinstance(dish, DishModel):
+            deleted.setdefault(dish.tenant_id, []).append(dish)
+
+    # One bump per tenant, in a fixed order so concurrent flushes cannot deadlock
+    for tenant_id in sorted(changed.keys() | deleted.keys()):
+        version = bump_version(session, tenant_id, MENU)
+        for dish in changed.get(tenant_id, ()):
+            dish.version = version
+        for dish in deleted.get(tenant_id, ()):
+            session.add(DishTombstoneModel(tenant_id=tenant_id, dish_id=dish.id, version=version))
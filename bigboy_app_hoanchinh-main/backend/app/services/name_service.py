@@ -0,0 +1,88 @@
+"""
+Name service - Batched id -> display name resolution for listings
+
+Tenant names are dropped through invalidate_tenant (tenant_service);
+customer names whenever a committed flush renames or deletes a customer.
+"""
+from typing import Dict, Iterable
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.infrastructure.events import publish, subscribe
+from app.models.tenant_model import TenantModel
+from app.models.customer_model import CustomerModel
+from app.utils.cache import TTLCache
+
+
+class NameResolver:
+    """Resolve ids to names for one model with a single IN query per page"""
+
+    def __init__(self, id_column, name_column):
+        self.id_column = id_column
+        self.name_column = name_column
+        self._cache = TTLCache(maxsize=Config.NAME_CACHE_SIZE, ttl=Config.NAME_CACHE_TTL)
+
+    def resolve(self, session, ids: Iterable) -> Dict:
+        """Return {id: name} for the given ids; unknown ids are left out"""
+        names = {}
+        missing = set()
+        for item_id in ids:
+            if item_id is None or item_id in names:
+                continue
+            name = self._cache.get(item_id)
+            if name is None:
+                missing.add(item_id)
+            else:
+                names[item_id] = name
+        if missing:
+            rows = session.query(self.id_column, self.name_column).filter(
+                self.id_column.in_(missing)
+            ).all()
+            for item_id, name in rows:
+                self._cache.set(item_id, name)
+                names[item_id] = name
+        return names
+
+    def invalidate(self, item_id) -> None:
+        self._cache.pop(item_id)
+
+
+tenant_names = NameResolver(TenantModel.id, TenantModel.name)
+customer_names = NameResolver(CustomerModel.id, CustomerModel.name)
+
+# Event bus channel carrying renamed customers
+CUSTOMER_CHANNEL = "cache.customer"
+
+
+def invalidate_customer(customer_id: int) -> None:
+    """Drop a customer's name from the cache of every worker"""
+    publish(CUSTOMER_CHANNEL, {"id": customer_id})
+
+
+def _drop_customer(message) -> None:
+    customer_names.invalidate(message["id"])
+
+
+subscribe(CUSTOMER_CHANNEL, _drop_customer)
+
+
+@event.listens_for(CustomerModel, "after_update")
+def _track_renamed(mapper, connection, target):
+    if inspect(target).attrs.name.history.has_changes():
+        inspect(target).session.info.setdefault("renamed_customers", set()).add(target.id)
+
+
+@event.listens_for(CustomerModel, "after_delete")
+def _track_deleted(mapper, connection, target):
+    inspect(target).session.info.setdefault("renamed_customers", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_renamed(session):
+    for customer_id in session.info.pop("renamed_customers", ()):
+        invalidate_customer(customer_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_renamed(session):
+    session.info.pop("renamed_customers", None)
@@ -0,0 +1,71 @@
+"""
+Order service - Batched order creation
+"""
+from sqlalchemy import insert
+from app.models.order_model import OrderModel, OrderStatus
+from app.models.dish_model import DishModel
+from app.services.snapshot_service import get_or_create_snapshots
+from app.services.check_service import add_check_lines
+from app.services.discount_service import get_discount_index
+
+
+class OrderError(Exception):
+    """Order request rejected; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def create_order_batch(session, tenant_id, lines, table_number=None):
+    """
+    Create one order per line in a constant number of round-trips: one IN
+    query for the dishes, one lookup (plus at most one bulk insert) for
+    their content-addressed snapshots, one bulk insert for the orders and
+    one upsert for the tables' open checks. Lines are priced against the
+    tenant's in-memory discount index. Nothing is committed.
+    """
+    dish_ids = {line.get('dish_id') for line in lines}
+    dishes = {
+        dish.id: dish
+        for dish in session.query(DishModel).filter(DishModel.id.in_(dish_ids)).all()
+    } if dish_ids else {}
+
+    # Validate everything before writing anything
+    for line in lines:
+        dish = dishes.get(line.get('dish_id'))
+        if not dish:
+            raise OrderError(f"Dish {line.get('dish_id')} not found", 404)
+        if dish.tenant_id != tenant_id:
+            raise OrderError("Access denied", 403)
+
+    if not lines:
+        return []
+
+    snapshot_ids = get_or_create_snapshots(session, dishes.values())
+    discounts = get_discount_index(tenant_id)
+
+    order_rows = []
+    for line in lines:
+        dish = dishes[line.get('dish_id')]
+        unit_price, discount_id = discounts.price(dish.id, dish.price)
+        order_rows.append({
+            "tenant_id": tenant_id,
+            "table_number": line.get('table_number') or table_number,
+            "dish_snapshot_id": snapshot_ids[dish.id],
+            "quantity": line.get('quantity', 1),
+            "unit_price": unit_price,
+            "discount_id": discount_id,
+            "notes": line.get('notes'),
+            "status": OrderStatus.PENDING,
+        })
+    orders = session.scalars(
+        insert(OrderModel).returning(OrderModel, sort_by_parameter_order=True),
+        order_rows,
+    ).all()
+    add_check_lines(session, [
+        (tenant_id, row["table_number"], row["unit_price"] * row["quantity"], row["quantity"])
+        for row in order_rows
+    ])
+    return orders
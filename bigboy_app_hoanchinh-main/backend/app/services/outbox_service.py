@@ -0,0 +1,84 @@
+"""
+Outbox service - Durable, transactional queue processed by the scheduler
+
+Events are inserted in the same transaction as the change that causes them,
+so they exist exactly when that change commits. The worker applies each
+event and marks it DONE in one transaction, so an event takes effect once.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from app.config import Config
+from app.models.outbox_model import OutboxModel, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+# Topics
+CUSTOMER_SETTLEMENT = "customer.settlement"
+
+
+def enqueue(session, topic: str, payload: dict) -> OutboxModel:
+    """Queue an event in the caller's transaction. Nothing is committed."""
+    event = OutboxModel(topic=topic, payload=payload, status=OutboxStatus.PENDING, attempts=0)
+    session.add(event)
+    return event
+
+
+def _handlers():
+    # Imported here: handlers live in services that themselves enqueue events
+    from app.services.customer_service import apply_customer_settlement
+    return {
+        CUSTOMER_SETTLEMENT: apply_customer_settlement,
+    }
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2 ** attempts, 3600))
+
+
+def process_outbox(session, limit: int) -> int:
+    """
+    Apply up to `limit` due events, oldest first; returns how many were
+    claimed. Concurrent workers skip each other's rows on PostgreSQL.
+    """
+    query = session.query(OutboxModel).filter(
+        OutboxModel.status == OutboxStatus.PENDING,
+        OutboxModel.available_at <= func.now()
+    ).order_by(OutboxModel.available_at, OutboxModel.id).limit(limit)
+    if session.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    events = query.all()
+
+    handlers = _handlers()
+    now = datetime.now(timezone.utc)
+    for event in events:
+        handler = handlers.get(event.topic)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for topic {event.topic}")
+            with session.begin_nested():
+                handler(session, event.payload)
+        except Exception as e:
+            event.attempts += 1
+            event.last_error = str(e)[:1000]
+            if event.attempts >= Config.OUTBOX_MAX_ATTEMPTS:
+                event.status = OutboxStatus.FAILED
+                logger.error(f"Outbox event {event.id} ({event.topic}) failed permanently: {e}")
+            else:
+                event.available_at = now + _retry_delay(event.attempts)
+                logger.warning(f"Outbox event {event.id} ({event.topic}) failed, will retry: {e}")
+            continue
+        event.status = OutboxStatus.DONE
+        event.processed_at = now
+    session.flush()
+    return len(events)
+
+
+def purge_outbox(session, limit: int) -> int:
+    """Delete processed events older than OUTBOX_RETENTION"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.OUTBOX_RETENTION)
+    ids = session.query(OutboxModel.id).filter(
+        OutboxModel.status == OutboxStatus.DONE,
+        OutboxModel.processed_at < cutoff
+    ).limit(limit).scalar_subquery()
+    return session.query(OutboxModel).filter(OutboxModel.id.in_(ids)).delete(synchronize_session=False)
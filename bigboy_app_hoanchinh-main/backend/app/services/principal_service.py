@@ -0,0 +1,100 @@
+"""
+Principal service - Cached snapshots of authenticated accounts
+"""
+from typing import NamedTuple, Optional, Any
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.infrastructure.databases import session_scope
+from app.infrastructure.events import publish, subscribe
+from app.models.account_model import AccountModel, AccountRole
+from app.utils.cache import TTLCache
+
+
+class Principal(NamedTuple):
+    """Immutable snapshot of the account behind an access token"""
+    id: int
+    tenant_id: Optional[int]
+    role: AccountRole
+    permissions: Any
+    name: str
+    email: str
+    avatar: Optional[str]
+
+    @classmethod
+    def from_model(cls, account: AccountModel) -> "Principal":
+        permissions = account.permissions
+        if isinstance(permissions, list):
+            permissions = tuple(permissions)
+        return cls(
+            id=account.id,
+            tenant_id=account.tenant_id,
+            role=account.role,
+            permissions=permissions,
+            name=account.name,
+            email=account.email,
+            avatar=account.avatar,
+        )
+
+
+# Keyed by (account_id, token iat) so a re-issued token always reloads
+_principal_cache = TTLCache(maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_TTL)
+
+# Attributes whose change must drop cached principals: every one the
+# snapshot holds, so /auth/me never shows a stale profile either
+_WATCHED_ATTRS = tuple(field for field in Principal._fields if field != "id")
+# Event bus channel carrying principal invalidations
+PRINCIPAL_CHANNEL = "cache.principal"
+
+
+def get_principal(account_id: int, issued_at=None) -> Optional[Principal]:
+    """Load the principal for an account, serving from cache when possible"""
+    key = (account_id, issued_at)
+    principal = _principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    with session_scope() as session:
+        account = session.query(AccountModel).filter(AccountModel.id == account_id).first()
+        if not account:
+            return None
+        principal = Principal.from_model(account)
+
+    _principal_cache.set(key, principal)
+    return principal
+
+
+def invalidate_principal(account_id: int) -> None:
+    """Drop every cached principal of an account, in every worker"""
+    publish(PRINCIPAL_CHANNEL, {"id": account_id})
+
+
+def _drop_principal(message) -> None:
+    account_id = message["id"]
+    _principal_cache.pop_matching(lambda key: key[0] == account_id)
+
+
+subscribe(PRINCIPAL_CHANNEL, _drop_principal)
+
+
+@event.listens_for(AccountModel, "after_update")
+def _track_account_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in _WATCHED_ATTRS):
+        state.session.info.setdefault("changed_account_ids", set()).add(target.id)
+
+
+@event.listens_for(AccountModel, "after_delete")
+def _track_account_delete(mapper, connection, target):
+    inspect(target).session.info.setdefault("changed_account_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_accounts(session):
+    for account_id in session.info.pop("changed_account_ids", ()):
+        invalidate_principal(account_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_accounts(session):
+    session.info.pop("changed_account_ids", None)
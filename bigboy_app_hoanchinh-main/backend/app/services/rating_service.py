@@ -0,0 +1,107 @@
+"""
+Rating service - Incrementally maintained restaurant rating summaries
+"""
+from typing import Optional
+from sqlalchemy import update, case, cast, func, Float
+from sqlalchemy.dialects import postgresql
+from app.models.restaurant_rating_model import RestaurantRatingModel
+from app.models.review_model import ReviewModel
+
+RATING_MIN = 1
+RATING_MAX = 5
+STARS = range(RATING_MIN, RATING_MAX + 1)
+
+
+def parse_rating(value) -> Optional[int]:
+    """Return the rating as an int star value, or None when invalid"""
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not rating.is_integer() or not RATING_MIN <= rating <= RATING_MAX:
+        return None
+    return int(rating)
+
+
+def apply_rating_change(session, tenant_id: int, old_rating: int = None, new_rating: int = None) -> None:
+    """
+    Fold one review change into the tenant's summary with a single UPDATE:
+    create (new only), edit (old and new) or delete (old only)
+    """
+    if old_rating == new_rating:
+        return
+    star_deltas = {}
+    if old_rating is not None:
+        star_deltas[old_rating] = star_deltas.get(old_rating, 0) - 1
+    if new_rating is not None:
+        star_deltas[new_rating] = star_deltas.get(new_rating, 0) + 1
+    # Reviews stored before ratings were validated may be off the 1-5 scale:
+    # they count in sum and count but in no star, as in rebuild_rating_summaries
+    star_deltas = {star: delta for star, delta in star_deltas.items() if delta and star in STARS}
+
+    delta_sum = (new_rating or 0) - (old_rating or 0)
+    delta_count = (new_rating is not None) - (old_rating is not None)
+    new_sum = RestaurantRatingModel.rating_sum + delta_sum
+    new_count = RestaurantRatingModel.rating_count + delta_count
+    values = {
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+        "rating_avg": case((new_count > 0, cast(new_sum, Float) / new_count), else_=0.0),
+    }
+    for star, delta in star_deltas.items():
+        column = getattr(RestaurantRatingModel, f"stars_{star}")
+        values[f"stars_{star}"] = column + delta
+
+    result = session.execute(
+        update(RestaurantRatingModel)
+        .where(RestaurantRatingModel.tenant_id == tenant_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # No summary yet for this tenant: derive it from its reviews
+        rebuild_rating_summaries(session, tenant_id)
+
+
+def rebuild_rating_summaries(session, tenant_id: int = None) -> int:
+    """Recompute summaries from the reviews table (one tenant or all); returns rows written"""
+    session.flush()
+    query = session.query(
+        ReviewModel.tenant_id,
+        func.sum(ReviewModel.rating),
+        func.count(ReviewModel.id),
+        *[func.sum(case((ReviewModel.rating == star, 1), else_=0)) for star in STARS]
+    ).group_by(ReviewModel.tenant_id)
+    if tenant_id is not None:
+        query = query.filter(ReviewModel.tenant_id == tenant_id)
+
+    rows = []
+    for row_tenant_id, rating_sum, rating_count, *histogram in query.all():
+        row = {
+            "tenant_id": row_tenant_id,
+            "rating_sum": int(rating_sum or 0),
+            "rating_count": rating_count,
+            "rating_avg": float(rating_sum or 0) / rating_count if rating_count else 0.0,
+        }
+        row.update({f"stars_{star}": int(count or 0) for star, count in zip(STARS, histogram)})
+        rows.append(row)
+    if tenant_id is not None and not rows:
+        rows.append(dict(
+            {"tenant_id": tenant_id, "rating_sum": 0, "rating_count": 0, "rating_avg": 0.0},
+            **{f"stars_{star}": 0 for star in STARS}
+        ))
+    if not rows:
+        return 0
+
+    if session.get_bind().dialect.name == "postgresql":
+        stmt = postgresql.insert(RestaurantRatingModel).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RestaurantRatingModel.tenant_id],
+            set_={key: stmt.excluded[key] for key in rows[0] if key != "tenant_id"},
+        )
+        session.execute(stmt)
+    else:
+        for row in rows:
+            session.merge(RestaurantRatingModel(**row))
+        session.flush()
+    return len(rows)
@@ -0,0 +1,62 @@
+"""
+Realtime service - Push order, table and reservation events to sockets
+"""
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.infrastructure.events import publish, subscribe
+
+logger = logging.getLogger(__name__)
+
+# Event names sent to Socket.IO clients
+ORDER_CREATED = "order-created"
+ORDER_STATUS_CHANGED = "order-status-changed"
+ORDER_PAID = "order-paid"
+TABLE_STATUS = "table-status"
+RESERVATION_CREATED = "reservation-created"
+RESERVATION_UPDATED = "reservation-updated"
+
+# Event bus channel: every worker emits to the sockets connected to it
+REALTIME_CHANNEL = "realtime"
+
+
+def emit_event(event_name: str, data, tenant_id: int = None, customer_id: int = None) -> None:
+    """Emit now to the tenant's staff room and/or a customer's room, on every worker"""
+    if not tenant_id and not customer_id:
+        return
+    publish(REALTIME_CHANNEL, {
+        "event": event_name,
+        "data": data,
+        "tenant_id": tenant_id,
+        "customer_id": customer_id
+    })
+
+
+def _emit_to_local_sockets(message) -> None:
+    from app.api.sockets import socketio, tenant_room, customer_room
+
+    rooms = []
+    if message.get("tenant_id"):
+        rooms.append(tenant_room(message["tenant_id"]))
+    if message.get("customer_id"):
+        rooms.append(customer_room(message["customer_id"]))
+    socketio.emit(message["event"], message["data"], to=rooms)
+
+
+subscribe(REALTIME_CHANNEL, _emit_to_local_sockets)
+
+
+def publish_event(session, event_name: str, data, tenant_id: int = None, customer_id: int = None) -> None:
+    """Queue an event that is emitted only once the session commits"""
+    session.info.setdefault("pending_events", []).append((event_name, data, tenant_id, customer_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _emit_pending_events(session):
+    for event_name, data, tenant_id, customer_id in session.info.pop("pending_events", ()):
+        emit_event(event_name, data, tenant_id=tenant_id, customer_id=customer_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop("pending_events", None)
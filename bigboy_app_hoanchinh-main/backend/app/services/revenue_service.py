@@ -0,0 +1,154 @@
+"""
+Revenue service - Daily revenue rollup per restaurant, day and branch
+"""
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from app.config import Config
+from app.models.daily_revenue_model import DailyRevenueModel
+from app.models.order_model import OrderModel, OrderStatus
+from app.models.dish_model import DishSnapshotModel
+
+SERVER_TZ = ZoneInfo(Config.SERVER_TIMEZONE)
+
+_KEY_COLUMNS = ("tenant_id", "day", "branch_id")
+
+
+def local_day(value: datetime) -> date:
+    """Calendar day of a timestamp in the server timezone"""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(SERVER_TZ).date()
+
+
+def day_start(day: date) -> datetime:
+    """First instant of a local day, as an aware datetime"""
+    return datetime.combine(day, time.min, tzinfo=SERVER_TZ)
+
+
+def _upsert_insert(session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def record_paid_orders(session, rows, reverse: bool = False) -> None:
+    """
+    Add PAID orders to the rollup (or take them out with reverse=True).
+    rows: iterable of (tenant_id, branch_id, created_at, amount)
+    """
+    sign = -1 if reverse else 1
+    totals = {}
+    for tenant_id, branch_id, created_at, amount in rows:
+        key = (tenant_id, local_day(created_at), branch_id or 0)
+        revenue, count = totals.get(key, (0, 0))
+        totals[key] = (revenue + sign * int(amount or 0), count + sign)
+    if not totals:
+        return
+
+    values = [
+        {"tenant_id": tenant_id, "day": day, "branch_id": branch_id, "revenue": revenue, "order_count": count}
+        for (tenant_id, day, branch_id), (revenue, count) in totals.items()
+    ]
+    insert_fn = _upsert_insert(session)
+    if insert_fn is None:
+        for value in values:
+            row = session.get(DailyRevenueModel, (value["tenant_id"], value["day"], value["branch_id"]))
+            if row is None:
+                session.add(DailyRevenueModel(**value))
+            else:
+                row.revenue += value["revenue"]
+                row.order_count += value["order_count"]
+        session.flush()
+        return
+
+    stmt = insert_fn(DailyRevenueModel).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_KEY_COLUMNS),
+        set_={
+            "revenue": DailyRevenueModel.revenue + stmt.excluded.revenue,
+            "order_count": DailyRevenueModel.order_count + stmt.excluded.order_count,
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+
+def _paid_orders_query(session, tenant_id=None, day_from=None, day_to=None):
+    query = session.query(
+        OrderModel.tenant_id,
+        OrderModel.branch_id,
+        OrderModel.created_at,
+        OrderModel.amount_expr(DishSnapshotModel.price),
+    ).join(
+        DishSnapshotModel, OrderModel.dish_snapshot_id == DishSnapshotModel.id
+    ).filter(OrderModel.status == OrderStatus.PAID)
+    if tenant_id is not None:
+        query = query.filter(OrderModel.tenant_id == tenant_id)
+    # Range on the raw timestamp so the created_at index stays usable
+    if day_from is not None:
+        query = query.filter(OrderModel.created_at >= day_start(day_from))
+    if day_to is not None:
+        query = query.filter(OrderModel.created_at < day_start(day_to + timedelta(days=1)))
+    return query
+
+
+def rebuild_daily_revenue(session, tenant_id: int = None, day_from: date = None, day_to: date = None) -> int:
+    """
+    Recompute the rollup from PAID orders, optionally for one tenant and/or
+    day range; returns the number of rollup rows in that scope
+    """
+    delete_query = session.query(DailyRevenueModel)
+    if tenant_id is not None:
+        delete_query = delete_query.filter(DailyRevenueModel.tenant_id == tenant_id)
+    if day_from is not None:
+        delete_query = delete_query.filter(DailyRevenueModel.day >= day_from)
+    if day_to is not None:
+        delete_query = delete_query.filter(DailyRevenueModel.day <= day_to)
+    delete_query.delete(synchronize_session=False)
+
+    if session.get_bind().dialect.name == "postgresql":
+        # Aggregate and insert in a single INSERT ... SELECT
+        day_expr = func.date(func.timezone(Config.SERVER_TIMEZONE, OrderModel.created_at))
+        branch_expr = func.coalesce(OrderModel.branch_id, 0)
+        select_stmt = _paid_orders_query(session, tenant_id, day_from, day_to).with_entities(
+            OrderModel.tenant_id,
+            day_expr,
+            branch_expr,
+            func.sum(OrderModel.amount_expr(DishSnapshotModel.price)),
+            func.count(OrderModel.id),
+            func.now(),
+        ).group_by(OrderModel.tenant_id, day_expr, branch_expr).statement
+        session.execute(
+            insert(DailyRevenueModel).from_select(
+                ["tenant_id", "day", "branch_id", "revenue", "order_count", "updated_at"],
+                select_stmt,
+            )
+        )
+    else:
+        batch = []
+        for row in _paid_orders_query(session, tenant_id, day_from, day_to).yield_per(5000):
+            batch.append(row)
+            if len(batch) >= 5000:
+                record_paid_orders(session, batch)
+                batch = []
+        record_paid_orders(session, batch)
+
+    session.flush()
+    return delete_query.count()
+
+
+def parse_day(value):
+    """YYYY-MM-DD to date; None when missing or malformed"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
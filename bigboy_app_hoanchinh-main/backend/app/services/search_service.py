@@ -0,0 +1,329 @@
+"""
+Search service - Diacritic-insensitive search over restaurants and dishes
+
+Text is folded with generate_slug ("Phở Đà Nẵng" -> pho, da, nang) into an
+in-process inverted index: token -> documents, a sorted vocabulary for prefix
+(autocomplete) lookups and trigram -> tokens for typo-tolerant matches.
+Committed writes to tenants or dishes re-index just those rows on every
+worker; a TTL rebuild catches bulk updates that bypass the ORM. Both read
+the database without blocking searches: a rebuild is swapped in whole and
+a re-index applies its rows in one short critical section.
+"""
+import bisect
+import re
+import threading
+import time as clock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.infrastructure.databases import session_scope
+from app.infrastructure.events import publish, subscribe
+from app.models.dish_model import DishModel, DishStatus
+from app.models.tenant_model import TenantModel, TenantStatus
+from app.utils.helpers import generate_slug
+
+RESTAURANT = "restaurant"
+DISH = "dish"
+# Event bus channel carrying re-index requests
+SEARCH_CHANNEL = "cache.search"
+
+# Field weights: a hit in the name outranks one in the address or description
+NAME_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+DETAIL_WEIGHT = 0.5
+# Match quality multipliers
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+MIN_SIMILARITY = 0.4
+MAX_PREFIX_EXPANSION = 200
+
+
+def fold(text) -> List[str]:
+    """Lowercase ASCII tokens of `text` without diacritics"""
+    if not text:
+        return []
+    return [token for token in re.split(r'[-_]+', generate_slug(str(text))) if token]
+
+
+def _trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Document(NamedTuple):
+    kind: str
+    id: int
+    tenant_id: int
+    name: str
+    folded_name: str
+    active: bool
+    fields: Dict[str, float]  # token -> weight
+    data: dict  # Returned as-is in results
+
+
+def _restaurant_document(tenant: TenantModel) -> Document:
+    fields = {}
+    for text, weight in ((tenant.description, DETAIL_WEIGHT), (tenant.address, TEXT_WEIGHT), (tenant.name, NAME_WEIGHT)):
+        for token in fold(text):
+            fields[token] = max(weight, fields.get(token, 0))
+    return Document(
+        kind=RESTAURANT, id=tenant.id, tenant_id=tenant.id, name=tenant.name,
+        folded_name=" ".join(fold(tenant.name)),
+        active=tenant.status == TenantStatus.ACTIVE,
+        fields=fields,
+        data={"slug": tenant.slug, "address": tenant.address, "logo": tenant.logo}
+    )
+
+
+def _dish_document(dish: DishModel) -> Document:
+    fields = {}
+    for text, weight in ((dish.description, DETAIL_WEIGHT), (dish.category, TEXT_WEIGHT), (dish.name, NAME_WEIGHT)):
+        for token in fold(text):
+            fields[token] = max(weight, fields.get(token, 0))
+    return Document(
+        kind=DISH, id=dish.id, tenant_id=dish.tenant_id, name=dish.name,
+        folded_name=" ".join(fold(dish.name)),
+        active=dish.status == DishStatus.AVAILABLE,
+        fields=fields,
+        data={"price": dish.price, "image": dish.image, "category": dish.category}
+    )
+
+
+class SearchIndex:
+    """Inverted index of folded tokens with prefix and trigram lookups"""
+
+    def __init__(self, expires_at: float):
+        self.documents: Dict[Tuple[str, int], Document] = {}
+        self._postings: Dict[str, Dict[Tuple[str, int], float]] = {}
+        self._vocabulary: List[str] = []  # Sorted, for prefix ranges
+        self._trigrams: Dict[str, set] = {}
+        self.expires_at = expires_at
+        self._lock = threading.Lock()  # Searches against update() once the index is shared
+
+    def add(self, document: Document) -> None:
+        key = (document.kind, document.id)
+        self.remove(key)
+        self.documents[key] = document
+        for token, weight in document.fields.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+                for trigram in _trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings[key] = weight
+
+    def remove(self, key: Tuple[str, int]) -> None:
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        for token in document.fields:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                for trigram in _trigrams(token):
+                    tokens = self._trigrams.get(trigram)
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[trigram]
+
+    def update(self, removed, documents) -> None:
+        """Remove these keys and (re-)add these documents, as one step for concurrent searches"""
+        with self._lock:
+            for key in removed:
+                self.remove(key)
+            for document in documents:
+                self.add(document)
+
+    def _expand(self, term: str, prefix: bool) -> Dict[str, float]:
+        """Indexed tokens matching `term` with their match quality"""
+        matches = {}
+        if prefix:
+            start = bisect.bisect_left(self._vocabulary, term)
+            for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+                if not token.startswith(term):
+                    break
+                matches[token] = PREFIX_MATCH
+        if term in self._postings:
+            matches[term] = 1.0
+        if len(term) >= 3:
+            grams = _trigrams(term)
+            shared = {}
+            for trigram in grams:
+                for token in self._trigrams.get(trigram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                similarity = count / (len(grams) + len(_trigrams(token)) - count)
+                if similarity >= MIN_SIMILARITY:
+                    matches[token] = max(matches.get(token, 0), FUZZY_MATCH * similarity)
+        return matches
+
+    def search(self, query: str, kinds=(RESTAURANT, DISH), tenant_id: int = None,
+               limit: int = 20, prefix: bool = False, active_only: bool = True) -> List[Tuple[float, Document]]:
+        """
+        Documents matching every query term, best first. With prefix=True the
+        last term may be incomplete (autocomplete); every term always
+        tolerates small typos. active_only skips closed restaurants,
+        unavailable dishes and the dishes of closed restaurants.
+        """
+        terms = fold(query)
+        if not terms:
+            return []
+        with self._lock:
+            return self._search(terms, kinds, tenant_id, limit, prefix, active_only)
+
+    def _search(self, terms, kinds, tenant_id, limit, prefix, active_only) -> List[Tuple[float, Document]]:
+        scores = None
+        for position, term in enumerate(terms):
+            term_scores = {}
+            for token, quality in self._expand(term, prefix and position == len(terms) - 1).items():
+                for key, weight in self._postings[token].items():
+                    score = quality * weight
+                    if score > term_scores.get(key, 0):
+                        term_scores[key] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: scores[key] + score for key, score in term_scores.items() if key in scores}
+            if not scores:
+                return []
+
+        folded_query = " ".join(terms)
+        results = []
+        for key, score in scores.items():
+            document = self.documents[key]
+            if document.kind not in kinds:
+                continue
+            if tenant_id is not None and document.tenant_id != tenant_id:
+                continue
+            if active_only:
+                if not document.active:
+                    continue
+                if document.kind == DISH:
+                    restaurant = self.documents.get((RESTAURANT, document.tenant_id))
+                    if restaurant is None or not restaurant.active:
+                        continue
+            if document.folded_name == folded_query:
+                score += NAME_WEIGHT
+            elif document.folded_name.startswith(folded_query):
+                score += 1.0
+            results.append((score, document))
+        results.sort(key=lambda item: (-item[0], len(item[1].name), item[1].id))
+        return results[:limit] if limit else results
+
+
+_index: Optional[SearchIndex] = None
+_pending: set = set()  # (kind, id) changed since the index was last synced
+_lock = threading.Lock()  # Swapping _index and draining _pending only
+_refreshing = threading.Lock()  # One rebuild or sync at a time; searches don't wait for it
+
+
+def _load(session, kind: str, ids=None) -> List[Document]:
+    model, build = (TenantModel, _restaurant_document) if kind == RESTAURANT else (DishModel, _dish_document)
+    query = session.query(model)
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+    return [build(row) for row in query.all()]
+
+
+def _build_index() -> SearchIndex:
+    index = SearchIndex(clock.monotonic() + Config.SEARCH_INDEX_TTL)
+    with session_scope() as session:
+        for kind in (RESTAURANT, DISH):
+            for document in _load(session, kind):
+                index.add(document)
+    return index
+
+
+def _sync(index: SearchIndex, keys) -> None:
+    removed, documents = [], []
+    with session_scope() as session:
+        for kind in (RESTAURANT, DISH):
+            ids = [document_id for key_kind, document_id in keys if key_kind == kind]
+            if not ids:
+                continue
+            found = _load(session, kind, ids)
+            removed.extend((kind, document_id) for document_id in set(ids) - {document.id for document in found})
+            documents.extend(found)
+    index.update(removed, documents)
+
+
+def _refresh() -> None:
+    """Rebuild an expired index or apply pending changes; the database is read outside _lock"""
+    global _index
+    index = _index
+    if index is None or clock.monotonic() >= index.expires_at:
+        with _lock:
+            # Changes committed from here on may be missed by the scan: keep them pending
+            _pending.clear()
+        index = _build_index()
+        with _lock:
+            _index = index
+        return
+    with _lock:
+        keys = list(_pending)
+        _pending.clear()
+    if keys:
+        _sync(index, keys)
+
+
+def search(query: str, kinds=(RESTAURANT, DISH), tenant_id: int = None,
+           limit: int = 20, prefix: bool = False, active_only: bool = True) -> List[Tuple[float, Document]]:
+    """Ranked (score, document) pairs; see SearchIndex.search"""
+    index = _index
+    outdated = index is None or clock.monotonic() >= index.expires_at or _pending
+    # With an index to search, a refresh already under way is not waited for
+    if outdated and _refreshing.acquire(blocking=index is None):
+        try:
+            _refresh()
+        finally:
+            _refreshing.release()
+        index = _index
+    return index.search(query, kinds, tenant_id, limit, prefix, active_only)
+
+
+def search_ids(query: str, kind: str, tenant_id: int = None, active_only: bool = True) -> List[int]:
+    """Ids of every matching restaurant or dish, best first"""
+    return [document.id for _, document in search(query, (kind,), tenant_id, None, active_only=active_only)]
+
+
+def reindex(keys) -> None:
+    """Re-read these (kind, id) documents on every worker before their next search"""
+    publish(SEARCH_CHANNEL, {"keys": [list(key) for key in keys]})
+
+
+def _mark_pending(message) -> None:
+    with _lock:
+        _pending.update((kind, document_id) for kind, document_id in message["keys"])
+
+
+subscribe(SEARCH_CHANNEL, _mark_pending)
+
+
+def _track(kind):
+    def track(mapper, connection, target):
+        if target.id is not None:
+            inspect(target).session.info.setdefault("search_keys", set()).add((kind, target.id))
+    return track
+
+
+for _model, _kind in ((TenantModel, RESTAURANT), (DishModel, DISH)):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _track(_kind))
+
+
+@event.listens_for(Session, "after_commit")
+def _reindex_changed(session):
+    keys = session.info.pop("search_keys", None)
+    if keys:
+        reindex(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed(session):
+    session.info.pop("search_keys", None)
@@ -0,0 +1,118 @@
+"""
+Settlement service - Pay all open orders of a table in one statement
+"""
+from datetime import datetime, timezone
+from typing import NamedTuple, List, Optional
+from sqlalchemy import update, select, func
+from app.models.order_model import OrderModel, OrderStatus
+from app.models.dish_model import DishSnapshotModel
+from app.services.revenue_service import record_paid_orders
+from app.services.outbox_service import enqueue, CUSTOMER_SETTLEMENT
+from app.services.check_service import CLOSED_STATUSES, close_check
+
+orders_table = OrderModel.__table__
+
+
+class SettledLine(NamedTuple):
+    id: int
+    tenant_id: int
+    branch_id: Optional[int]
+    created_at: object
+    quantity: int
+    dish_id: Optional[int]
+    unit_price: int
+
+    @property
+    def amount(self) -> int:
+        return self.unit_price * self.quantity
+
+
+class Settlement(NamedTuple):
+    lines: List[SettledLine]
+    total: int
+
+    @property
+    def order_ids(self) -> List[int]:
+        return [line.id for line in self.lines]
+
+
+def _mark_paid(tenant_id, table_number, handler_id):
+    # Cancelled orders are never billed
+    return update(orders_table).where(
+        orders_table.c.tenant_id == tenant_id,
+        orders_table.c.table_number == table_number,
+        orders_table.c.status.notin_(CLOSED_STATUSES)
+    ).values(
+        status=OrderStatus.PAID,
+        order_handler_id=handler_id
+    ).returning(
+        orders_table.c.id,
+        orders_table.c.tenant_id,
+        orders_table.c.branch_id,
+        orders_table.c.created_at,
+        orders_table.c.quantity,
+        orders_table.c.unit_price,
+        orders_table.c.dish_snapshot_id
+    )
+
+
+def settle_table(session, tenant_id: int, table_number: int, handler_id: int,
+                 customer_id: int = None) -> Optional[Settlement]:
+    """
+    Mark the table's open orders PAID, total the bill, close the open check
+    and update the revenue rollup in the caller's transaction. The customer's
+    history/loyalty update is queued in the outbox, in that same transaction.
+    Returns None when there is nothing to pay. Nothing is committed.
+    """
+    stmt = _mark_paid(tenant_id, table_number, handler_id)
+    if session.get_bind().dialect.name == "postgresql":
+        # UPDATE ... RETURNING joined to the snapshot prices in one round-trip
+        paid = stmt.cte("paid")
+        rows = session.execute(
+            select(
+                paid.c.id,
+                paid.c.tenant_id,
+                paid.c.branch_id,
+                paid.c.created_at,
+                paid.c.quantity,
+                DishSnapshotModel.dish_id,
+                func.coalesce(paid.c.unit_price, DishSnapshotModel.price)
+            ).join(DishSnapshotModel, DishSnapshotModel.id == paid.c.dish_snapshot_id)
+            .order_by(paid.c.id)
+        ).all()
+        lines = [SettledLine(*row) for row in rows]
+    else:
+        rows = session.execute(stmt).all()
+        snapshots = {
+            snapshot_id: (dish_id, price)
+            for snapshot_id, dish_id, price in session.query(
+                DishSnapshotModel.id, DishSnapshotModel.dish_id, DishSnapshotModel.price
+            ).filter(DishSnapshotModel.id.in_({row.dish_snapshot_id for row in rows}))
+        } if rows else {}
+        lines = sorted((
+            SettledLine(row.id, row.tenant_id, row.branch_id, row.created_at, row.quantity,
+                        snapshots[row.dish_snapshot_id][0],
+                        row.unit_price if row.unit_price is not None else snapshots[row.dish_snapshot_id][1])
+            for row in rows
+        ), key=lambda line: line.id)
+
+    if not lines:
+        return None
+
+    close_check(session, tenant_id, table_number)
+    settlement = Settlement(lines=lines, total=sum(line.amount for line in lines))
+    record_paid_orders(session, [
+        (line.tenant_id, line.branch_id, line.created_at, line.amount) for line in lines
+    ])
+    if customer_id:
+        enqueue(session, CUSTOMER_SETTLEMENT, {
+            "customer_id": customer_id,
+            "tenant_id": tenant_id,
+            "total_amount": settlement.total,
+            "dish_ids": [line.dish_id for line in lines],
+            "order_id": lines[-1].id,
+            "order_ids": settlement.order_ids,
+            # The worker may run much later: the visit is filed under this time
+            "paid_at": datetime.now(timezone.utc).isoformat()
+        })
+    return settlement
@@ -0,0 +1,125 @@
+"""
+Snapshot service - Content-addressed dish snapshots
+"""
+import json
+import logging
+from sqlalchemy import insert, update, delete
+from sqlalchemy.dialects import postgresql
+from app.models.dish_model import DishSnapshotModel
+from app.models.order_model import OrderModel
+from app.utils.helpers import hash_string
+
+logger = logging.getLogger(__name__)
+
+# Fields copied from the dish into a snapshot, in hashing order
+SNAPSHOT_FIELDS = ("dish_id", "name", "price", "description", "image", "category", "status")
+
+
+def snapshot_values(dish) -> dict:
+    """Snapshot column values for the current state of a dish"""
+    return {
+        "dish_id": dish.id,
+        "name": dish.name,
+        "price": dish.price,
+        "description": dish.description,
+        "image": dish.image,
+        "category": dish.category,
+        "status": dish.status.value,
+    }
+
+
+def snapshot_hash(values: dict) -> str:
+    """SHA-256 over the snapshotted fields"""
+    return hash_string(json.dumps([values.get(field) for field in SNAPSHOT_FIELDS], ensure_ascii=False))
+
+
+def _find_snapshot_ids(session, hashes):
+    rows = session.query(DishSnapshotModel.content_hash, DishSnapshotModel.id).filter(
+        DishSnapshotModel.content_hash.in_(hashes)
+    ).all()
+    return dict(rows)
+
+
+def get_or_create_snapshots(session, dishes) -> dict:
+    """
+    Return {dish_id: snapshot_id}, reusing the snapshot whose content hash
+    matches each dish and inserting only the ones that do not exist yet
+    """
+    values_by_hash = {}
+    hash_by_dish = {}
+    for dish in dishes:
+        values = snapshot_values(dish)
+        content_hash = snapshot_hash(values)
+        values_by_hash[content_hash] = dict(values, content_hash=content_hash)
+        hash_by_dish[dish.id] = content_hash
+    if not values_by_hash:
+        return {}
+
+    ids_by_hash = _find_snapshot_ids(session, list(values_by_hash))
+    missing = [values for content_hash, values in values_by_hash.items() if content_hash not in ids_by_hash]
+    if missing:
+        if session.get_bind().dialect.name == "postgresql":
+            # Concurrent requests may insert the same snapshot; keep whichever landed first
+            stmt = postgresql.insert(DishSnapshotModel).on_conflict_do_nothing(index_elements=["content_hash"])
+            inserted = session.execute(
+                stmt.returning(DishSnapshotModel.content_hash, DishSnapshotModel.id), missing
+            ).all()
+            ids_by_hash.update(dict(inserted))
+            lost = [values["content_hash"] for values in missing if values["content_hash"] not in ids_by_hash]
+            if lost:
+                ids_by_hash.update(_find_snapshot_ids(session, lost))
+        else:
+            inserted = session.execute(
+                insert(DishSnapshotModel).returning(
+                    DishSnapshotModel.content_hash, DishSnapshotModel.id, sort_by_parameter_order=True
+                ),
+                missing,
+            ).all()
+            ids_by_hash.update(dict(inserted))
+
+    return {dish_id: ids_by_hash[content_hash] for dish_id, content_hash in hash_by_dish.items()}
+
+
+def compact_dish_snapshots(session, batch_size: int = 1000) -> dict:
+    """
+    Backfill content hashes on legacy snapshots and merge duplicates:
+    orders are repointed to the oldest snapshot with the same content and
+    the duplicates are deleted. Commits after every batch.
+    """
+    stats = {"hashed": 0, "merged": 0}
+    while True:
+        rows = session.query(DishSnapshotModel).filter(
+            DishSnapshotModel.content_hash.is_(None)
+        ).order_by(DishSnapshotModel.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        hashes = {
+            row.id: snapshot_hash({field: getattr(row, field) for field in SNAPSHOT_FIELDS})
+            for row in rows
+        }
+        canonical = _find_snapshot_ids(session, set(hashes.values()))
+        duplicates = {}  # canonical id -> [duplicate ids]
+        for row in rows:
+            content_hash = hashes[row.id]
+            if content_hash in canonical:
+                duplicates.setdefault(canonical[content_hash], []).append(row.id)
+            else:
+                canonical[content_hash] = row.id
+                row.content_hash = content_hash
+                stats["hashed"] += 1
+        session.flush()
+
+        for canonical_id, duplicate_ids in duplicates.items():
+            session.execute(
+                update(OrderModel)
+                .where(OrderModel.dish_snapshot_id.in_(duplicate_ids))
+                .values(dish_snapshot_id=canonical_id)
+            )
+            session.execute(delete(DishSnapshotModel).where(DishSnapshotModel.id.in_(duplicate_ids)))
+            stats["merged"] += len(duplicate_ids)
+
+        session.commit()
+        session.expunge_all()
+        logger.info(f"Compacted dish snapshots: {stats}")
+    return stats
@@ -0,0 +1,167 @@
+"""
+Static service - In-memory index of uploaded files
+
+The index maps each file under UPLOAD_FOLDER to its size, mtime, ETag and
+precompressed siblings (<name>.br, <name>.gz), so serving a file needs no
+filesystem lookups. It is built on first use and rebuilt after
+STATIC_INDEX_TTL seconds; a file missing from it (just written, maybe by
+another worker) is stat'ed and added on its first request.
+
+Names containing a sha256 (uploaded images and their variants) never change
+content and are served as immutable.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import threading
+import time as clock
+from typing import Dict, NamedTuple, Optional
+from werkzeug.security import safe_join
+from app.config import Config
+
+try:
+    import brotli
+except ImportError:  # Optional: .br siblings are only generated when installed
+    brotli = None
+
+# Content-Encoding -> sibling suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Worth precompressing; images are compressed already
+COMPRESSIBLE = {"text/css", "text/plain", "text/html", "text/csv", "application/javascript",
+                "text/javascript", "application/json", "image/svg+xml", "application/xml"}
+_HASHED = re.compile(r"(?:^|/)([0-9a-f]{64})(?:-\w+)?(?:\.\w+)+$")
+_SKIP_DIRS = {"tmp"}
+
+
+class StaticFile(NamedTuple):
+    path: str  # Relative to UPLOAD_FOLDER, "/"-separated
+    size: int
+    mtime: float
+    etag: str
+    mimetype: str
+    immutable: bool
+    encoded: Dict[str, "StaticFile"]  # Content-Encoding -> precompressed sibling
+
+
+def _etag(path: str, stat) -> str:
+    if _HASHED.search(path):
+        # The name carries the content hash: it identifies the bytes for good
+        return hashlib.sha256(path.encode()).hexdigest()[:32]
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _entry(path: str, stat, encoded=None) -> StaticFile:
+    mimetype, wrapped = mimetypes.guess_type(path)
+    if wrapped:
+        mimetype = None  # e.g. a .gz requested as such: opaque bytes
+    return StaticFile(path, stat.st_size, stat.st_mtime, _etag(path, stat),
+                      mimetype or "application/octet-stream", bool(_HASHED.search(path)), encoded or {})
+
+
+def _scan(root: str) -> Dict[str, StaticFile]:
+    stats = {}
+    for directory, dirs, names in os.walk(root):
+        if directory == root:
+            dirs[:] = [d for d in dirs if d not in _SKIP_DIRS]
+        for name in names:
+            if name.endswith(".part"):
+                continue
+            full_path = os.path.join(directory, name)
+            try:
+                stats[os.path.relpath(full_path, root).replace(os.sep, "/")] = os.stat(full_path)
+            except OSError:
+                continue  # Removed while scanning
+
+    files = {}
+    for path, stat in stats.items():
+        if any(path.endswith(suffix) and path[:-len(suffix)] in stats for _, suffix in ENCODINGS):
+            continue  # Attached to its original below
+        encoded = {
+            encoding: _entry(path + suffix, stats[path + suffix])
+            for encoding, suffix in ENCODINGS if path + suffix in stats
+        }
+        files[path] = _entry(path, stat, encoded)
+    return files
+
+
+class StaticIndex:
+    def __init__(self, root: str, ttl: int):
+        self.root = root
+        self.ttl = ttl
+        self._files: Dict[str, StaticFile] = {}
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def _ensure_built(self) -> None:
+        if self._built_at is not None and clock.monotonic() - self._built_at < self.ttl:
+            return
+        with self._lock:
+            if self._built_at is not None and clock.monotonic() - self._built_at < self.ttl:
+                return
+            self.rebuild()
+
+    def rebuild(self) -> int:
+        """Rescan the whole folder; returns the number of files indexed"""
+        self._files = _scan(self.root)
+        self._built_at = clock.monotonic()
+        return len(self._files)
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        """The indexed file at `path` (relative, "/"-separated), or None"""
+        self._ensure_built()
+        entry = self._files.get(posixpath.normpath(path))
+        if entry is None:
+            entry = self.add(path)
+        return entry
+
+    def add(self, path: str) -> Optional[StaticFile]:
+        """Index (or re-index) one file, e.g. right after writing it"""
+        # One entry per file however the path is spelled ("a//b", "./a/b", ...)
+        path = posixpath.normpath(path)
+        full_path = safe_join(self.root, path)
+        if full_path is None or not os.path.isfile(full_path):
+            return None
+        encoded = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(full_path + suffix):
+                encoded[encoding] = _entry(path + suffix, os.stat(full_path + suffix))
+        entry = self._files[path] = _entry(path, os.stat(full_path), encoded)
+        return entry
+
+    def discard(self, path: str) -> None:
+        """Forget a file that turned out to be gone"""
+        self._files.pop(posixpath.normpath(path), None)
+
+
+static_index = StaticIndex(Config.UPLOAD_FOLDER, Config.STATIC_INDEX_TTL)
+
+
+def precompress(full_path: str) -> int:
+    """Write .gz (and .br when brotli is installed) siblings of a compressible file; returns how many"""
+    if mimetypes.guess_type(full_path)[0] not in COMPRESSIBLE:
+        return 0
+    written = 0
+    with open(full_path, "rb") as source:
+        data = source.read()
+    for encoding, suffix in ENCODINGS:
+        target = full_path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(full_path):
+            continue
+        if encoding == "gzip":
+            payload = gzip.compress(data, compresslevel=9, mtime=0)
+        elif brotli is not None:
+            payload = brotli.compress(data)
+        else:
+            continue
+        if len(payload) >= len(data):
+            continue  # Not worth a sibling
+        with open(target + ".part", "wb") as out:
+            out.write(payload)
+        shutil.copystat(full_path, target + ".part")
+        os.replace(target + ".part", target)
+        written += 1
+    return written
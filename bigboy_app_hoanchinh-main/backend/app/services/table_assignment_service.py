@@ -0,0 +1,200 @@
+"""
+Table assignment service - Capacity-aware packing of a day's reservations
+
+Best-fit decreasing: the largest parties are placed first, each on the
+smallest table that seats it and is free for its whole window (keeping its
+current table when that is as small). Pinned reservations (the customer
+chose the table) and bookings of neighbouring days stay where they are.
+"""
+import bisect
+from datetime import date, timedelta, timezone
+from typing import NamedTuple, Dict, Optional
+from app.models.reservation_model import ReservationModel
+from app.models.table_model import TableModel
+from app.services.availability_service import (
+    BLOCKING_STATUSES, ReservationConflict, reserve_table, _aware
+)
+from app.services.revenue_service import local_day, day_start
+
+
+class _Floor:
+    """Booked windows per table, kept sorted and non-overlapping"""
+
+    def __init__(self, tables):
+        self.tables = sorted((capacity, number) for number, capacity in tables)
+        self.capacities = [capacity for capacity, _ in self.tables]
+        self.starts = {number: [] for number, _ in tables}
+        self.ends = {number: [] for number, _ in tables}
+
+    def is_free(self, number, start, end) -> bool:
+        starts = self.starts[number]
+        i = bisect.bisect_left(starts, end)
+        return i == 0 or self.ends[number][i - 1] <= start
+
+    def book(self, number, start, end) -> None:
+        i = bisect.bisect_left(self.starts[number], start)
+        self.starts[number].insert(i, start)
+        self.ends[number].insert(i, end)
+
+    def best_fit(self, guests, start, end, current=None) -> Optional[int]:
+        """Smallest free table seating `guests`; the current one wins ties"""
+        i = bisect.bisect_left(self.capacities, guests)
+        while i < len(self.tables):
+            capacity = self.tables[i][0]
+            group = []
+            while i < len(self.tables) and self.tables[i][0] == capacity:
+                number = self.tables[i][1]
+                if self.is_free(number, start, end):
+                    group.append(number)
+                i += 1
+            if group:
+                return current if current in group else group[0]
+        return None
+
+
+class FloorPlan(NamedTuple):
+    day: date
+    tables: Dict[int, int]  # number -> capacity
+    placed: Dict[int, list]  # number -> reservations, by start
+    moves: list  # (reservation, old table, new table)
+    unassigned: list
+
+    def unseated(self) -> list:
+        """Bookings the plan leaves without a table although they hold one now"""
+        return [r for r in self.unassigned if r.table_number is not None]
+
+    def to_dict(self) -> dict:
+        seats = sum(self.tables.values())
+        guests = sum(r.guests for rows in self.placed.values() for r in rows)
+        used_capacity = sum(self.tables[number] * len(rows) for number, rows in self.placed.items())
+
+        def booking(r):
+            return {
+                "id": r.id,
+                "guests": r.guests,
+                "start_at": _aware(r.start_at).isoformat(),
+                "end_at": _aware(r.end_at).isoformat(),
+                "status": r.status.value,
+                "pinned": bool(r.table_pinned)
+            }
+
+        return {
+            "date": self.day.isoformat(),
+            "tables": [{
+                "number": number,
+                "capacity": capacity,
+                "reservations": [booking(r) for r in self.placed.get(number, [])]
+            } for number, capacity in sorted(self.tables.items())],
+            "moves": [{"id": r.id, "from": old, "to": new} for r, old, new in self.moves],
+            "unassigned": [booking(r) for r in self.unassigned],
+            "stats": {
+                "reservations": sum(len(rows) for rows in self.placed.values()) + len(self.unassigned),
+                "seats": seats,
+                "guests": guests,
+                # Share of the assigned tables' seats actually used
+                "seat_utilization": round(guests / used_capacity, 3) if used_capacity else None
+            }
+        }
+
+
+def solve(tables, reservations, fixed=()) -> Dict[int, Optional[int]]:
+    """
+    Assign tables to `reservations` around the `fixed` ones; returns
+    {index in reservations: table number or None}
+    """
+    floor = _Floor(tables)
+    for r in fixed:
+        if r.table_number in floor.starts:
+            floor.book(r.table_number, _aware(r.start_at), _aware(r.end_at))
+
+    order = sorted(
+        range(len(reservations)),
+        key=lambda i: (-(reservations[i].guests or 1), _aware(reservations[i].start_at), i)
+    )
+    result = {}
+    for i in order:
+        r = reservations[i]
+        start, end = _aware(r.start_at), _aware(r.end_at)
+        number = floor.best_fit(r.guests or 1, start, end, current=r.table_number)
+        if number is not None:
+            floor.book(number, start, end)
+        result[i] = number
+    return result
+
+
+def plan_day(session, tenant_id: int, day: date, extra: ReservationModel = None, lock: bool = False) -> FloorPlan:
+    """
+    Re-plan every blocking reservation starting on `day` (plus `extra`, a
+    booking not yet saved). With lock=True the tenant's tables are locked
+    first so the plan can be applied safely; nothing is written here.
+    """
+    table_query = session.query(TableModel.number, TableModel.capacity).filter(TableModel.tenant_id == tenant_id)
+    if lock:
+        table_query = table_query.order_by(TableModel.number).with_for_update()
+    tables = dict(table_query.all())
+
+    day_from = day_start(day).astimezone(timezone.utc)
+    day_to = day_start(day + timedelta(days=1)).astimezone(timezone.utc)
+    bookings = session.query(ReservationModel).filter(
+        ReservationModel.tenant_id == tenant_id,
+        ReservationModel.status.in_(BLOCKING_STATUSES),
+        ReservationModel.start_at < day_to,
+        ReservationModel.end_at > day_from
+    ).all()
+    if extra is not None and extra not in bookings:
+        bookings.append(extra)
+
+    movable, fixed = [], []
+    for r in bookings:
+        on_day = day_from <= _aware(r.start_at) < day_to
+        (movable if on_day and not r.table_pinned else fixed).append(r)
+
+    assignment = solve(tables.items(), movable, fixed)
+    placed, moves, unassigned = {}, [], []
+    for r in fixed:
+        if r.table_number in tables:
+            placed.setdefault(r.table_number, []).append(r)
+    for i, r in enumerate(movable):
+        number = assignment[i]
+        if number is None:
+            unassigned.append(r)
+            continue
+        placed.setdefault(number, []).append(r)
+        if number != r.table_number:
+            moves.append((r, r.table_number, number))
+    for rows in placed.values():
+        rows.sort(key=lambda r: _aware(r.start_at))
+    return FloorPlan(day=day, tables=tables, placed=placed, moves=moves, unassigned=unassigned)
+
+
+def apply_plan(plan: FloorPlan) -> list:
+    """
+    Write the plan's table moves onto the reservations; returns the moved
+    ones. Raises ReservationConflict when the plan would unseat a booking:
+    it keeps its table while others may be moved onto it.
+    """
+    if plan.unseated():
+        raise ReservationConflict("Re-planning would leave seated bookings without a table")
+    for reservation, _, number in plan.moves:
+        reservation.table_number = number
+    return [reservation for reservation, _, _ in plan.moves]
+
+
+def assign_reservation(session, reservation: ReservationModel) -> list:
+    """
+    Place one reservation: best fit into the current floor first; when no
+    table is free, re-plan its day around it. Returns the other reservations
+    the re-plan moved. Raises ReservationConflict when it cannot be seated.
+    """
+    try:
+        reserve_table(session, reservation)
+        return []
+    except ReservationConflict as e:
+        if reservation.table_pinned or e.status_code != 409:
+            raise
+
+    plan = plan_day(session, reservation.tenant_id, local_day(_aware(reservation.start_at)), extra=reservation, lock=True)
+    # Never seat a newcomer by unseating a booking that already had a table
+    if reservation in plan.unassigned or plan.unseated():
+        raise ReservationConflict("No table is available at this time")
+    return [r for r in apply_plan(plan) if r is not reservation]
@@ -0,0 +1,97 @@
+"""
+Tenant service - Cached tenant resolution
+"""
+from typing import NamedTuple, Optional, Any
+from app.config import Config
+from app.infrastructure.databases import session_scope
+from app.infrastructure.events import publish, subscribe
+from app.models.tenant_model import TenantModel, TenantStatus, SubscriptionType
+from app.services.name_service import tenant_names
+from app.utils.cache import TTLCache
+
+
+class TenantRecord(NamedTuple):
+    """Detached, read-only view of a tenant row"""
+    id: int
+    name: str
+    slug: str
+    email: str
+    phone: Optional[str]
+    address: Optional[str]
+    logo: Optional[str]
+    description: Optional[str]
+    status: TenantStatus
+    subscription: SubscriptionType
+    settings: Optional[Any]
+
+    @classmethod
+    def from_model(cls, tenant: TenantModel) -> "TenantRecord":
+        return cls(
+            id=tenant.id,
+            name=tenant.name,
+            slug=tenant.slug,
+            email=tenant.email,
+            phone=tenant.phone,
+            address=tenant.address,
+            logo=tenant.logo,
+            description=tenant.description,
+            status=tenant.status,
+            subscription=tenant.subscription,
+            settings=tenant.settings,
+        )
+
+
+# Same record is stored under ("id", id) and ("slug", slug)
+_tenant_cache = TTLCache(maxsize=Config.TENANT_CACHE_SIZE, ttl=Config.TENANT_CACHE_TTL)
+# Marker for lookups that found nothing (e.g. the DEFAULT_TENANT_ID fallback)
+_MISSING = object()
+# Event bus channel carrying tenant invalidations
+TENANT_CHANNEL = "cache.tenant"
+
+
+def _cache_key(tenant_id_or_slug):
+    try:
+        return ("id", int(tenant_id_or_slug))
+    except (TypeError, ValueError):
+        return ("slug", str(tenant_id_or_slug))
+
+
+def get_tenant(tenant_id_or_slug) -> Optional[TenantRecord]:
+    """Resolve tenant by ID or slug, serving from cache when possible"""
+    key = _cache_key(tenant_id_or_slug)
+    record = _tenant_cache.get(key)
+    if record is _MISSING:
+        return None
+    if record is not None:
+        return record
+
+    kind, value = key
+    column = TenantModel.id if kind == "id" else TenantModel.slug
+    with session_scope() as session:
+        tenant = session.query(TenantModel).filter(column == value).first()
+        if not tenant:
+            _tenant_cache.set(key, _MISSING, ttl=Config.TENANT_CACHE_NEGATIVE_TTL)
+            return None
+        record = TenantRecord.from_model(tenant)
+
+    _tenant_cache.set(("id", record.id), record)
+    _tenant_cache.set(("slug", record.slug), record)
+    return record
+
+
+def invalidate_tenant(tenant_id: int, slug: str = None) -> None:
+    """Drop a tenant from the cache of every worker after it has been created or modified"""
+    publish(TENANT_CHANNEL, {"id": tenant_id, "slug": slug})
+
+
+def _drop_tenant(message) -> None:
+    tenant_id = message["id"]
+    record = _tenant_cache.pop(("id", tenant_id))
+    if record is not None and record is not _MISSING:
+        _tenant_cache.pop(("slug", record.slug))
+    if message.get("slug"):
+        _tenant_cache.pop(("slug", message["slug"]))
+    tenant_names.invalidate(tenant_id)
+
+
+subscribe(TENANT_CHANNEL, _drop_tenant)
@@ -0,0 +1,107 @@
+"""
+Version service - Per-tenant change counters
+
+Bumping a counter locks its row until the transaction ends, so versions of
+one (tenant, scope) commit in increasing order: a reader that has seen
+version N never sees a change with version <= N appear later.
+
+Models registered with track_versions bump their scope automatically on
+every flush that touches them; Core statements bump explicitly.
+"""
+from itertools import chain
+from typing import Dict, Iterable
+from sqlalchemy import event, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.review_model import ReviewModel
+from app.models.table_model import TableModel
+from app.models.tenant_model import TenantModel
+from app.models.version_counter_model import VersionCounterModel
+
+MENU = "menu"
+MENU_PURGED = "menu.purged"  # Highest menu version whose tombstones are gone
+RESTAURANT = "restaurant"  # Tenant profile and rating
+TABLES = "tables"  # Tables and their open checks
+
+
+def bump_version(session, tenant_id: int, scope: str) -> int:
+    """Increment a counter in the caller's transaction; returns the new version"""
+    return set_version(session, tenant_id, scope, None)
+
+
+def set_version(session, tenant_id: int, scope: str, version=None) -> int:
+    """Set a counter (or increment it when version is None); returns its value"""
+    dialect = session.get_bind().dialect.name
+    new_value = VersionCounterModel.version + 1 if version is None else version
+    if dialect in ("postgresql", "sqlite"):
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert_fn(VersionCounterModel).values(
+            tenant_id=tenant_id, scope=scope, version=1 if version is None else version
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "scope"],
+            set_={"version": new_value}
+        ).returning(VersionCounterModel.version)
+        return session.execute(stmt).scalar_one()
+
+    result = session.execute(
+        update(VersionCounterModel)
+        .where(VersionCounterModel.tenant_id == tenant_id, VersionCounterModel.scope == scope)
+        .values(version=new_value)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Core statement: this may run inside a flush
+        session.execute(insert(VersionCounterModel).values(
+            tenant_id=tenant_id, scope=scope, version=1 if version is None else version
+        ))
+    return get_version(session, tenant_id, scope)
+
+
+def get_version(session, tenant_id: int, scope: str) -> int:
+    """Current value of a counter; 0 when it was never bumped"""
+    return session.query(VersionCounterModel.version).filter(
+        VersionCounterModel.tenant_id == tenant_id,
+        VersionCounterModel.scope == scope
+    ).scalar() or 0
+
+
+
+def get_versions(session, tenant_id: int, scopes: Iterable[str]) -> Dict[str, int]:
+    """Several counters of a tenant in one query; 0 for those never bumped"""
+    scopes = list(scopes)
+    rows = dict(session.query(VersionCounterModel.scope, VersionCounterModel.version).filter(
+        VersionCounterModel.tenant_id == tenant_id,
+        VersionCounterModel.scope.in_(scopes)
+    ).all())
+    return {scope: rows.get(scope, 0) for scope in scopes}
+
+
+_tracked = []  # (model, scope, tenant_of)
+
+
+def track_versions(model, scope: str, tenant_of=lambda target: target.tenant_id) -> None:
+    """Bump `scope` of the owning tenant whenever a flush writes a `model` row"""
+    _tracked.append((model, scope, tenant_of))
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_tracked(session, flush_context, instances):
+    keys = set()
+    for target in chain(session.new, session.dirty, session.deleted):
+        for model, scope, tenant_of in _tracked:
+            if not isinstance(target, model):
+                continue
+            if target in session.dirty and not session.is_modified(target):
+                continue
+            tenant_id = tenant_of(target)
+            if tenant_id is not None:
+                keys.add((tenant_id, scope))
+    # Fixed order so concurrent flushes lock counters alike
+    for tenant_id, scope in sorted(keys):
+        bump_version(session, tenant_id, scope)
+
+
+track_versions(TenantModel, RESTAURANT, lambda tenant: tenant.id)
+track_versions(ReviewModel, RESTAURANT)
+track_versions(TableModel, TABLES)
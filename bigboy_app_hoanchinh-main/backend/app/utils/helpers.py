@@ -22,6 +22,8 @@ def generate_slug(name: str) -> str:
     import unicodedata
     import re
     
+    # đ is a letter of its own, not d plus a mark: NFD cannot strip it
+    name = name.replace('đ', 'd').replace('Đ', 'D')
     # Normalize unicode
     name = unicodedata.normalize('NFD', name)
     # Remove diacritics
@@ -342,3 +342,99 @@ def init_riverside_dishes():
     finally:
         session.close()
 
+
+
+def init_rating_summaries():
+    """Backfill restaurant rating summaries for reviews written before they existed"""
+    from app.models.review_model import ReviewModel
+    from app.models.restaurant_rating_model import RestaurantRatingModel
+    from app.services.rating_service import rebuild_rating_summaries
+
+    session = get_session()
+    try:
+        if session.query(RestaurantRatingModel.tenant_id).first() is not None:
+            return
+        if session.query(ReviewModel.id).first() is None:
+            return
+        count = rebuild_rating_summaries(session)
+        session.commit()
+        print(f"✅ Built rating summaries for {count} restaurants")
+    except Exception as e:
+        print(f"❌ Error building rating summaries: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+def init_revenue_rollup():
+    """Backfill the daily revenue rollup for orders paid before it existed"""
+    from app.models.order_model import OrderModel, OrderStatus
+    from app.models.daily_revenue_model import DailyRevenueModel
+    from app.services.revenue_service import rebuild_daily_revenue
+
+    session = get_session()
+    try:
+        if session.query(DailyRevenueModel.tenant_id).first() is not None:
+            return
+        if session.query(OrderModel.id).filter(OrderModel.status == OrderStatus.PAID).first() is None:
+            return
+        count = rebuild_daily_revenue(session)
+        session.commit()
+        print(f"✅ Built daily revenue rollup ({count} rows)")
+    except Exception as e:
+        print(f"❌ Error building daily revenue rollup: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+def init_open_checks():
+    """Open checks for tables that had unpaid orders before checks existed"""
+    from app.models.order_model import OrderModel
+    from app.models.open_check_model import OpenCheckModel
+    from app.services.check_service import CLOSED_STATUSES, rebuild_open_checks
+
+    session = get_session()
+    try:
+        if session.query(OpenCheckModel.tenant_id).first() is not None:
+            return
+        if session.query(OrderModel.id).filter(
+            OrderModel.status.notin_(CLOSED_STATUSES),
+            OrderModel.table_number.isnot(None)
+        ).first() is None:
+            return
+        count = rebuild_open_checks(session)
+        session.commit()
+        print(f"✅ Built open checks ({count} tables)")
+    except Exception as e:
+        print(f"❌ Error building open checks: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+def init_reservation_windows():
+    """Fill start_at/end_at of reservations booked before they existed"""
+    from app.models.reservation_model import ReservationModel
+    from app.services.availability_service import reservation_window
+
+    session = get_session()
+    try:
+        reservations = session.query(ReservationModel).filter(ReservationModel.start_at.is_(None)).all()
+        if not reservations:
+            return
+        filled = 0
+        for reservation in reservations:
+            try:
+                reservation.start_at, reservation.end_at = reservation_window(reservation.date, reservation.time)
+                filled += 1
+            except (TypeError, ValueError):
+                # Free-form time that cannot be placed: left out of availability
+                continue
+        session.commit()
+        print(f"✅ Filled booking windows of {filled}/{len(reservations)} reservations")
+    except Exception as e:
+        print(f"❌ Error filling reservation windows: {e}")
+        session.rollback()
+    finally:
+        session.close()
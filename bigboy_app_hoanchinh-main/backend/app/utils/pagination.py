@@ -0,0 +1,38 @@
+"""
+Pagination helpers
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import text
+
+
+MAX_PAGE_SIZE = 100  # Largest `limit` a list endpoint accepts
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for the row a page ended on"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Return (created_at, id) from a cursor; raises ValueError when malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def estimate_count(session, query) -> int:
+    """Planner row estimate on PostgreSQL, exact count elsewhere"""
+    bind = session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return query.count()
+    statement = query.statement.compile(bind, compile_kwargs={"literal_binds": True})
+    plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily revenue rollup from PAID orders
+Usage:
+  python3 backfill_daily_revenue.py [--tenant ID] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from flask import Flask
+from app.config import Config
+from app.infrastructure.databases import init_db, get_session
+from app.services.revenue_service import rebuild_daily_revenue, parse_day
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily revenue rollup")
+    parser.add_argument("--tenant", type=int, default=None, help="Only this restaurant")
+    parser.add_argument("--from", dest="day_from", default=None, help="First day (YYYY-MM-DD, server timezone)")
+    parser.add_argument("--to", dest="day_to", default=None, help="Last day (YYYY-MM-DD, server timezone)")
+    args = parser.parse_args()
+
+    day_from = parse_day(args.day_from)
+    day_to = parse_day(args.day_to)
+    if (args.day_from and not day_from) or (args.day_to and not day_to):
+        parser.error("dates must be YYYY-MM-DD")
+
+    # Bare app: only the database is needed
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_db(app)
+
+    session = get_session()
+    try:
+        count = rebuild_daily_revenue(session, tenant_id=args.tenant, day_from=day_from, day_to=day_to)
+        session.commit()
+        print(f"✅ Đã tính lại doanh thu theo ngày: {count} dòng ({Config.SERVER_TIMEZONE})")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Lỗi: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
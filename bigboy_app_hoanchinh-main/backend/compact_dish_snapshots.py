@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+One-off job: deduplicate dish snapshots created before content hashing
+Usage:
+  python3 compact_dish_snapshots.py [batch_size]
+"""
+import sys
+import os
+
+# Add parent directory to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from flask import Flask
+from app.config import Config
+from app.infrastructure.databases import init_db, get_session
+from app.services.snapshot_service import compact_dish_snapshots
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # Bare app: only the database (and its schema upgrade) is needed
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_db(app)
+
+    session = get_session()
+    try:
+        stats = compact_dish_snapshots(session, batch_size=batch_size)
+        print(f"✅ Đã gán hash cho {stats['hashed']} snapshot, gộp {stats['merged']} snapshot trùng lặp")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Lỗi: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
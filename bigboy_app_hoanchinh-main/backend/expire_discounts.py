@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Periodic job: mark discounts whose end_date has passed as EXPIRED
+Usage:
+  python3 expire_discounts.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from flask import Flask
+from app.config import Config
+from app.infrastructure.databases import init_db, get_session
+from app.services.discount_service import expire_discounts
+
+
+def main():
+    # Bare app: only the database (and its schema upgrade) is needed
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_db(app)
+
+    session = get_session()
+    try:
+        count = expire_discounts(session)
+        session.commit()
+        print(f"✅ Đã chuyển {count} khuyến mãi sang trạng thái hết hạn")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Lỗi: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Write .gz (and .br, with brotli installed) siblings of compressible uploads,
+served instead of the originals to clients that accept them
+Usage:
+  python3 precompress_uploads.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from app.config import Config
+from app.services.static_service import ENCODINGS, precompress
+
+
+def main():
+    written = 0
+    for directory, _, names in os.walk(Config.UPLOAD_FOLDER):
+        for name in names:
+            if name.endswith(".part") or any(name.endswith(suffix) for _, suffix in ENCODINGS):
+                continue
+            try:
+                written += precompress(os.path.join(directory, name))
+            except OSError as e:
+                print(f"❌ {name}: {e}")
+    print(f"✅ Đã tạo {written} file nén sẵn")
+
+
+if __name__ == "__main__":
+    main()
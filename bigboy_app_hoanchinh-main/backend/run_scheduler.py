@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Standalone scheduler process for the maintenance jobs
+Run it with SCHEDULER_MODE=standalone on the web workers so they skip the jobs.
+Usage:
+  python3 run_scheduler.py
+"""
+import sys
+import os
+import logging
+
+# Add parent directory to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from flask import Flask
+from app.config import Config
+from app.infrastructure.databases import init_db
+from app.infrastructure.scheduler import create_scheduler
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # Bare app: only the database (and its schema upgrade) is needed
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_db(app)
+
+    scheduler, leader = create_scheduler(blocking=True)
+    print(f"✅ Scheduler đang chạy ({type(leader).__name__}), Ctrl+C để dừng")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        leader.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Table assignment service tests
+"""
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import app.models  # noqa: F401 - registers every table
+from app.infrastructure.databases.base import Base
+from app.models.reservation_model import ReservationModel, ReservationStatus
+from app.models.table_model import TableModel
+from app.services.availability_service import ReservationConflict
+from app.services.revenue_service import day_start
+from app.services.table_assignment_service import solve, plan_day, apply_plan
+
+DAY = date(2030, 1, 15)
+TENANT_ID = 1
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _at(hour):
+    return day_start(DAY) + timedelta(hours=hour)
+
+
+def _booking(session, guests, start_hour, end_hour, table_number=None):
+    reservation = ReservationModel(
+        tenant_id=TENANT_ID,
+        table_number=table_number,
+        date=_at(0),
+        time=f"{start_hour:02d}:00",
+        start_at=_at(start_hour),
+        end_at=_at(end_hour),
+        guests=guests,
+        status=ReservationStatus.CONFIRMED
+    )
+    session.add(reservation)
+    return reservation
+
+
+def _tables(session, *tables):
+    for number, capacity in tables:
+        session.add(TableModel(number=number, tenant_id=TENANT_ID, capacity=capacity, token=f"token-{number}"))
+
+
+def test_solve_packs_largest_parties_on_smallest_tables(session):
+    big = _booking(session, 4, 18, 20)
+    small = _booking(session, 2, 18, 20)
+    assert solve([(1, 2), (2, 4), (3, 6)], [small, big]) == {0: 1, 1: 2}
+
+
+def test_solve_leaves_party_without_free_table_unassigned(session):
+    first = _booking(session, 2, 10, 12)
+    second = _booking(session, 2, 11, 13)
+    assert solve([(1, 2)], [first, second]) == {0: 1, 1: None}
+
+
+def test_solve_works_around_fixed_bookings(session):
+    fixed = _booking(session, 2, 10, 12, table_number=1)
+    movable = _booking(session, 2, 11, 13)
+    assert solve([(1, 2), (2, 2)], [movable], [fixed]) == {0: 2}
+
+
+def test_apply_plan_refuses_to_unseat_a_booking(session):
+    _tables(session, (901, 2), (902, 4))
+    first = _booking(session, 2, 10, 12, table_number=902)
+    second = _booking(session, 2, 11, 13, table_number=901)
+    third = _booking(session, 4, 12, 14, table_number=902)
+    session.flush()
+
+    plan = plan_day(session, TENANT_ID, DAY)
+    # Packing moves the first booking onto 901, where the second one sits
+    assert plan.unseated() == [second]
+    with pytest.raises(ReservationConflict):
+        apply_plan(plan)
+    assert (first.table_number, second.table_number, third.table_number) == (902, 901, 902)
+
+
+def test_apply_plan_moves_bookings_when_everyone_stays_seated(session):
+    _tables(session, (901, 2), (902, 4))
+    small = _booking(session, 2, 10, 12, table_number=902)
+    session.flush()
+
+    plan = plan_day(session, TENANT_ID, DAY)
+    assert apply_plan(plan) == [small]
+    assert small.table_number == 901